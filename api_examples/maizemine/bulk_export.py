@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+"""
+Bulk export of InterMine query results in parallel pages
+
+query.rows() fetches results one row at a time over a single connection, which takes
+hours for queries such as all Zea mays genes or proteins. This script gets the result
+count, splits it into start/size pages and fetches the pages from the
+/service/query/results endpoint concurrently (at most --jobs requests at a time). Pages
+are written in order as they arrive, so rows are never all held in memory.
+
+Output formats:
+    tsv      one tab-separated file with a header line
+    parquet  a directory with one part-NNNNN.parquet file per page (needs pandas and pyarrow)
+
+Progress is saved to <output>.progress after each page is written, so an interrupted
+export continues from the last completed page when run again with the same query and
+page size (use --restart to start over).
+
+The query is built with intermine.webservice.Service, or read from a file of query XML
+(--query-xml, e.g., saved from the QueryBuilder "Export XML" link). With --query-xml,
+the intermine package is not needed, and --url can point at any server that implements
+/service/query/results (e.g., mock_query_server.py, a local stand-in for testing).
+
+Usage:
+    $ ./bulk_export.py [--query genes|proteins | --query-xml FILE] [--format tsv|parquet]
+          [--page-size N] [--jobs N] [--url URL] [--restart] <output>
+"""
+import os, sys, json, time, hashlib, argparse
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from dotenv import load_dotenv
+
+MINE_URL = "https://maizemine.rnet.missouri.edu/maizemine"
+SERVICE_URL = MINE_URL + "/service"
+ORGANISM = "Zea mays"
+# Attempts per page before giving up (with exponential backoff between attempts)
+MAX_ATTEMPTS = 4
+TIMEOUT = 300
+
+def gene_query(service):
+    query = service.new_query("Gene")
+    query.add_view("primaryIdentifier", "symbol", "source", "chromosome.primaryIdentifier",
+                   "chromosomeLocation.start", "chromosomeLocation.end", "chromosomeLocation.strand")
+    query.add_constraint("organism.name", "=", ORGANISM, code = "A")
+    return query
+
+def protein_query(service):
+    query = service.new_query("Protein")
+    query.add_view("primaryIdentifier", "primaryAccession", "name", "length", "genes.primaryIdentifier")
+    query.add_constraint("organism.name", "=", ORGANISM, code = "A")
+    return query
+
+QUERIES = {
+    'genes': gene_query,
+    'proteins': protein_query,
+}
+
+def build_query_xml(service_url, token, name):
+    # Only needed when the query is not given as XML
+    from intermine.webservice import Service
+    service = Service(service_url, token = token)
+    return QUERIES[name](service).to_xml()
+
+def get_view(query_xml):
+    # Returns the column paths of the query, e.g. ['Gene.primaryIdentifier', ...]
+    return ET.fromstring(query_xml).get('view', '').split()
+
+class ResultsClient:
+    """
+    Fetches query results from /service/query/results, one page per request.
+    """
+    def __init__(self, service_url, token=None):
+        self.results_url = service_url.rstrip('/') + '/query/results'
+        self.headers = dict()
+        if token:
+            self.headers['Authorization'] = 'Token ' + token
+        self.session = requests.Session()
+
+    def post(self, data):
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                response = self.session.post(self.results_url, data=data, headers=self.headers, timeout=TIMEOUT)
+                response.raise_for_status()
+                return response.text
+            except requests.RequestException as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                print("WARNING: request failed (%s), retrying" % e, file=sys.stderr)
+                time.sleep(2 ** attempt)
+
+    def count(self, query_xml):
+        return int(self.post(dict(query=query_xml, format='count')).strip())
+
+    def get_page(self, query_xml, start, size):
+        # Returns rows as lists of strings. Rows end with '\n' only: values can contain
+        # other characters that str.splitlines() would treat as line breaks (e.g., \x0c, \u2028)
+        text = self.post(dict(query=query_xml, format='tab', start=start, size=size))
+        lines = text.split('\n')
+        if not lines[-1]:
+            lines.pop()
+        return [line.split('\t') for line in lines]
+
+class TsvWriter:
+    """
+    Appends pages to one TSV file; a resumed export truncates the file to the position
+    saved after the last completed page.
+    """
+    def __init__(self, output, view, position):
+        if position:
+            self.f = open(output, 'r+', newline='')
+            self.f.truncate(position)
+            self.f.seek(position)
+        else:
+            self.f = open(output, 'w', newline='')
+            self.f.write('\t'.join(view) + '\n')
+
+    def write_page(self, page_num, rows):
+        for row in rows:
+            self.f.write('\t'.join(row) + '\n')
+        self.f.flush()
+
+    def get_position(self):
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+class ParquetWriter:
+    """
+    Writes each page to its own part file in the output directory.
+    """
+    def __init__(self, output, view, position):
+        import pandas
+        self.pandas = pandas
+        self.output = output
+        self.view = view
+        if not os.path.isdir(output):
+            os.makedirs(output)
+
+    def write_page(self, page_num, rows):
+        part_file = os.path.join(self.output, 'part-%05d.parquet' % page_num)
+        self.pandas.DataFrame(rows, columns=self.view).to_parquet(part_file + '.tmp', index=False)
+        os.replace(part_file + '.tmp', part_file)
+
+    def get_position(self):
+        return 0
+
+    def close(self):
+        pass
+
+WRITERS = {
+    'tsv': TsvWriter,
+    'parquet': ParquetWriter,
+}
+
+class Progress:
+    """
+    Number of pages written so far (and the output file position after them), stored
+    as JSON next to the output.
+    """
+    def __init__(self, progress_file, query_key, resume=True):
+        self.progress_file = progress_file
+        self.query_key = query_key
+        self.pages_done = 0
+        self.position = 0
+        if resume and os.path.exists(progress_file):
+            try:
+                with open(progress_file, 'r') as f:
+                    saved = json.load(f)
+            except ValueError:
+                saved = dict()
+            if saved.get('query_key') == query_key:
+                self.pages_done = saved['pages_done']
+                self.position = saved['position']
+
+    def save(self, pages_done, position):
+        self.pages_done = pages_done
+        self.position = position
+        tmp_file = self.progress_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(dict(query_key=self.query_key, pages_done=pages_done, position=position), f)
+        os.replace(tmp_file, self.progress_file)
+
+    def remove(self):
+        if os.path.exists(self.progress_file):
+            os.remove(self.progress_file)
+
+def export(client, query_xml, output, output_format='tsv', page_size=10000, jobs=4, restart=False):
+    # Returns the number of rows written by this run
+    view = get_view(query_xml)
+    total = client.count(query_xml)
+    num_pages = (total + page_size - 1) // page_size
+    # Saved progress is only used if the query, format, page size and result count match
+    query_key = hashlib.sha256(('%s\n%s\n%d\n%d' % (output_format, query_xml, page_size, total)).encode()).hexdigest()
+    progress = Progress(output + '.progress', query_key, resume=(not restart and os.path.exists(output)))
+    if progress.pages_done:
+        print("Resuming after page %d of %d" % (progress.pages_done, num_pages), file=sys.stderr)
+    print("%d rows in %d pages of %d" % (total, num_pages, page_size), file=sys.stderr)
+
+    writer = WRITERS[output_format](output, view, progress.position)
+    num_rows = 0
+    start_time = time.time()
+    next_page = progress.pages_done
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # Keep a bounded window of pages in flight and write them in order, so that at
+        # most 2 * jobs pages are held in memory
+        pending = deque()
+        while pending or next_page < num_pages:
+            while next_page < num_pages and len(pending) < 2 * jobs:
+                pending.append((next_page, executor.submit(client.get_page, query_xml, next_page * page_size, page_size)))
+                next_page += 1
+            page_num, future = pending.popleft()
+            rows = future.result()
+            writer.write_page(page_num, rows)
+            progress.save(page_num + 1, writer.get_position())
+            num_rows += len(rows)
+            print("Page %d of %d done (%d rows, %.0f rows/sec)"
+                  % (page_num + 1, num_pages, num_rows, num_rows / max(time.time() - start_time, 0.001)), file=sys.stderr)
+    writer.close()
+    progress.remove()
+    return num_rows
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Export InterMine query results in parallel pages.')
+    parser.add_argument('output', help='output file (tsv) or directory (parquet)')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--query', choices=sorted(QUERIES), default='genes', help='predefined query (default: %(default)s)')
+    group.add_argument('--query-xml', help='file with query XML')
+    parser.add_argument('--format', choices=sorted(WRITERS), default='tsv', help='output format (default: %(default)s)')
+    parser.add_argument('--page-size', type=int, default=10000, help='rows per request (default: %(default)s)')
+    parser.add_argument('--jobs', type=int, default=4, help='concurrent requests (default: %(default)s)')
+    parser.add_argument('--url', default=SERVICE_URL, help='service URL (default: %(default)s)')
+    parser.add_argument('--restart', action='store_true', help='ignore saved progress and start over')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # get API key from .env
+    load_dotenv()
+    apiKey = os.getenv('API_KEY')
+
+    if args.query_xml:
+        with open(args.query_xml, 'r') as f:
+            query_xml = f.read().strip()
+    else:
+        query_xml = build_query_xml(args.url, apiKey, args.query)
+    client = ResultsClient(args.url, apiKey)
+    start_time = time.time()
+    num_rows = export(client, query_xml, args.output, args.format, max(1, args.page_size), max(1, args.jobs), args.restart)
+    print("Wrote %d rows to %s in %.1f sec" % (num_rows, args.output, time.time() - start_time), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 import os
 from dotenv import load_dotenv
 from intermine.webservice import Service
+from query_cache import QueryCache, CachedService
 
 MINE_URL = "https://maizemine.rnet.missouri.edu/maizemine"
 SERVICE_URL = MINE_URL + "/service"
@@ -27,12 +28,30 @@ def run_simple_query(service):
         print(row["symbol"], row["source"], row["primaryIdentifier"], row["proteins.name"])
 
 
+def run_cached_query(service):
+    # Results are stored locally, so running this again (until the next MaizeMine release)
+    # does not query the server
+    cached_service = CachedService(service, QueryCache())
+    query = cached_service.new_query("Gene")
+    query.add_view("symbol", "source", "primaryIdentifier", "proteins.name")
+    query.add_constraint("organism.name", "=", "Zea mays", code = "A")
+
+    # Only the first 10 rows are fetched and cached
+    rows = cached_service.rows(query, size=10)
+    print('\nFirst 10 results (cache: %s)' % cached_service.cache.get_stats())
+    for row in rows:
+        print(row["symbol"], row["source"], row["primaryIdentifier"], row["proteins.name"])
+
+
 def main():
     service = Service(SERVICE_URL, token = apiKey)    
 
     # Example 1: Run a simple query
     run_simple_query(service)
 
+    # Example 2: Run the same query, with results cached locally
+    run_cached_query(service)
+
 
 if __name__ == "__main__":
 	main()
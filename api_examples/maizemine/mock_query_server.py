@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""
+Local stand-in for the InterMine /service/query/results endpoint, for testing and
+benchmarking bulk_export.py without going to MaizeMine.
+
+Answers POSTed queries (form fields query, format=count|tab, start, size) with a fixed
+number of synthetic rows: column j of row i is "<view path j>_<i>", so any page can be
+checked against its position in the results. The server can inject 5xx errors (randomly,
+or for the first requests of each page), add response latency, and records the start of
+every page request.
+
+Usage:
+    $ ./mock_query_server.py [--port 8080] [--rows 100000] [--latency 0.2] [--error-rate 0.01]
+and run bulk_export.py with --url http://localhost:8080/service and --query-xml (the
+intermine package cannot build queries against the mock).
+"""
+import json, time, random, threading, argparse
+import xml.etree.ElementTree as ET
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+RESULTS_PATH = '/service/query/results'
+
+def make_row(view, i):
+    return ['%s_%d' % (path, i) for path in view]
+
+class MockQueryHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # keep-alive, like the real service
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def send_text(self, status, text):
+        data = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        server.count('requests')
+        length = int(self.headers.get('Content-Length', 0))
+        params = dict((name, values[0]) for name, values in parse_qs(self.rfile.read(length).decode('utf-8')).items())
+        if self.path != RESULTS_PATH:
+            return self.send_text(404, 'not found')
+
+        if server.latency:
+            time.sleep(random.uniform(0.5, 1.5) * server.latency)
+
+        try:
+            view = ET.fromstring(params['query']).get('view', '').split()
+            start = int(params.get('start', 0))
+            size = int(params.get('size', server.num_rows))
+        except (KeyError, ValueError, ET.ParseError):
+            server.count('400')
+            return self.send_text(400, 'invalid query')
+
+        if params.get('format') == 'count':
+            server.count('200')
+            return self.send_text(200, '%d\n' % server.num_rows)
+        if params.get('format') != 'tab':
+            server.count('400')
+            return self.send_text(400, 'unsupported format')
+
+        if server.should_fail(start):
+            server.count('5xx')
+            return self.send_text(random.choice([500, 502, 503]), 'injected error')
+        server.count('200')
+        rows = [server.make_row(view, i) for i in range(start, min(start + size, server.num_rows))]
+        self.send_text(200, ''.join('\t'.join(row) + '\n' for row in rows))
+
+class MockQueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, num_rows=100000, latency=0.0, error_rate=0.0, fail_first=0, fail_starts=(), verbose=False):
+        ThreadingHTTPServer.__init__(self, address, MockQueryHandler)
+        self.num_rows = num_rows
+        self.latency = latency
+        self.error_rate = error_rate
+        # Number of failed attempts for each page before it is served
+        self.fail_first = fail_first
+        # Pages (by start row) that always fail
+        self.fail_starts = set(fail_starts)
+        self.make_row = make_row
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.counts = dict()
+        # Start row of every page request, in the order received
+        self.page_starts = []
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def should_fail(self, start):
+        with self.lock:
+            attempts = self.page_starts.count(start)
+            self.page_starts.append(start)
+        return start in self.fail_starts or attempts < self.fail_first or random.random() < self.error_rate
+
+    def url(self):
+        return 'http://%s:%d/service' % (self.server_address[0], self.server_address[1])
+
+def start_server(port=0, **kwargs):
+    # Start server in a background thread (port 0 picks a free port); returns the server
+    server = MockQueryServer(('127.0.0.1', port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Local stand-in for the InterMine query results endpoint.')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on (default: %(default)s)')
+    parser.add_argument('--rows', type=int, default=100000, help='number of result rows (default: %(default)s)')
+    parser.add_argument('--latency', type=float, default=0.0, help='mean added latency in seconds (default: %(default)s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of page requests answered with 5xx (default: %(default)s)')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    server = MockQueryServer(('127.0.0.1', args.port), num_rows=args.rows, latency=args.latency,
+                             error_rate=args.error_rate, verbose=args.verbose)
+    print("Mock query service listening on " + server.url())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print("Requests served: " + json.dumps(server.counts, sort_keys=True))
+
+if __name__ == "__main__":
+    main()
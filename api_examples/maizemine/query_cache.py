@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+"""
+Local cache of InterMine query results
+
+Dashboards and notebooks re-run the same queries many times; with this cache, a repeated
+query is read from local disk instead of being run on the server again. Results are
+keyed by the canonical query XML, the requested rows (start and size) and the mine
+release, and stored as gzipped JSON lines (one file per query) with an SQLite index.
+When the cache is larger than its size limit, the least recently used results are
+removed. When the service reports a new release, all cached results are removed.
+Hit/miss counts are kept in the index.
+
+Example:
+    from intermine.webservice import Service
+    from query_cache import QueryCache, CachedService
+
+    service = CachedService(Service(SERVICE_URL, token = apiKey), QueryCache())
+    query = service.new_query("Gene")
+    query.add_view("symbol", "primaryIdentifier")
+    query.add_constraint("organism.name", "=", "Zea mays", code = "A")
+    for row in service.rows(query, size=10):
+        print(row["symbol"], row["primaryIdentifier"])
+
+Usage (cache maintenance):
+    $ ./query_cache.py [--cache-dir DIR] stats|clear
+"""
+import os, sys, gzip, json, time, hashlib, sqlite3, argparse
+import xml.etree.ElementTree as ET
+
+DEFAULT_CACHE_DIR = os.environ.get('QUERY_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'maizemine_queries'))
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# How often to ask the service for its release (seconds)
+RELEASE_CHECK_INTERVAL = 600
+
+SCHEMA = '''
+create table if not exists entry (key text primary key, query text, release text, file text, size integer,
+    rows integer, created real, last_used real);
+create index if not exists entry_last_used on entry (last_used);
+create table if not exists meta (key text primary key, value text);
+create table if not exists stats (name text primary key, value integer);
+'''
+
+def canonical_xml(query_xml):
+    # Same query, same key: attribute order and whitespace between elements are normalized
+    return ET.canonicalize(query_xml, strip_text=True)
+
+class QueryCache:
+    """
+    Query results on disk, indexed in SQLite, with LRU eviction by total size.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'))
+        self.conn.executescript(SCHEMA)
+
+    def get_meta(self, key):
+        row = self.conn.execute("select value from meta where key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("insert or replace into meta values (?, ?)", (key, str(value)))
+        self.conn.commit()
+
+    def add_stat(self, name, n=1):
+        self.conn.execute("insert or ignore into stats values (?, 0)", (name,))
+        self.conn.execute("update stats set value=value+? where name=?", (n, name))
+        self.conn.commit()
+
+    def get_stats(self):
+        stats = dict(hits=0, misses=0, evictions=0, invalidations=0)
+        stats.update(self.conn.execute("select name, value from stats"))
+        stats['entries'], stats['bytes'] = self.conn.execute("select count(*), coalesce(sum(size), 0) from entry").fetchone()
+        stats['release'] = self.get_meta('release')
+        return stats
+
+    def set_release(self, release):
+        # Removes all results if the release has changed
+        release = str(release)
+        current = self.get_meta('release')
+        if current != release:
+            if current is not None:
+                self.clear()
+                self.add_stat('invalidations')
+            self.set_meta('release', release)
+
+    def get_key(self, query_xml, start=0, size=None):
+        return hashlib.sha256(('%s\n%s\n%d\n%s' % (self.get_meta('release'), canonical_xml(query_xml),
+                                                  start, size)).encode()).hexdigest()
+
+    def get(self, query_xml, start=0, size=None):
+        # Returns (view, rows), or None if the query is not cached for these rows
+        key = self.get_key(query_xml, start, size)
+        row = self.conn.execute("select file from entry where key=?", (key,)).fetchone()
+        if row:
+            try:
+                result = read_results(os.path.join(self.cache_dir, row[0]))
+            except (OSError, EOFError, ValueError):
+                # Missing or corrupt file: treat as a miss
+                self.remove(key)
+                result = None
+            if result is not None:
+                self.conn.execute("update entry set last_used=? where key=?", (time.time(), key))
+                self.add_stat('hits')
+                return result
+        self.add_stat('misses')
+        return None
+
+    def put(self, query_xml, view, rows, start=0, size=None):
+        key = self.get_key(query_xml, start, size)
+        filename = key + '.jsonl.gz'
+        path = os.path.join(self.cache_dir, filename)
+        # Write to a temp file and rename so that readers never see a partial file
+        tmp_file = '%s.%d.tmp' % (path, os.getpid())
+        with gzip.open(tmp_file, 'wt') as f:
+            f.write(json.dumps(view) + '\n')
+            for row in rows:
+                f.write(json.dumps(row, separators=(',', ':')) + '\n')
+        os.replace(tmp_file, path)
+        now = time.time()
+        self.conn.execute("insert or replace into entry values (?, ?, ?, ?, ?, ?, ?, ?)",
+                          (key, canonical_xml(query_xml), self.get_meta('release'), filename,
+                           os.path.getsize(path), len(rows), now, now))
+        self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        # Removes least recently used results until the cache fits in max_bytes
+        total = self.conn.execute("select coalesce(sum(size), 0) from entry").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute("select key, size from entry order by last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            self.add_stat('evictions')
+            total -= size
+
+    def remove(self, key):
+        row = self.conn.execute("select file from entry where key=?", (key,)).fetchone()
+        if row and os.path.exists(os.path.join(self.cache_dir, row[0])):
+            os.remove(os.path.join(self.cache_dir, row[0]))
+        self.conn.execute("delete from entry where key=?", (key,))
+        self.conn.commit()
+
+    def clear(self):
+        for key, in self.conn.execute("select key from entry").fetchall():
+            self.remove(key)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def read_results(path):
+    # Returns (view, rows) from a results file
+    with gzip.open(path, 'rt') as f:
+        view = json.loads(f.readline())
+        rows = [json.loads(line) for line in f]
+    return view, rows
+
+class CachedService:
+    """
+    Wraps an intermine.webservice.Service so that query results come from the cache when
+    possible. Other attributes (new_query, etc.) are passed through to the service.
+    """
+    def __init__(self, service, cache, release_check_interval=RELEASE_CHECK_INTERVAL):
+        self.service = service
+        self.cache = cache
+        self.release_check_interval = release_check_interval
+
+    def __getattr__(self, name):
+        return getattr(self.service, name)
+
+    def check_release(self):
+        # Asks the service for its release at most once per interval
+        checked = float(self.cache.get_meta('release_checked') or 0)
+        if time.time() - checked > self.release_check_interval:
+            self.cache.set_release(self.service.release)
+            self.cache.set_meta('release_checked', time.time())
+
+    def rows(self, query, start=0, size=None):
+        # Returns result rows (all, or size rows from start, as with query.rows()) as dicts
+        # keyed by view path relative to the root class, e.g. row["symbol"], row["proteins.name"]
+        self.check_release()
+        query_xml = query.to_xml()
+        result = self.cache.get(query_xml, start, size)
+        if result is None:
+            view = [path.split('.', 1)[1] for path in query.views]
+            rows = [row.to_l() for row in query.rows(start=start, size=size)]
+            self.cache.put(query_xml, view, rows, start, size)
+        else:
+            view, rows = result
+        return [dict(zip(view, row)) for row in rows]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Show statistics for, or clear, the local query results cache.')
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='cache directory (default: %(default)s)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    cache = QueryCache(args.cache_dir)
+    if args.command == 'clear':
+        cache.clear()
+    stats = cache.get_stats()
+    cache.close()
+    lookups = stats['hits'] + stats['misses']
+    print("Release:        %s" % stats['release'])
+    print("Cached queries: %d (%.1f MB)" % (stats['entries'], stats['bytes'] / 1024.0 / 1024.0))
+    print("Hits:           %d (%.0f%% of %d lookups)" % (stats['hits'], 100.0 * stats['hits'] / lookups if lookups else 0, lookups))
+    print("Misses:         %d" % stats['misses'])
+    print("Evictions:      %d" % stats['evictions'])
+    print("Invalidations:  %d" % stats['invalidations'])
+
+if __name__ == "__main__":
+    main()
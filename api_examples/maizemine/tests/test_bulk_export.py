@@ -0,0 +1,89 @@
+import os, sys
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import bulk_export
+from mock_query_server import start_server, make_row
+
+QUERY_XML = '<query model="genomic" view="Gene.primaryIdentifier Gene.symbol"></query>'
+VIEW = ['Gene.primaryIdentifier', 'Gene.symbol']
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    # No backoff between retries
+    monkeypatch.setattr(bulk_export.time, 'sleep', lambda seconds: None)
+
+@pytest.fixture
+def servers():
+    started = []
+    def start(**kwargs):
+        server = start_server(**kwargs)
+        started.append(server)
+        return server
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+def expected_lines(num_rows):
+    return ['\t'.join(VIEW)] + ['\t'.join(make_row(VIEW, i)) for i in range(num_rows)]
+
+def read_lines(output):
+    with open(output, 'r', newline='') as f:
+        return f.read().split('\n')[:-1]
+
+def run_export(server, output, **kwargs):
+    client = bulk_export.ResultsClient(server.url())
+    return bulk_export.export(client, QUERY_XML, output, **kwargs)
+
+def test_export_pages_in_order(tmp_path, servers):
+    # Random latency, so pages complete out of order
+    server = servers(num_rows=1005, latency=0.01)
+    output = str(tmp_path / 'genes.tsv')
+    assert run_export(server, output, page_size=50, jobs=8) == 1005
+    assert read_lines(output) == expected_lines(1005)
+    # 21 pages, each requested once
+    assert sorted(server.page_starts) == list(range(0, 1005, 50))
+    assert not os.path.exists(output + '.progress')
+
+def test_export_retries_failed_pages(tmp_path, servers, no_sleep):
+    server = servers(num_rows=100, fail_first=bulk_export.MAX_ATTEMPTS - 1)
+    output = str(tmp_path / 'genes.tsv')
+    assert run_export(server, output, page_size=30, jobs=2) == 100
+    assert read_lines(output) == expected_lines(100)
+    assert server.counts['5xx'] == 4 * (bulk_export.MAX_ATTEMPTS - 1)
+
+def test_export_resumes_after_failure(tmp_path, servers, no_sleep):
+    output = str(tmp_path / 'genes.tsv')
+    # Page 3 never succeeds: the export stops after writing pages 0-2
+    server = servers(num_rows=200, fail_starts=[60])
+    with pytest.raises(requests.HTTPError):
+        run_export(server, output, page_size=20, jobs=1)
+    assert read_lines(output) == expected_lines(60)
+    assert os.path.exists(output + '.progress')
+
+    server = servers(num_rows=200)
+    assert run_export(server, output, page_size=20, jobs=2) == 140
+    assert read_lines(output) == expected_lines(200)
+    assert sorted(server.page_starts) == list(range(60, 200, 20))
+
+def test_export_restart_ignores_progress(tmp_path, servers, no_sleep):
+    output = str(tmp_path / 'genes.tsv')
+    server = servers(num_rows=100, fail_starts=[40])
+    with pytest.raises(requests.HTTPError):
+        run_export(server, output, page_size=20, jobs=1)
+
+    server = servers(num_rows=100)
+    assert run_export(server, output, page_size=20, jobs=2, restart=True) == 100
+    assert read_lines(output) == expected_lines(100)
+    assert sorted(server.page_starts) == list(range(0, 100, 20))
+
+def test_export_keeps_line_separator_characters_in_values(tmp_path, servers):
+    # Characters that str.splitlines() treats as line breaks
+    value = 'a\x0bb\x0cc\x1cd\x1de\x1ef\x85g\u2028h\u2029i\rj'
+    server = servers(num_rows=10)
+    server.make_row = lambda view, i: ['gene%d' % i, value]
+    output = str(tmp_path / 'genes.tsv')
+    assert run_export(server, output, page_size=3, jobs=2) == 10
+    assert read_lines(output) == ['\t'.join(VIEW)] + ['gene%d\t%s' % (i, value) for i in range(10)]
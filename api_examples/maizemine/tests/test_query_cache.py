@@ -0,0 +1,47 @@
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from query_cache import QueryCache, CachedService
+
+NUM_ROWS = 100
+
+class FakeRow:
+    def __init__(self, values):
+        self.values = values
+
+    def to_l(self):
+        return self.values
+
+class FakeQuery:
+    # Stand-in for intermine.query.Query; records the rows requested from the server
+    views = ['Gene.symbol', 'Gene.primaryIdentifier']
+
+    def __init__(self):
+        self.requests = []
+
+    def to_xml(self):
+        return '<query model="genomic" view="%s"></query>' % ' '.join(self.views)
+
+    def rows(self, start=0, size=None):
+        self.requests.append((start, size))
+        end = NUM_ROWS if size is None else min(start + size, NUM_ROWS)
+        return [FakeRow(['sym%d' % i, 'gene%d' % i]) for i in range(start, end)]
+
+class FakeService:
+    release = 'test'
+
+def test_rows_size_limits_fetch_and_is_part_of_key(tmp_path):
+    service = CachedService(FakeService(), QueryCache(str(tmp_path)))
+    query = FakeQuery()
+    rows = service.rows(query, size=10)
+    assert rows == [dict(symbol='sym%d' % i, primaryIdentifier='gene%d' % i) for i in range(10)]
+    assert query.requests == [(0, 10)]
+    # Same rows again: from the cache
+    assert service.rows(query, size=10) == rows
+    assert query.requests == [(0, 10)]
+    # Other rows of the same query are not answered with the cached 10
+    assert len(service.rows(query, start=5, size=10)) == 10
+    assert len(service.rows(query)) == NUM_ROWS
+    assert query.requests == [(0, 10), (5, 10), (0, None)]
+    stats = service.cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 3, 3)
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+
+"""
+Generate synthetic input files for the benchmarks
+
+Writes realistic-looking inputs of a given size (approximate number of lines per format)
+in the same directory layout as /db/<mine>/datasets, so that the data_parsing and testing
+tools can be run on them unchanged:
+
+    gff3     datasets/RefSeq/annotations/zea_mays/B73_v5/genes/genes.gff3
+             (genes with mRNAs, exons and CDSs, plus tRNAs, ncRNAs and pseudogenes)
+    vcf      datasets/SNP/Ensembl/bos_taurus/ARS-UCD1.2/variants.vcf, plus
+             pseudogenic_transcript_ids.txt (ids of some of the transcripts in the VCF)
+    fasta    datasets/RefSeq/fasta/zea_mays/B73_v5/cds.fa and protein.fa
+    orthodb  datasets/orthodb/orthodb.tab (sorted by cluster id, as the loader requires)
+    mim2gene omim/current/mim2gene.txt (at most 600000 lines: mim numbers have six digits)
+    csv      csv_to_html/input_csv/MaizeMine_v1.0_Data_Sources.csv
+
+Output is deterministic for a given --seed. A manifest.json with the files, lines and
+bytes of each format is written to the output directory; run_benchmarks.py uses it to
+compute lines/sec.
+
+Usage:
+    $ ./generate_data.py [--lines 100000] [--formats gff3,vcf,...] [--seed 1] [--out DIR]
+The default output directory is benchmarks/temp/data/<lines>.
+"""
+import os, sys, json, time, random, argparse
+
+this_path = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(this_path, 'temp', 'data')
+MAX_MIM2GENE_LINES = 600000
+# Lines are written in batches of this size
+BATCH_LINES = 10000
+
+GFF_DIR = os.path.join('datasets', 'RefSeq', 'annotations', 'zea_mays', 'B73_v5', 'genes')
+VCF_DIR = os.path.join('datasets', 'SNP', 'Ensembl', 'bos_taurus', 'ARS-UCD1.2')
+FASTA_DIR = os.path.join('datasets', 'RefSeq', 'fasta', 'zea_mays', 'B73_v5')
+ORTHODB_DIR = os.path.join('datasets', 'orthodb')
+MIM2GENE_DIR = os.path.join('omim', 'current')
+CSV_DIR = os.path.join('csv_to_html', 'input_csv')
+
+NUM_CHROMOSOMES = 10
+CHROMOSOME_LENGTH = 300000000
+DNA = 'ACGT'
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+
+class LineWriter:
+    """
+    Buffered line writer that counts lines.
+    """
+    def __init__(self, filename):
+        self.f = open(filename, 'w')
+        self.buffer = []
+        self.lines = 0
+
+    def write(self, line):
+        self.buffer.append(line)
+        if len(self.buffer) >= BATCH_LINES:
+            self.flush()
+
+    def flush(self):
+        self.f.write('\n'.join(self.buffer))
+        if self.buffer:
+            self.f.write('\n')
+        self.lines += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+class SequencePool:
+    """
+    Random sequences taken as slices of one pre-generated random string, which is much
+    faster than choosing each residue separately.
+    """
+    def __init__(self, rng, alphabet, size=1024 * 1024):
+        self.rng = rng
+        self.pool = ''.join(rng.choices(alphabet, k=size))
+
+    def get_lines(self, length, width=60):
+        # Returns sequence lines of the given width
+        start = self.rng.randrange(len(self.pool) - length)
+        seq = self.pool[start:start + length]
+        return [seq[i:i + width] for i in range(0, length, width)]
+
+def generate_gff3(out_dir, num_lines, rng):
+    filename = os.path.join(out_dir, GFF_DIR, 'genes.gff3')
+    w = LineWriter(filename)
+    w.write('##gff-version 3')
+    for chrom in range(1, NUM_CHROMOSOMES + 1):
+        w.write('##sequence-region chr%d 1 %d' % (chrom, CHROMOSOME_LENGTH))
+    gene_num = 0
+    while w.lines + len(w.buffer) < num_lines:
+        gene_num += 1
+        chrom = 'chr%d' % rng.randint(1, NUM_CHROMOSOMES)
+        start = rng.randint(1, CHROMOSOME_LENGTH - 100000)
+        strand = rng.choice('+-')
+        gene_id = 'gene-Zm%08d' % gene_num
+        kind = rng.random()
+        if kind < 0.03:
+            end = start + rng.randint(70, 90)
+            w.write('%s\tRefSeq\tgene\t%d\t%d\t.\t%s\t.\tID=%s;Name=trn%d;gene_biotype=tRNA' % (chrom, start, end, strand, gene_id, gene_num))
+            w.write('%s\ttRNAscan-SE\ttRNA\t%d\t%d\t.\t%s\t.\tID=rna-trn%d;Parent=%s' % (chrom, start, end, strand, gene_num, gene_id))
+            w.write('%s\ttRNAscan-SE\texon\t%d\t%d\t.\t%s\t.\tID=exon-trn%d-1;Parent=rna-trn%d' % (chrom, start, end, strand, gene_num, gene_num))
+            continue
+        if kind < 0.06:
+            end = start + rng.randint(500, 5000)
+            w.write('%s\tRefSeq\tpseudogene\t%d\t%d\t.\t%s\t.\tID=%s;Name=Zm%08d;pseudo=true' % (chrom, start, end, strand, gene_id, gene_num))
+            w.write('%s\tGnomon\ttranscript\t%d\t%d\t.\t%s\t.\tID=rna-ps%d;Parent=%s' % (chrom, start, end, strand, gene_num, gene_id))
+            continue
+        mrna_type = 'ncRNA' if kind < 0.1 else 'mRNA'
+        exons = []
+        pos = start
+        for i in range(rng.randint(1, 8)):
+            exon_start = pos + rng.randint(50, 2000)
+            exon_end = exon_start + rng.randint(50, 600)
+            exons.append((exon_start, exon_end))
+            pos = exon_end
+        w.write('%s\tRefSeq\tgene\t%d\t%d\t.\t%s\t.\tID=%s;Name=Zm%08d;gene_biotype=protein_coding'
+                % (chrom, start, pos, strand, gene_id, gene_num))
+        for t in range(1, rng.choice([1, 1, 1, 2, 3]) + 1):
+            rna_id = 'rna-Zm%08d.%d' % (gene_num, t)
+            w.write('%s\tGnomon\t%s\t%d\t%d\t.\t%s\t.\tID=%s;Parent=%s;product=uncharacterized protein'
+                    % (chrom, mrna_type, exons[0][0], pos, strand, rna_id, gene_id))
+            for e, (exon_start, exon_end) in enumerate(exons, 1):
+                w.write('%s\tGnomon\texon\t%d\t%d\t.\t%s\t.\tID=exon-Zm%08d.%d-%d;Parent=%s'
+                        % (chrom, exon_start, exon_end, strand, gene_num, t, e, rna_id))
+                if mrna_type == 'mRNA':
+                    w.write('%s\tGnomon\tCDS\t%d\t%d\t.\t%s\t0\tID=cds-Zm%08d.%d-%d;Parent=%s'
+                            % (chrom, exon_start, exon_end, strand, gene_num, t, e, rna_id))
+    w.close()
+    return [filename], w.lines
+
+def generate_vcf(out_dir, num_lines, rng):
+    filename = os.path.join(out_dir, VCF_DIR, 'variants.vcf')
+    ids_filename = os.path.join(out_dir, 'pseudogenic_transcript_ids.txt')
+    num_transcripts = max(10, num_lines // 20)
+    transcripts = ['ENSBTAT%011d' % i for i in range(1, num_transcripts + 1)]
+    pseudogenic = set(rng.sample(transcripts, max(1, num_transcripts // 50)))
+    with open(ids_filename, 'w') as f:
+        for transcript_id in sorted(pseudogenic):
+            f.write(transcript_id + '\n')
+    consequences = ['missense_variant', 'synonymous_variant', 'intron_variant', 'upstream_gene_variant',
+                    '3_prime_UTR_variant', 'non_coding_transcript_exon_variant']
+    feature_types = ['transcript', 'transcript', 'primary_transcript', 'ncRNA', 'mRNA']
+    w = LineWriter(filename)
+    w.write('##fileformat=VCFv4.1')
+    w.write('##INFO=<ID=TSA,Number=0,Type=String,Description="Type of sequence alteration">')
+    w.write('##INFO=<ID=VE,Number=.,Type=String,Description="Allele|Consequence|Index|Feature_type|Feature_id">')
+    w.write('#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO')
+    pos = 0
+    chrom = 1
+    while w.lines + len(w.buffer) < num_lines:
+        pos += rng.randint(1, 3000)
+        if pos > CHROMOSOME_LENGTH:
+            chrom = chrom % NUM_CHROMOSOMES + 1
+            pos = 1
+        ref, alt = rng.sample(DNA, 2)
+        effects = ','.join('%s|%s|%d|%s|%s' % (alt, rng.choice(consequences), i + 1, rng.choice(feature_types), rng.choice(transcripts))
+                           for i in range(rng.randint(1, 4)))
+        w.write('%d\t%d\trs%d\t%s\t%s\t.\t.\tTSA=SNV;VE=%s' % (chrom, pos, rng.randint(1, 10 ** 9), ref, alt, effects))
+    w.close()
+    return [filename, ids_filename], w.lines
+
+def generate_fasta(out_dir, num_lines, rng):
+    cds_filename = os.path.join(out_dir, FASTA_DIR, 'cds.fa')
+    protein_filename = os.path.join(out_dir, FASTA_DIR, 'protein.fa')
+    cds = LineWriter(cds_filename)
+    protein = LineWriter(protein_filename)
+    dna = SequencePool(rng, DNA)
+    amino_acids = SequencePool(rng, AMINO_ACIDS)
+    record = 0
+    while cds.lines + len(cds.buffer) + protein.lines + len(protein.buffer) < num_lines:
+        record += 1
+        length = rng.randint(100, 1200)
+        cds.write('>cds-XP_%09d.1 gene=Zm%08d protein_id=XP_%09d.1' % (record, record, record))
+        for line in dna.get_lines(length * 3):
+            cds.write(line)
+        protein.write('>XP_%09d.1 uncharacterized protein Zm%08d [Zea mays]' % (record, record))
+        for line in amino_acids.get_lines(length):
+            protein.write(line)
+    cds.close()
+    protein.close()
+    return [cds_filename, protein_filename], cds.lines + protein.lines
+
+def generate_orthodb(out_dir, num_lines, rng):
+    filename = os.path.join(out_dir, ORTHODB_DIR, 'orthodb.tab')
+    taxa = [('4577', 'Zea mays'), ('4530', 'Oryza sativa'), ('3702', 'Arabidopsis thaliana'),
+            ('4558', 'Sorghum bicolor'), ('4565', 'Triticum aestivum'), ('9913', 'Bos taurus')]
+    lcas = ['Viridiplantae', 'Poaceae', 'Magnoliopsida', 'Eukaryota']
+    w = LineWriter(filename)
+    cluster = 0
+    gene = 0
+    while w.lines + len(w.buffer) < num_lines:
+        cluster += 1
+        cluster_id = '%dat%d' % (cluster, rng.choice([2759, 33090, 4479]))
+        lca = rng.choice(lcas)
+        for i in range(rng.randint(2, 12)):
+            gene += 1
+            taxon_id, organism = rng.choice(taxa)
+            w.write('%d\t%s\t%s_G%08d\t%s:%06x\t%s\t%s\t%s'
+                    % (gene, cluster_id, taxon_id, gene, taxon_id, gene, organism, taxon_id, lca))
+    w.close()
+    return [filename], w.lines
+
+def generate_mim2gene(out_dir, num_lines, rng):
+    filename = os.path.join(out_dir, MIM2GENE_DIR, 'mim2gene.txt')
+    entry_types = ['gene', 'gene', 'phenotype', 'predominantly phenotypes', 'gene/phenotype', 'moved/removed']
+    w = LineWriter(filename)
+    w.write('# Copyright (c) 1966-2024 Johns Hopkins University. Use of this file adheres to the terms specified at https://omim.org/help/agreement.')
+    w.write('# Generated: %s' % time.strftime('%Y-%m-%d'))
+    w.write('# MIM Number\tMIM Entry Type (see FAQ 1.3 at https://omim.org/help/faq)\tEntrez Gene ID (NCBI)\t'
+            'Approved Gene Symbol (HGNC)\tEnsembl Gene ID (Ensembl)')
+    num_mims = min(num_lines, MAX_MIM2GENE_LINES) - w.lines - len(w.buffer)
+    for mim_number in sorted(rng.sample(range(100000, 700000), max(0, num_mims))):
+        entry_type = rng.choice(entry_types)
+        if entry_type == 'gene' or entry_type == 'gene/phenotype':
+            gene_num = rng.randint(1, 150000)
+            w.write('%d\t%s\t%d\tGENE%d\tENSG%011d' % (mim_number, entry_type, gene_num, gene_num, gene_num))
+        else:
+            w.write('%d\t%s\t\t\t' % (mim_number, entry_type))
+    w.close()
+    return [filename], w.lines
+
+def generate_csv(out_dir, num_lines, rng):
+    filename = os.path.join(out_dir, CSV_DIR, 'MaizeMine_v1.0_Data_Sources.csv')
+    categories = ['Genomics', 'Proteins', 'Homology', 'Function', 'Expression', 'Pathways', 'Variation', 'Publications']
+    sources = ['MaizeGDB', 'RefSeq', 'Ensembl', 'UniProt', 'OrthoDB', 'KEGG', 'Gramene', 'NCBI']
+    w = LineWriter(filename)
+    w.write('Category,Data,Organism,Source,Version,Publication')
+    row = 0
+    while w.lines + len(w.buffer) < num_lines:
+        category = categories[(row // 50) % len(categories)]
+        for i in range(rng.randint(1, 6)):
+            row += 1
+            source = rng.choice(sources)
+            organism = rng.choice(['<i>Zea mays</i>', '<i>Zea mays</i>', '*<i>Zea mays</i>', '<i>Oryza sativa</i>'])
+            url = 'https://ftp.%s.org/pub/release-%d/data_%d.gz' % (source.lower(), rng.randint(1, 60), row)
+            publication = 'PubMed: %d' % rng.randint(1000000, 39999999) if rng.random() < 0.5 else ''
+            w.write('%s,"%s data set %d",%s,%s,"%s",%s' % (category, source, row // 3, organism, url, source + ' release', publication))
+    w.close()
+    return [filename], w.lines
+
+GENERATORS = {
+    'gff3': generate_gff3,
+    'vcf': generate_vcf,
+    'fasta': generate_fasta,
+    'orthodb': generate_orthodb,
+    'mim2gene': generate_mim2gene,
+    'csv': generate_csv,
+}
+FORMATS = ['gff3', 'vcf', 'fasta', 'orthodb', 'mim2gene', 'csv']
+
+def get_data_dir(num_lines):
+    return os.path.join(DEFAULT_DATA_DIR, str(num_lines))
+
+def read_manifest(out_dir):
+    manifest_file = os.path.join(out_dir, 'manifest.json')
+    if not os.path.exists(manifest_file):
+        return dict()
+    with open(manifest_file, 'r') as f:
+        return json.load(f)
+
+def generate(out_dir, num_lines, formats=FORMATS, seed=1):
+    # Generates the given formats (keeping other formats already in out_dir); returns the manifest
+    manifest = read_manifest(out_dir)
+    for data_format in formats:
+        start_time = time.time()
+        # Each format gets its own random stream, so output does not depend on which
+        # other formats are generated
+        rng = random.Random('%s:%s' % (seed, data_format))
+        for subdir in [GFF_DIR, VCF_DIR, FASTA_DIR, ORTHODB_DIR, MIM2GENE_DIR, CSV_DIR]:
+            if not os.path.isdir(os.path.join(out_dir, subdir)):
+                os.makedirs(os.path.join(out_dir, subdir))
+        files, lines = GENERATORS[data_format](out_dir, num_lines, rng)
+        manifest[data_format] = dict(files=[os.path.relpath(filename, out_dir) for filename in files], lines=lines,
+                                     bytes=sum(os.path.getsize(filename) for filename in files), seed=seed)
+        print("%s: %d lines, %.1f MB (%.1f sec)" % (data_format, lines, manifest[data_format]['bytes'] / 1024.0 / 1024.0,
+                                                   time.time() - start_time), file=sys.stderr)
+    manifest_file = os.path.join(out_dir, 'manifest.json')
+    with open(manifest_file + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_file + '.tmp', manifest_file)
+    return manifest
+
+def parse_formats(value):
+    formats = value.split(',')
+    for data_format in formats:
+        if data_format not in GENERATORS:
+            raise argparse.ArgumentTypeError("unknown format %s (choose from %s)" % (data_format, ', '.join(FORMATS)))
+    return formats
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate synthetic input files for the benchmarks.')
+    parser.add_argument('--lines', type=int, default=100000, help='approximate lines per format (default: %(default)s)')
+    parser.add_argument('--formats', type=parse_formats, default=FORMATS, help='comma-separated formats (default: all)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed (default: %(default)s)')
+    parser.add_argument('--out', help='output directory (default: %s/<lines>)' % DEFAULT_DATA_DIR)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    out_dir = args.out or get_data_dir(args.lines)
+    generate(out_dir, args.lines, args.formats, args.seed)
+    print("Data written to " + out_dir, file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
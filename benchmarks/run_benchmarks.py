@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks for the data_parsing, testing and csv_to_html tools on synthetic inputs
+
+"run" generates synthetic inputs (generate_data.py) at each requested scale if they are
+not there yet, runs each tool on them as a separate process and records, per run:
+    wall_sec              elapsed time
+    user_sec, sys_sec     CPU time of the tool and its worker processes
+    max_rss_mb            peak resident set size of the largest single process (os.wait4)
+    lines_per_sec         input lines / wall_sec
+Results are appended to a JSON-lines file with the git commit (and whether the tree had
+uncommitted changes), date, host and CPU count, so that runs can be compared across
+commits. With --repeat N, each benchmark is run N times and the run with the median wall
+time is recorded.
+
+"compare" compares the latest results of two commits (default: the last two commits in
+the results file) for each benchmark and scale, and flags benchmarks that got slower or
+use more memory by more than --threshold (slowdowns under --min-seconds are ignored as
+noise). Exits with status 1 if any are flagged.
+
+Tools that cache results (fasta_count.py, gff_feature_counts.py) get a fresh cache for
+every run, so the times are for a cold cache. get_omim_pubmed.py is run against the local
+mock OMIM API with no rate limit, so its time is the client's request and parsing
+overhead rather than the real API's.
+
+Usage:
+    $ ./run_benchmarks.py run [--lines 100000,1000000] [--benchmarks NAME,...] [--repeat N] [--jobs N]
+    $ ./run_benchmarks.py compare [--base COMMIT] [--head COMMIT] [--threshold 1.2] [--min-seconds 0.5]
+    $ ./run_benchmarks.py list
+"""
+import os, sys, json, time, shutil, socket, platform, subprocess, argparse
+import generate_data
+
+this_path = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(this_path)
+DEFAULT_RESULTS = os.path.join(this_path, 'results', 'results.jsonl')
+WORK_DIR = os.path.join(this_path, 'temp', 'work')
+OMIM_RUN_DIR = os.path.join(REPO_DIR, 'data_parsing', 'omim', 'run')
+# Runs each command in a child of a small launcher process and writes the exit status,
+# wall time and resource usage of the child to a file. On Linux, a process's peak RSS
+# starts at the peak RSS of the process it was forked from, so forking the tool directly
+# from this script would report at least this script's own memory use.
+LAUNCHER = '''
+import os, sys, json, time
+start_time = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    try:
+        os.execvp(sys.argv[2], sys.argv[2:])
+    finally:
+        os._exit(127)
+pid, status, rusage = os.wait4(pid, 0)
+with open(sys.argv[1], 'w') as f:
+    json.dump(dict(exit_code=os.waitstatus_to_exitcode(status), wall=time.perf_counter() - start_time,
+                   utime=rusage.ru_utime, stime=rusage.ru_stime, maxrss=rusage.ru_maxrss), f)
+'''
+
+def tool(*path):
+    # Command prefix to run a Python tool in the repository
+    return [sys.executable, os.path.join(REPO_DIR, *path)]
+
+def gff_files(data_dir):
+    return [os.path.join(data_dir, filename) for filename in generate_data.read_manifest(data_dir)['gff3']['files']]
+
+def fasta_files(data_dir):
+    return [os.path.join(data_dir, filename) for filename in generate_data.read_manifest(data_dir)['fasta']['files']]
+
+# Each benchmark returns (command, working directory, extra environment) for a data
+# directory, a scratch directory for the run's output and the number of jobs
+
+def check_gff_duplicate_ids(data_dir, work_dir, jobs):
+    command = tool('data_parsing', 'check_gff_duplicate_ids.py') + ['--jobs', str(jobs), '--tmpdir', work_dir,
+                                                                   os.path.dirname(gff_files(data_dir)[0])]
+    return command, work_dir, None
+
+def gff_feature_counts(data_dir, work_dir, jobs):
+    command = tool('testing', 'gff_feature_counts.py') + ['--cache', os.path.join(work_dir, 'gff_feature_counts.json')]
+    return command + gff_files(data_dir), work_dir, None
+
+def gff_parent_types(data_dir, work_dir, jobs):
+    command = tool('data_parsing', 'gff_parent_types.py') + ['--jobs', str(jobs), '--sources', 'RefSeq',
+                                                            '--datasets', os.path.join(data_dir, 'datasets'), 'exon', 'CDS', 'transcript']
+    return command, work_dir, None
+
+def snp_pseudogenic_transcripts(data_dir, work_dir, jobs):
+    command = tool('data_parsing', 'snp_pseudogenic_transcripts.py') + [
+        '--jobs', str(jobs), '--dry-run', '--snp-dir', os.path.join(data_dir, 'datasets', 'SNP', 'Ensembl'),
+        os.path.join(data_dir, 'pseudogenic_transcript_ids.txt'), 'bos_taurus']
+    return command, work_dir, None
+
+def fasta_count(data_dir, work_dir, jobs):
+    command = tool('testing', 'fasta_count.py') + ['--jobs', str(jobs), '--cache', os.path.join(work_dir, 'fasta_counts.json')]
+    return command + fasta_files(data_dir), work_dir, None
+
+def orthodb_stats(data_dir, work_dir, jobs):
+    command = tool('data_parsing', 'orthodb_stats.py') + ['--jobs', str(jobs), os.path.join(data_dir, generate_data.ORTHODB_DIR)]
+    return command, work_dir, None
+
+def omim_pubmed(data_dir, work_dir, jobs):
+    # get_omim_pubmed.py writes its log to ../logs relative to the working directory
+    run_dir = os.path.join(work_dir, 'omim', 'run')
+    for subdir in [run_dir, os.path.join(work_dir, 'omim', 'logs')]:
+        os.makedirs(subdir)
+    command = tool('data_parsing', 'omim', 'run', 'get_omim_pubmed.py') + [
+        '--no-cache', '--rate', '100000', '--workers', '16',
+        '--input', os.path.join(data_dir, generate_data.MIM2GENE_DIR, 'mim2gene.txt'),
+        '--output', os.path.join(work_dir, 'pubmed_cited.txt')]
+    return command, run_dir, dict(OMIM_API_URL=get_mock_omim_url(), API_KEY='benchmark')
+
+def csv_to_html(data_dir, work_dir, jobs):
+    # dataSourceCSVtoHTML.py reads and writes paths relative to the working directory
+    run_dir = os.path.join(work_dir, 'csv_to_html')
+    shutil.copytree(os.path.join(data_dir, generate_data.CSV_DIR), os.path.join(run_dir, 'input_csv'))
+    shutil.copytree(os.path.join(REPO_DIR, 'csv_to_html', 'link_rules'), os.path.join(run_dir, 'link_rules'))
+    os.makedirs(os.path.join(run_dir, 'output_html'))
+    return tool('csv_to_html', 'dataSourceCSVtoHTML.py') + ['MaizeMine', '1.0'], run_dir, None
+
+# name -> (input format, function)
+BENCHMARKS = {
+    'check_gff_duplicate_ids': ('gff3', check_gff_duplicate_ids),
+    'gff_feature_counts': ('gff3', gff_feature_counts),
+    'gff_parent_types': ('gff3', gff_parent_types),
+    'snp_pseudogenic_transcripts': ('vcf', snp_pseudogenic_transcripts),
+    'fasta_count': ('fasta', fasta_count),
+    'orthodb_stats': ('orthodb', orthodb_stats),
+    'omim_pubmed': ('mim2gene', omim_pubmed),
+    'csv_to_html': ('csv', csv_to_html),
+}
+
+mock_omim_server = None
+
+def get_mock_omim_url():
+    # Starts the mock OMIM API (once) in a background thread
+    global mock_omim_server
+    if mock_omim_server is None:
+        sys.path.insert(0, OMIM_RUN_DIR)
+        import mock_omim_server as mock
+        mock_omim_server = mock.start_server()
+    return mock_omim_server.url()
+
+def get_git_info():
+    # Returns (commit, whether the tree has uncommitted changes)
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, stderr=subprocess.DEVNULL).decode().strip()
+        status = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                                         stderr=subprocess.DEVNULL).decode()
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def run_command(command, cwd, env, log_file, usage_file):
+    # Returns dict(exit_code, wall, utime, stime, maxrss) for the command; times include
+    # worker processes that the command waited for, maxrss (KB) is the largest process
+    full_env = dict(os.environ)
+    if env:
+        full_env.update(env)
+    with open(log_file, 'w') as log:
+        launcher_exit_code = subprocess.call([sys.executable, '-c', LAUNCHER, usage_file] + command, cwd=cwd,
+                                             env=full_env, stdout=log, stderr=subprocess.STDOUT)
+    if launcher_exit_code != 0 or not os.path.exists(usage_file):
+        return dict(exit_code=launcher_exit_code or -1, wall=0, utime=0, stime=0, maxrss=0)
+    with open(usage_file, 'r') as f:
+        return json.load(f)
+
+def run_benchmark(name, data_dir, num_lines, jobs, repeat):
+    data_format, func = BENCHMARKS[name]
+    input_lines = generate_data.read_manifest(data_dir)[data_format]['lines']
+    runs = []
+    for i in range(repeat):
+        work_dir = os.path.join(WORK_DIR, name)
+        if os.path.exists(work_dir):
+            shutil.rmtree(work_dir)
+        os.makedirs(work_dir)
+        command, cwd, env = func(data_dir, work_dir, jobs)
+        log_file = os.path.join(WORK_DIR, name + '.log')
+        usage = run_command(command, cwd, env, log_file, os.path.join(WORK_DIR, name + '.usage.json'))
+        runs.append(dict(exit_code=usage['exit_code'], wall_sec=round(usage['wall'], 3), user_sec=round(usage['utime'], 3),
+                         sys_sec=round(usage['stime'], 3), max_rss_mb=round(usage['maxrss'] / 1024.0, 1)))
+        if usage['exit_code'] != 0:
+            print("WARNING: %s exited with status %d, see %s" % (name, usage['exit_code'], log_file), file=sys.stderr)
+            break
+    # Median run by wall time
+    result = sorted(runs, key=lambda run: run['wall_sec'])[(len(runs) - 1) // 2]
+    result.update(benchmark=name, format=data_format, scale=num_lines, input_lines=input_lines, runs=len(runs),
+                  lines_per_sec=round(input_lines / result['wall_sec'], 1) if result['wall_sec'] else None,
+                  wall_sec_all=[run['wall_sec'] for run in runs], ok=result['exit_code'] == 0)
+    return result
+
+def read_results(results_file):
+    results = []
+    if os.path.exists(results_file):
+        with open(results_file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    results.append(json.loads(line))
+    return results
+
+def run(args):
+    commit, dirty = get_git_info()
+    if dirty:
+        print("WARNING: tree has uncommitted changes; results are recorded against %s with dirty=true" % commit,
+              file=sys.stderr)
+    results_dir = os.path.dirname(args.results)
+    if results_dir and not os.path.isdir(results_dir):
+        os.makedirs(results_dir)
+    info = dict(commit=commit, dirty=dirty, date=time.strftime('%Y-%m-%d %H:%M:%S'), host=socket.gethostname(),
+                cpus=os.cpu_count(), jobs=args.jobs, python=platform.python_version())
+    print("%-28s %12s %10s %10s %10s %14s" % ('benchmark', 'lines', 'wall sec', 'cpu sec', 'max RSS MB', 'lines/sec'))
+    for num_lines in args.lines:
+        data_dir = generate_data.get_data_dir(num_lines)
+        manifest = generate_data.read_manifest(data_dir)
+        formats = sorted(set(BENCHMARKS[name][0] for name in args.benchmarks) - set(manifest))
+        if formats:
+            print("Generating %s inputs with %d lines in %s" % (', '.join(formats), num_lines, data_dir), file=sys.stderr)
+            generate_data.generate(data_dir, num_lines, formats)
+        for name in args.benchmarks:
+            result = run_benchmark(name, data_dir, num_lines, args.jobs, args.repeat)
+            result.update(info)
+            with open(args.results, 'a') as f:
+                f.write(json.dumps(result, sort_keys=True) + '\n')
+            print("%-28s %12d %10.2f %10.2f %10.1f %14.0f%s"
+                  % (name, result['input_lines'], result['wall_sec'], result['user_sec'] + result['sys_sec'],
+                     result['max_rss_mb'], result['lines_per_sec'] or 0, '' if result['ok'] else '  FAILED'))
+    print("Results appended to " + args.results)
+
+def get_latest(results, commit):
+    # Returns dict of (benchmark, scale) -> latest successful result for commit
+    latest = dict()
+    for result in results:
+        if result['commit'] == commit and result['ok']:
+            latest[(result['benchmark'], result['scale'])] = result
+    return latest
+
+def compare(args):
+    results = read_results(args.results)
+    commits = []
+    for result in results:
+        if result['commit'] in commits:
+            commits.remove(result['commit'])
+        commits.append(result['commit'])
+    head = args.head or (commits[-1] if commits else None)
+    base = args.base or (commits[-2] if len(commits) > 1 else None)
+    # Allow abbreviated commits
+    head = next((commit for commit in commits if commit and head and commit.startswith(head)), head)
+    base = next((commit for commit in commits if commit and base and commit.startswith(base)), base)
+    if not base or not head or base == head:
+        print("Need results for two commits in %s to compare" % args.results)
+        sys.exit(2)
+    base_results = get_latest(results, base)
+    head_results = get_latest(results, head)
+    print("Comparing %s (base) with %s (head)" % (base[:10], head[:10]))
+    print()
+    print("%-28s %12s %10s %10s %8s %10s %10s %8s" % ('benchmark', 'lines', 'base sec', 'head sec', 'change',
+                                                       'base MB', 'head MB', 'change'))
+    regressions = 0
+    for key in sorted(set(base_results) & set(head_results)):
+        base_result = base_results[key]
+        head_result = head_results[key]
+        time_ratio = head_result['wall_sec'] / base_result['wall_sec'] if base_result['wall_sec'] else 1
+        rss_ratio = head_result['max_rss_mb'] / base_result['max_rss_mb'] if base_result['max_rss_mb'] else 1
+        flags = []
+        if time_ratio > args.threshold and head_result['wall_sec'] - base_result['wall_sec'] >= args.min_seconds:
+            flags.append('SLOWER')
+        if rss_ratio > args.threshold:
+            flags.append('MORE MEMORY')
+        regressions += bool(flags)
+        line = ("%-28s %12d %10.2f %10.2f %+7.0f%% %10.1f %10.1f %+7.0f%%  %s"
+                % (key[0], head_result['input_lines'], base_result['wall_sec'], head_result['wall_sec'], (time_ratio - 1) * 100,
+                   base_result['max_rss_mb'], head_result['max_rss_mb'], (rss_ratio - 1) * 100, ' '.join(flags)))
+        print(line.rstrip())
+    for key in sorted(set(base_results) ^ set(head_results)):
+        print("%-28s %12d (only in %s)" % (key[0], key[1], 'base' if key in base_results else 'head'))
+    print()
+    if regressions:
+        print("%d benchmark(s) more than %.0f%% slower or larger" % (regressions, (args.threshold - 1) * 100))
+    else:
+        print("No regressions")
+    sys.exit(1 if regressions else 0)
+
+def list_benchmarks(args):
+    for name in sorted(BENCHMARKS):
+        print("%-28s %s" % (name, BENCHMARKS[name][0]))
+
+def parse_list(value, choices=None):
+    items = [item for item in value.split(',') if item]
+    for item in items:
+        if choices is not None and item not in choices:
+            raise argparse.ArgumentTypeError("unknown benchmark %s (see run_benchmarks.py list)" % item)
+    return items
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the data parsing and testing tools on synthetic inputs.')
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help='results file (default: %(default)s)')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+    run_parser = subparsers.add_parser('run', help='run benchmarks and record results')
+    run_parser.add_argument('--lines', type=lambda value: [int(item) for item in parse_list(value)], default=[100000],
+                            help='comma-separated input sizes in lines per format (default: 100000)')
+    run_parser.add_argument('--benchmarks', type=lambda value: parse_list(value, BENCHMARKS), default=sorted(BENCHMARKS),
+                            help='comma-separated benchmarks (default: all)')
+    run_parser.add_argument('--repeat', type=int, default=1, help='runs per benchmark, median recorded (default: %(default)s)')
+    run_parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='--jobs passed to the tools (default: number of CPUs)')
+    run_parser.set_defaults(func=run)
+    compare_parser = subparsers.add_parser('compare', help='compare results of two commits')
+    compare_parser.add_argument('--base', help='base commit (default: second to last commit in results)')
+    compare_parser.add_argument('--head', help='head commit (default: last commit in results)')
+    compare_parser.add_argument('--threshold', type=float, default=1.2,
+                                help='flag ratios of head to base above this (default: %(default)s)')
+    compare_parser.add_argument('--min-seconds', type=float, default=0.5,
+                                help='only flag slowdowns of at least this many seconds (default: %(default)s)')
+    compare_parser.set_defaults(func=compare)
+    list_parser = subparsers.add_parser('list', help='list benchmarks and their input formats')
+    list_parser.set_defaults(func=list_benchmarks)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if getattr(args, 'repeat', 1) < 1:
+        sys.exit("--repeat must be at least 1")
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
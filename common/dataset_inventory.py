@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+"""
+Cached inventory of the /db/*/datasets tree
+
+Walks the datasets tree once and records every directory entry (name, type, size, mtime)
+in an SQLite file, along with the organism -> taxon id lookups from
+project_xml/taxon_ids.tab, so that project.xml generation and the data checks can look
+the layout up instead of running find/ls/wc over NFS for each source and organism.
+
+The cache is refreshed incrementally: a directory whose mtime has not changed keeps its
+stored entries and only its subdirectories are visited (adding, removing or renaming an
+entry changes the directory mtime; editing a file in place does not, so use --full to
+pick up new sizes/mtimes of existing files). Symlinked directories are followed.
+Directories that are not in the cache (e.g., outside the datasets tree) are read live.
+
+Usage:
+    $ ./dataset_inventory.py refresh [--full]        update the cache
+    $ ./dataset_inventory.py orgs <dir>              subdirectories (not symlinks, not "old"), sorted
+    $ ./dataset_inventory.py count-files <dir>       number of files in dir (following symlinks)
+    $ ./dataset_inventory.py ls <dir>                entry names, like ls
+    $ ./dataset_inventory.py files [--recursive] [--pattern GLOB] [--long] <dir> ...
+    $ ./dataset_inventory.py taxon-id <organism name>
+    $ ./dataset_inventory.py table <dir>             all of the above for every directory below dir
+Query commands build the cache first if it does not exist. The cache file defaults to
+common/temp/dataset_inventory.db (or $DATASET_INVENTORY_DB).
+"""
+import os, sys, glob, time, fnmatch, sqlite3, argparse
+
+this_path = os.path.dirname(os.path.abspath(__file__))
+DATASETS_GLOB = '/db/*/datasets'
+DEFAULT_DB = os.environ.get('DATASET_INVENTORY_DB', os.path.join(this_path, 'temp', 'dataset_inventory.db'))
+TAXON_FILE = os.path.join(this_path, '..', 'project_xml', 'taxon_ids.tab')
+
+SCHEMA = '''
+create table if not exists dir (path text primary key, mtime_ns integer);
+create table if not exists entry (parent text, name text, is_dir integer, is_file integer, is_link integer,
+    size integer, mtime_ns integer, primary key (parent, name));
+create table if not exists taxon (name text primary key, taxon_id text);
+create table if not exists meta (key text primary key, value text);
+'''
+
+class DatasetInventory:
+    """
+    SQLite-backed directory listing of the datasets tree.
+    """
+    def __init__(self, db_file=DEFAULT_DB, datasets_glob=DATASETS_GLOB, taxon_file=TAXON_FILE, auto_refresh=True):
+        self.db_file = db_file
+        self.datasets_glob = datasets_glob
+        self.taxon_file = taxon_file
+        db_dir = os.path.dirname(db_file)
+        if db_dir and not os.path.isdir(db_dir):
+            os.makedirs(db_dir)
+        is_new = not os.path.exists(db_file)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.executescript(SCHEMA)
+        if is_new and auto_refresh:
+            self.refresh()
+
+    def get_meta(self, key):
+        row = self.conn.execute("select value from meta where key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("insert or replace into meta values (?, ?)", (key, str(value)))
+
+    def refresh(self, full=False):
+        # Returns (directories read, directories reused from the cache)
+        stored = dict(self.conn.execute("select path, mtime_ns from dir"))
+        roots = sorted(os.path.normpath(path) for path in glob.glob(self.datasets_glob) if os.path.isdir(path))
+        seen = set()
+        visited_inodes = set()
+        num_read = 0
+        num_reused = 0
+        stack = list(reversed(roots))
+        while stack:
+            path = stack.pop()
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            # Symlinked directories are followed, so guard against cycles
+            if (st.st_dev, st.st_ino) in visited_inodes or path in seen:
+                continue
+            visited_inodes.add((st.st_dev, st.st_ino))
+            seen.add(path)
+            if not full and stored.get(path) == st.st_mtime_ns:
+                num_reused += 1
+                subdirs = [name for name, in self.conn.execute(
+                    "select name from entry where parent=? and is_dir=1 order by name", (path,))]
+            else:
+                num_read += 1
+                subdirs = self.read_dir(path, st.st_mtime_ns)
+            stack.extend(os.path.join(path, name) for name in reversed(subdirs))
+        for path in set(stored) - seen:
+            self.conn.execute("delete from dir where path=?", (path,))
+            self.conn.execute("delete from entry where parent=?", (path,))
+        self.set_meta('roots', '\n'.join(roots))
+        self.set_meta('refreshed', time.strftime('%Y-%m-%d %H:%M:%S'))
+        self.load_taxon_ids()
+        self.conn.commit()
+        return num_read, num_reused
+
+    def read_dir(self, path, mtime_ns):
+        # Replaces the stored entries of one directory; returns its subdirectory names
+        rows = []
+        for entry in read_entries(path):
+            rows.append((path,) + entry)
+        self.conn.execute("delete from entry where parent=?", (path,))
+        self.conn.executemany("insert into entry values (?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.execute("insert or replace into dir values (?, ?)", (path, mtime_ns))
+        return sorted(row[1] for row in rows if row[2])
+
+    def load_taxon_ids(self):
+        if not os.path.exists(self.taxon_file):
+            return
+        mtime_ns = str(os.stat(self.taxon_file).st_mtime_ns)
+        if self.get_meta('taxon_file_mtime_ns') == mtime_ns:
+            return
+        self.conn.execute("delete from taxon")
+        with open(self.taxon_file, 'r') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) > 1 and fields[0]:
+                    self.conn.execute("insert or replace into taxon values (?, ?)", (fields[0], fields[1]))
+        self.set_meta('taxon_file_mtime_ns', mtime_ns)
+
+    def list_dir(self, path):
+        # Returns list of (name, is_dir, is_file, is_link, size, mtime_ns), or None if path
+        # is not a directory
+        path = os.path.normpath(path)
+        if self.conn.execute("select 1 from dir where path=?", (path,)).fetchone():
+            return self.conn.execute("select name, is_dir, is_file, is_link, size, mtime_ns from entry "
+                                     "where parent=? order by name", (path,)).fetchall()
+        if not os.path.isdir(path):
+            return None
+        return sorted(read_entries(path))
+
+    def walk_entries(self, path):
+        # Yields (dirpath, entries) for path and all directories below it. Each directory
+        # is walked once: symlinked directories are followed after all real directories,
+        # and only if their target has not been walked already (e.g., a link to a sibling
+        # directory is skipped)
+        visited = set()
+        stack = [os.path.normpath(path)]
+        links = []
+        while stack or links:
+            if not stack:
+                stack.append(links.pop(0))
+            dirpath = stack.pop()
+            real_path = os.path.realpath(dirpath)
+            if real_path in visited:
+                continue
+            visited.add(real_path)
+            entries = self.list_dir(dirpath)
+            if entries is None:
+                continue
+            yield dirpath, entries
+            subdirs = [(os.path.join(dirpath, entry[0]), entry[3]) for entry in entries if entry[1]]
+            stack.extend(subdir for subdir, is_link in reversed(subdirs) if not is_link)
+            links.extend(subdir for subdir, is_link in subdirs if is_link)
+
+    def walk(self, path):
+        # Like os.walk(path, followlinks=True), but each directory is walked once: yields
+        # (dirpath, dirnames, filenames)
+        for dirpath, entries in self.walk_entries(path):
+            yield dirpath, [entry[0] for entry in entries if entry[1]], [entry[0] for entry in entries if entry[2]]
+
+    def get_taxon_ids(self, fullname):
+        # Exact (case-insensitive) name match, otherwise all names containing fullname
+        self.load_taxon_ids()
+        rows = self.conn.execute("select taxon_id from taxon where lower(name)=lower(?)", (fullname,)).fetchall()
+        if not rows:
+            rows = self.conn.execute("select taxon_id from taxon where instr(lower(name), lower(?)) > 0 order by name",
+                                     (fullname,)).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def read_entries(path):
+    # Returns list of (name, is_dir, is_file, is_link, size, mtime_ns) read from disk;
+    # types, size and mtime follow symlinks (a broken symlink is neither dir nor file)
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                is_link = entry.is_symlink()
+                try:
+                    st = entry.stat()
+                    is_dir = entry.is_dir()
+                    is_file = entry.is_file()
+                except OSError:
+                    st = None
+                    is_dir = is_file = False
+                entries.append((entry.name, int(is_dir), int(is_file), int(is_link),
+                                st.st_size if st else 0, st.st_mtime_ns if st else 0))
+    except OSError:
+        pass
+    return entries
+
+def print_orgs(inventory, args):
+    entries = inventory.list_dir(args.dir) or []
+    orgs = [name for name, is_dir, is_file, is_link, size, mtime_ns in entries if is_dir and not is_link and name != 'old']
+    for name in orgs:
+        print(name)
+    return 0 if orgs else 1
+
+def print_count_files(inventory, args):
+    entries = inventory.list_dir(args.dir) or []
+    print(sum(1 for entry in entries if entry[2]))
+    return 0
+
+def print_ls(inventory, args):
+    entries = inventory.list_dir(args.dir)
+    if entries is None:
+        return 2
+    for entry in entries:
+        if not entry[0].startswith('.'):
+            print(entry[0])
+    return 0
+
+def print_files(inventory, args):
+    for top in args.dirs:
+        top = os.path.normpath(top)
+        if args.recursive:
+            dirs = inventory.walk_entries(top)
+        else:
+            dirs = [(top, inventory.list_dir(top) or [])]
+        for dirpath, entries in dirs:
+            for name, is_dir, is_file, is_link, size, mtime_ns in entries:
+                if not is_file or (args.pattern and not fnmatch.fnmatch(name, args.pattern)):
+                    continue
+                filename = os.path.join(dirpath, name)
+                if args.long:
+                    print("%s\t%d\t%d" % (filename, size, mtime_ns))
+                else:
+                    print(filename)
+    return 0
+
+def print_taxon_id(inventory, args):
+    taxon_ids = inventory.get_taxon_ids(args.name)
+    for taxon_id in taxon_ids:
+        print(taxon_id)
+    return 0 if taxon_ids else 1
+
+def print_table(inventory, args):
+    # One tab-separated line per lookup, so that a shell script can load everything it
+    # needs with one call instead of one per organism and assembly:
+    #   subdir  <dir>  <name>                  as listed by orgs (one line per subdirectory)
+    #   count   <dir>  <files>  <entries>      as printed by count-files, and ls | wc -l
+    #   taxon   <lowercase organism name>  <taxon ids, space-separated>
+    # Organism names are the subdirectory names with '_' replaced by ' '.
+    names = set()
+    for dirpath, entries in inventory.walk_entries(args.dir):
+        for name, is_dir, is_file, is_link, size, mtime_ns in entries:
+            if is_dir and not is_link and name != 'old':
+                print("subdir\t%s\t%s" % (dirpath, name))
+                names.add(name.replace('_', ' ').lower())
+        print("count\t%s\t%d\t%d" % (dirpath, sum(1 for entry in entries if entry[2]),
+                                      sum(1 for entry in entries if not entry[0].startswith('.'))))
+    for name in sorted(names):
+        print("taxon\t%s\t%s" % (name, ' '.join(inventory.get_taxon_ids(name))))
+    return 0
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Cached inventory of the datasets directory tree.')
+    parser.add_argument('--db', default=DEFAULT_DB, help='cache file (default: %(default)s)')
+    parser.add_argument('--datasets', default=DATASETS_GLOB, help='datasets directory glob (default: %(default)s)')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+    refresh_parser = subparsers.add_parser('refresh', help='update the cache')
+    refresh_parser.add_argument('--full', action='store_true', help='re-read every directory')
+    for command, func, help_text in [('orgs', print_orgs, 'list subdirectories'),
+                                     ('count-files', print_count_files, 'count files in a directory'),
+                                     ('ls', print_ls, 'list directory entries')]:
+        command_parser = subparsers.add_parser(command, help=help_text)
+        command_parser.add_argument('dir')
+        command_parser.set_defaults(func=func)
+    files_parser = subparsers.add_parser('files', help='list files')
+    files_parser.add_argument('dirs', nargs='+')
+    files_parser.add_argument('--recursive', action='store_true', help='include subdirectories')
+    files_parser.add_argument('--pattern', help='file name glob, e.g. "*.gff3"')
+    files_parser.add_argument('--long', action='store_true', help='also print size and mtime (ns)')
+    files_parser.set_defaults(func=print_files)
+    taxon_parser = subparsers.add_parser('taxon-id', help='look up taxon id(s) in taxon_ids.tab')
+    taxon_parser.add_argument('name')
+    taxon_parser.set_defaults(func=print_taxon_id)
+    table_parser = subparsers.add_parser('table', help='print all listings and taxon ids below a directory at once')
+    table_parser.add_argument('dir')
+    table_parser.set_defaults(func=print_table)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    inventory = DatasetInventory(args.db, args.datasets, auto_refresh=(args.command != 'refresh'))
+    if args.command == 'refresh':
+        start_time = time.time()
+        num_read, num_reused = inventory.refresh(args.full)
+        inventory.close()
+        print("Dataset inventory refreshed: %d directories read, %d unchanged (%.1f sec)"
+              % (num_read, num_reused, time.time() - start_time))
+        return
+    ec = args.func(inventory, args)
+    inventory.close()
+    sys.exit(ec)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_inventory import DatasetInventory, print_table as inventory_table
+
+def make_tree(tmp_path):
+    # /db/testmine/datasets with two organism directories, a link to one of them and a
+    # link to a directory outside the datasets tree
+    datasets = tmp_path / 'db' / 'testmine' / 'datasets'
+    for org in ['org1', 'org2']:
+        (datasets / 'genes' / org).mkdir(parents=True)
+        (datasets / 'genes' / org / 'a.gff3').write_text('##gff-version 3\n')
+    os.symlink(str(datasets / 'genes' / 'org1'), str(datasets / 'genes' / 'link'))
+    (tmp_path / 'elsewhere').mkdir()
+    (tmp_path / 'elsewhere' / 'b.gff3').write_text('##gff-version 3\n')
+    os.symlink(str(tmp_path / 'elsewhere'), str(datasets / 'genes' / 'external'))
+    taxon_file = tmp_path / 'taxon_ids.tab'
+    taxon_file.write_text('Org1\t1111\nOrg2 subsp. x\t2222\n')
+    inventory = DatasetInventory(str(tmp_path / 'inventory.db'), str(tmp_path / 'db' / '*' / 'datasets'), str(taxon_file))
+    return inventory, str(datasets)
+
+def test_walk_skips_link_to_walked_directory(tmp_path):
+    inventory, datasets = make_tree(tmp_path)
+    files = sorted(os.path.relpath(os.path.join(dirpath, name), datasets)
+                   for dirpath, dirnames, filenames in inventory.walk(datasets) for name in filenames)
+    # link/ points at org1/, which is walked under its own name only; external/ is not
+    # below the datasets directory, so it is followed
+    assert files == ['genes/external/b.gff3', 'genes/org1/a.gff3', 'genes/org2/a.gff3']
+    inventory.close()
+
+def test_walk_link_cycle(tmp_path):
+    inventory, datasets = make_tree(tmp_path)
+    os.symlink(datasets, os.path.join(datasets, 'genes', 'org2', 'loop'))
+    inventory.refresh()
+    dirs = [os.path.relpath(dirpath, datasets) for dirpath, dirnames, filenames in inventory.walk(datasets)]
+    assert sorted(dirs) == ['.', 'genes', 'genes/external', 'genes/org1', 'genes/org2']
+    inventory.close()
+
+def test_table(tmp_path, capsys):
+    inventory, datasets = make_tree(tmp_path)
+    class Args:
+        dir = datasets
+    assert inventory_table(inventory, Args) == 0
+    lines = capsys.readouterr().out.splitlines()
+    genes = os.path.join(datasets, 'genes')
+    # Symlinks are not listed as subdirectories, as with orgs
+    assert [line for line in lines if line.startswith('subdir\t' + genes + '\t')] == \
+        ['subdir\t%s\torg1' % genes, 'subdir\t%s\torg2' % genes]
+    assert 'count\t%s\t1\t1' % os.path.join(genes, 'org1') in lines
+    assert 'count\t%s\t0\t4' % genes in lines
+    assert 'taxon\torg1\t1111' in lines
+    assert 'taxon\torg2\t2222' in lines
+    assert 'taxon\tgenes\t' in lines
+    inventory.close()
@@ -3,7 +3,12 @@
 import logging
 import csv
 import re
+import os
+import glob
+import json
+import hashlib
 import argparse
+import multiprocessing
 
 ##################################################
 #                                                #
@@ -18,6 +23,10 @@ def getFilename(mineName, mineVersion):
     return 'input_csv/' + filename
 
 
+def getOutputFilename(mineName, mineVersion):
+    return 'output_html/dataSourcesTable_' + mineName + '_v' + mineVersion + '.html'
+
+
 def getHeaderWidths(mineName):
     # Set header widths here if not using default
     # return ['15%', '25%', '10%', '15%', '20%', '15%'] # should add up to 100%
@@ -31,6 +40,10 @@ def getHeaderWidths(mineName):
     return headerWidthsForMine[mineName]
 
 
+def getMineNames():
+    return ['AquaMine', 'FAANGMine', 'HymenopteraMine', 'MaizeMine']
+
+
 ##################################################
 
 # Cheat sheet:
@@ -43,7 +56,8 @@ def getHeaderWidths(mineName):
 #   other row or column.
 #   The '*' prefix itself will not appear in the final table output.
 # * "PubMed: #########" numbers will be replaced with link to pubmed.
-# * Check links below in formatText(), may need to be customized per mine.
+# * Check links in link_rules/default.tsv, may need to be customized per mine
+#   (add link_rules/<MineName>.tsv for mine-specific links).
 
 ##################################################
 
@@ -57,9 +71,14 @@ def checkVersionNumber(inputStr):
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Convert Data sources table CSV to HTML.')
-    parser.add_argument('mine', choices=['AquaMine', 'FAANGMine', 'HymenopteraMine', 'MaizeMine'], help='Name of mine (required)')
-    parser.add_argument('version', type=checkVersionNumber, help='Mine version, e.g., 1.6 (required)')
+    parser.add_argument('mine', nargs='?', choices=getMineNames(), help='Name of mine (required unless --all)')
+    parser.add_argument('version', nargs='?', type=checkVersionNumber, help='Mine version, e.g., 1.6 (required unless --all)')
+    parser.add_argument('--all', action='store_true', help='Convert every <Mine>_v<version>_Data_Sources.csv in input_csv/ (only tables whose inputs changed)')
+    parser.add_argument('--force', action='store_true', help='With --all, regenerate tables even if their inputs are unchanged')
+    parser.add_argument('--jobs', type=int, default=multiprocessing.cpu_count(), help='With --all, number of tables to convert in parallel (default: number of CPUs)')
     args = parser.parse_args()
+    if (not args.all and (args.mine is None or args.version is None)):
+        parser.error('mine and version are required unless --all is given')
     return args
     
 
@@ -69,123 +88,113 @@ def getHTMLFileTop():
 def getHTMLFileBottom():
     return "</body>\n</html>"
 
-# These have to be updated with each release
-# TODO: Move these to a separate input file (per mine?)
-def formatText(text):
+# Link rules are stored in link_rules/default.tsv plus optional link_rules/<MineName>.tsv;
+# these have to be updated with each release
+LINK_RULES_DIR = 'link_rules/'
+
+
+class LinkRules(object):
+    # Link rules compiled once per run so that the cost per cell does not grow with the
+    # number of rules:
+    # * "exact" rules are a dictionary lookup on the full cell text
+    # * "within" rules are combined into one regular expression (longest text first)
+    # * "prefix" rules are combined into one anchored regular expression; alternatives
+    #   are tried in file order, so the first matching prefix wins as before
+    # Formatted text is memoized since the same cell text repeats many times in a table.
+
+    def __init__(self, rules):
+        self.exactMatch = {}
+        self.withinText = {}
+        prefixes = []
+        self.prefixLinkText = []
+        for ruleType, matchText, value in rules:
+            if (ruleType == 'exact'):
+                self.exactMatch.setdefault(matchText, value)
+            elif (ruleType == 'within'):
+                self.withinText.setdefault(matchText, value)
+            elif (ruleType == 'prefix'):
+                prefixes.append(matchText)
+                self.prefixLinkText.append(value)
+            else:
+                raise ValueError("Unknown link rule type: %s" % ruleType)
+
+        self.withinRegex = None
+        if (self.withinText):
+            withinAlternatives = sorted(self.withinText, key=len, reverse=True)
+            self.withinRegex = re.compile('|'.join(re.escape(t) for t in withinAlternatives))
+        self.prefixRegex = None
+        if (prefixes):
+            # (?=.) because the cell must be longer than the prefix itself to be a link
+            prefixAlternatives = ['(' + re.escape(p) + ')(?=.)' for p in prefixes]
+            self.prefixRegex = re.compile('|'.join(prefixAlternatives), re.DOTALL)
+        self.formatted = {}
+
+    def addTextLinks(self, text):
+        if (self.withinRegex is not None):
+            text = self.withinRegex.sub(lambda m: createURL(m.group(0), self.withinText[m.group(0)], True), text)
+        url = self.exactMatch.get(text)
+        if (url is not None):
+            text = createURL(text, url, True)
+        return text
+
+    def getPrefixLinkText(self, text):
+        if (self.prefixRegex is None):
+            return None
+        m = self.prefixRegex.match(text)
+        if (m is None):
+            return None
+        return self.prefixLinkText[m.lastindex - 1]
+
+
+def readLinkRulesFile(filename):
+    rules = []
+    with open(filename, 'r') as rulesFile:
+        for lineNum, line in enumerate(rulesFile):
+            line = line.rstrip('\r\n')
+            if (not line.strip() or line.startswith('#')):
+                continue
+            fields = line.split('\t')
+            if (len(fields) != 3):
+                raise ValueError("%s line %d: expected 3 tab-separated fields" % (filename, lineNum + 1))
+            rules.append(tuple(fields))
+    return rules
+
+
+def getLinkRulesFiles(mineName):
+    # Mine-specific rules first so they take precedence over the defaults
+    filenames = [LINK_RULES_DIR + mineName + '.tsv', LINK_RULES_DIR + 'default.tsv']
+    return [f for f in filenames if os.path.exists(f)]
+
+
+def loadLinkRules(mineName):
+    rules = []
+    for filename in getLinkRulesFiles(mineName):
+        rules.extend(readLinkRulesFile(filename))
+    return LinkRules(rules)
+
+
+def formatText(text, linkRules):
     # Check for special cases where additional formatting (e.g., add URL link) is needed
+    formatted = linkRules.formatted.get(text)
+    if (formatted is not None):
+        return formatted
+    formatted = text
     # 1) look for PubMed links:
-    if ("PubMed" in text):
-        text = addPubMedLink(text)
+    if ("PubMed" in formatted):
+        formatted = addPubMedLink(formatted)
     # 2) look for other common links:
-    linksWithinText = {
-        "data usage at HGD" : "http://hymenopteragenome.org/data_usage_citing"
-    }
-    linksExactMatch = {
-        # Ontologies:
-        "ATOL"                            : "https://bioportal.bioontology.org/ontologies/ATOL",
-        "BTO"                             : "https://bioportal.bioontology.org/ontologies/BTO",
-        "CL"                              : "https://obophenotype.github.io/cell-ontology/",
-        "CMO"                             : "https://bioportal.bioontology.org/ontologies/CMO",
-        "ECO"                             : "https://bioportal.bioontology.org/ontologies/ECO",
-        "EFO"                             : "https://www.ebi.ac.uk/efo/index.html",
-        "EOL"                             : "https://bioportal.bioontology.org/ontologies/EOL",
-        "GO"                              : "https://bioportal.bioontology.org/ontologies/GO",
-        "HAO"                             : "https://bioportal.bioontology.org/ontologies/HAO",
-        "HSAPDV"                          : "https://bioportal.bioontology.org/ontologies/HSAPDV",
-        "HP"                              : "https://hpo.jax.org/app/data/ontology",
-        "LBO"                             : "https://bioportal.bioontology.org/ontologies/LBO",
-        "LPT"                             : "https://bioportal.bioontology.org/ontologies/LPT",
-        "MA"                              : "https://bioportal.bioontology.org/ontologies/MA",
-        "MONDO"                           : "https://mondo.monarchinitiative.org/pages/download/",
-        "MI"                              : "https://bioportal.bioontology.org/ontologies/PSIMOD",
-        "OBI"                             : "http://obi-ontology.org",
-        "ORDO"                            : "https://bioportal.bioontology.org/ontologies/ORDO",
-        "PATO"                            : "https://github.com/pato-ontology/pato/",
-        "PO"                              : "https://bioportal.bioontology.org/ontologies/PO",
-        "PSI-MI"                          : "https://github.com/HUPO-PSI/psi-mi-CV",
-        "SO"                              : "https://bioportal.bioontology.org/ontologies/SO",
-        "UBERON"                          : "https://bioportal.bioontology.org/ontologies/UBERON",
-        "VT"                              : "https://bioportal.bioontology.org/ontologies/VT",
-        # Other sources:
-        "Ensembl Plants BioMart Download" : "http://plants.ensembl.org/index.html",
-        "GOA UniProt FTP"                 : "http://ftp.ebi.ac.uk/pub/databases/GO/goa/UNIPROT/goa_uniprot_all.gaf.gz",
-        "GO Consortium Annotation FTP"    : "http://geneontology.org/page/download-ontology",
-        "GOC Download"                    : "http://geneontology.org/docs/download-ontology",
-        "HGD"                             : "http://hymenopteragenome.org",
-        "HGD Genome Fasta Download"       : "http://hymenopteragenome.org/genome_fasta",
-        "HGD GO Annotation Download"      : "http://hymenopteragenome.org/hgd-go-annotation",
-        "HGD OGS GFF3 Download"           : "http://hymenopteragenome.org/ogs_gff3_files",
-        "HGD Ortholog Download"           : "http://hymenopteragenome.org/orthologs",
-        "KEGG Download"                   : "https://www.kegg.jp/kegg/rest/keggapi.html",
-        "NCBI PubMed FTP"                 : "https://ftp.ncbi.nlm.nih.gov/gene/DATA/gene2pubmed.gz",
-        "OMIM Download"                   : "https://www.omim.org/downloads",
-        "OrthoDB"                         : "https://www.orthodb.org/",
-        "OrthoDB Download"                : "https://data.orthodb.org/download/",
-        "Plant Reactome Gramene Download" : "https://plantreactome.gramene.org/download/current/Ensembl2PlantReactome_All_Levels.txt",
-        "QTL Download"                    : "https://www.animalgenome.org/cgi-bin/QTLdb/index",
-        "Reactome Download"               : "https://reactome.org/download/current/UniProt2Reactome_All_Levels.txt",
-        "TreeFam Download"                : "http://www.treefam.org/download",
-        "UniProt FTP"                     : "https://ftp.uniprot.org/pub/databases/uniprot/current_release/knowledgebase/complete/",
-        # Maize Community datasets:
-        "MaizeGDB Expression Download"   : "https://datacommons.cyverse.org/browse/iplant/home/maizegdb/maizegdb/MaizeGDB_qTeller_FPKM/B73v5_qTeller_FPKM",
-        "Grotewold CAGE Tag Count Root Download" : "https://datacommons.cyverse.org/browse/iplant/home/maizegdb/maizegdb/B73v5_JBROWSE_AND_ANALYSES/B73v5_TSS",
-        "Grotewold CAGE Tag Count Shoot Download" : "https://datacommons.cyverse.org/browse/iplant/home/maizegdb/maizegdb/B73v5_JBROWSE_AND_ANALYSES/B73v5_TSS",
-        "GWAS Atlas Download" : "https://datacommons.cyverse.org/browse/iplant/home/maizegdb/maizegdb/B73v5_JBROWSE_AND_ANALYSES/B73v5_diversity_markers_and_GWAS/GWAS/SNPs_from_GWAS_Atlas_database",
-        "MaizeGDB_UniformMu Download" : "https://download.maizegdb.org/Insertions/UniformMu/",
-        "Stam 2017 Husk H3K9ac Enhancer Download" : "https://datacommons.cyverse.org/browse/iplant/home/maizegdb/maizegdb/B73v5_JBROWSE_AND_ANALYSES/B73v5_epigenetics_and_DNA_binding/Oka_2017_enhancer_binding/Oka_Enhancer_Husk_v5.gff",
-        "Stam 2017 Seedling H3K9ac Enhancer Download" : "https://datacommons.cyverse.org/browse/iplant/home/maizegdb/maizegdb/B73v5_JBROWSE_AND_ANALYSES/B73v5_epigenetics_and_DNA_binding/Oka_2017_enhancer_binding/Oka_Enhancer_Seedling_v5.gff",
-        "Vollbrecht 2010 Ac/Ds Insertions Download" : "https://download.maizegdb.org/Insertions/AcDs_Vollbrecht/",
-        "Wallace 2014 GWAS Download" : "https://datacommons.cyverse.org/browse/iplant/home/maizegdb/maizegdb/B73v5_JBROWSE_AND_ANALYSES/B73v5_diversity_markers_and_GWAS/GWAS/GWAS_SNPs_from_Wallace_2014/B73v5_Wallace_etal_2014_PLoSGenet_GWAS_hits-150112_blastn.gff.gz",
-    }
-    for linkText, url in linksWithinText.items():
-        if (linkText in text):
-            text = text.replace(linkText, createURL(linkText, url, True))
-    for linkText, url in linksExactMatch.items():
-        if (linkText == text):
-            text = text.replace(linkText, createURL(linkText, url, True))
+    formatted = linkRules.addTextLinks(formatted)
     # 3) convert download/FTP urls to links, if applicable:
-    text = addDownloadLinks(text)
+    formatted = addDownloadLinks(formatted, linkRules)
 
-    return text
+    linkRules.formatted[text] = formatted
+    return formatted
 
 
-def addDownloadLinks(text):
-    if (len(text) > 26 and (text[0:26] == "ftp://ftp.ncbi.nlm.nih.gov")):
-        text = createURL("NCBI FTP", text, True)
-    if (len(text) > 28 and (text[0:28] == "https://ftp.ncbi.nlm.nih.gov")):
-        text = createURL("NCBI FTP", text, True)
-    if (len(text)> 23 and (text[0:23] == "https://ftp.uniprot.org")):
-        text = createURL("UniProt FTP", text, True)
-    if (len(text) > 44 and (text[0:44] == "https://ftp.ebi.ac.uk/pub/databases/interpro")):
-        text = createURL("InterPro FTP", text, True)
-    if (len(text) > 40 and (text[0:40] == "ftp://ftp.ebi.ac.uk/pub/databases/IntAct")):
-        text = createURL("IntAct Download", text, True)
-    if (len(text) > 42 and (text[0:42] == "https://ftp.ebi.ac.uk/pub/databases/IntAct")):
-        text = createURL("IntAct Download", text, True)
-    if (len(text) > 39 and (text[0:39] == "https://ftp.ebi.ac.uk/pub/databases/eva")):
-        text = createURL("EVA Download", text, True)   
-    if (len(text) > 30 and (text[0:30] == "https://ftp.ensemblgenomes.org")):
-        text = createURL("Ensembl Genomes FTP", text, True)
-    if (len(text) > 23 and (text[0:23] == "https://ftp.ensembl.org")):
-        text = createURL("Ensembl FTP", text, True)
-    if (len(text) > 22 and (text[0:22] == "http://ftp.ensembl.org")):
-        text = createURL("Ensembl FTP", text, True)
-    if (len(text) > 36 and (text[0:36] == "https://ftp.ebi.ac.uk/ensemblgenomes")):
-        text = createURL("Ensembl FTP", text, True)
-    if (len(text) > 26 and (text[0:26] == "https://useast.ensembl.org")):
-        text = createURL("Ensembl Download", text, True)
-    if (len(text) > 41 and (text[0:41] == "https://ftp.ensembl.org/pub/rapid-release")):
-        text = createURL("Ensembl Rapid Release FTP", text, True)
-    if (len(text) > 40 and (text[0:40] == "https://downloads.thebiogrid.org/BioGRID")):
-        text = createURL("BioGRID Download", text, True)
-    if (len(text) > 39 and (text[0:39] == "https://www.ncbi.nlm.nih.gov/bioproject")):
-        text = createURL("NCBI BioProject", text, True) 
-    if (len(text) > 30 and (text[0:30] == "https://data.faang.org/dataset")):
-        text = createURL("FAANG Data Portal", text, True)
-    if (len(text) > 29 and (text[0:29] == "https://download.maizegdb.org")):
-        text = createURL("MaizeGDB Download", text, True)
-    if (len(text) > 31 and (text[0:31] == "http://ftp.flybase.net/releases")):
-        text = createURL("FlyBase Download", text, True)
+def addDownloadLinks(text, linkRules):
+    linkText = linkRules.getPrefixLinkText(text)
+    if (linkText is not None):
+        text = createURL(linkText, text, True)
 
     return text
 
@@ -211,11 +220,89 @@ def createURL(linkText, url, newWindow):
     return link
 
 
-def main():
-    # Get arguments
-    args = parse_args()
-    mineName = args.mine
-    mineVersion = args.version
+##################################################
+# Batch mode (--all): convert every CSV in input_csv/, skipping tables whose
+# inputs (CSV, header widths, link rules) are unchanged since the last run.
+##################################################
+
+BUILD_MANIFEST = 'output_html/.build_manifest.json'
+
+
+def findInputTables():
+    # Returns list of (mineName, mineVersion) for CSVs named with the default filename format
+    tables = []
+    filenameRegex = re.compile('^(\\w+)_v([0-9]+\\.[0-9]+)_Data_Sources\\.csv$')
+    for filename in sorted(glob.glob('input_csv/*.csv')):
+        m = filenameRegex.match(os.path.basename(filename))
+        if (m is None or m.group(1) not in getMineNames()):
+            print("Skipping " + filename + " (not a <Mine>_v<version>_Data_Sources.csv file for a known mine)")
+            continue
+        tables.append((m.group(1), m.group(2)))
+    return tables
+
+
+def getInputHash(mineName, mineVersion):
+    # Hash of everything that determines the output table. Input files are named by their
+    # relative path and this script by its base name, so moving the checkout changes nothing
+    inputHash = hashlib.sha256()
+    files = [(filename, filename) for filename in [getFilename(mineName, mineVersion)] + getLinkRulesFiles(mineName)]
+    files.append((os.path.basename(__file__), os.path.abspath(__file__)))
+    for name, filename in files:
+        inputHash.update(name.encode('utf-8'))
+        with open(filename, 'rb') as f:
+            inputHash.update(f.read())
+    inputHash.update(json.dumps(getHeaderWidths(mineName)).encode('utf-8'))
+    return inputHash.hexdigest()
+
+
+def readBuildManifest():
+    if (not os.path.exists(BUILD_MANIFEST)):
+        return {}
+    with open(BUILD_MANIFEST, 'r') as f:
+        return json.load(f)
+
+
+def writeBuildManifest(manifest):
+    tmpFilename = BUILD_MANIFEST + '.tmp'
+    with open(tmpFilename, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.rename(tmpFilename, BUILD_MANIFEST)
+
+
+def renderTableTask(table):
+    # Pool worker: (mineName, mineVersion) -> output filename
+    return renderTable(table[0], table[1])
+
+
+def renderAllTables(jobs, force):
+    manifest = readBuildManifest()
+    toRender = []
+    inputHashes = {}
+    for mineName, mineVersion in findInputTables():
+        outfile = getOutputFilename(mineName, mineVersion)
+        inputHashes[outfile] = getInputHash(mineName, mineVersion)
+        if (not force and os.path.exists(outfile) and manifest.get(outfile) == inputHashes[outfile]):
+            print("Unchanged: " + outfile)
+        else:
+            toRender.append((mineName, mineVersion))
+
+    if (len(toRender) > 1 and jobs > 1):
+        pool = multiprocessing.Pool(min(jobs, len(toRender)))
+        try:
+            outfiles = pool.map(renderTableTask, toRender)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        outfiles = [renderTableTask(table) for table in toRender]
+
+    for outfile in outfiles:
+        manifest[outfile] = inputHashes[outfile]
+    writeBuildManifest(manifest)
+    print("%d table(s) converted, %d unchanged" % (len(outfiles), len(inputHashes) - len(outfiles)))
+
+
+def renderTable(mineName, mineVersion):
     filename = getFilename(mineName, mineVersion)
     
     tableRows = [] # initialize array
@@ -223,9 +310,10 @@ def main():
     HTMLStr = ""   # initialize HTML output
     
     headerWidths = getHeaderWidths(mineName)
+    linkRules = loadLinkRules(mineName)
 
     # Read table from CSV
-    with open(filename, 'rU') as csvfile:
+    with open(filename, 'r') as csvfile:
         headerRow = next(csvfile).split(',')
         dataTable = csv.reader(csvfile, delimiter=',')
         for rowNum, row in enumerate(dataTable):
@@ -295,7 +383,7 @@ def main():
                 tableRows[rowNum].append(colVals)
 
     # Create HTML from table
-    outfile = 'output_html/dataSourcesTable_' + mineName + '_v' + mineVersion + '.html'
+    outfile = getOutputFilename(mineName, mineVersion)
     with open(outfile, 'w') as HTMLfile:
         # Print top of HTML file
         HTMLfile.write(getHTMLFileTop())
@@ -346,7 +434,7 @@ def main():
                     HTMLfile.write('>') # End row tag
                     
                     # Add extra formatting to text if necessary
-                    text = formatText(col['text'])
+                    text = formatText(col['text'], linkRules)
                     
                     # If first column, add <h2> and <p> tags to text
                     if (colNum == 0):
@@ -373,7 +461,17 @@ def main():
         # Print bottom of HTML file
         HTMLfile.write(getHTMLFileBottom())
 
-    print "Created HTML file " + outfile
+    print("Created HTML file " + outfile)
+    return outfile
+
+
+def main():
+    # Get arguments
+    args = parse_args()
+    if (args.all):
+        renderAllTables(args.jobs, args.force)
+    else:
+        renderTable(args.mine, args.version)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+"""
+Check for duplicate IDs where they would cause a loading error:
+(1) GFF files - ID= values in column 9 should be unique across each gff source (directory)
+(2) ensembl-plant-biomart .tab files - lines should be unique within each file
+
+Replaces the GNU parallel | grep | sort | uniq pipelines in check_for_duplicates.sh. Each
+directory/file is streamed once and checked in its own process. IDs are held in a hash
+table until it exceeds the memory budget; after that they are spilled to hash-partitioned
+temp files and each partition is checked separately, so memory use stays bounded on the
+largest genomes.
+
+Reports each duplicate ID with the file:line locations where it occurs. Exits with status
+1 if any duplicates are found.
+
+Usage:
+    $ ./check_gff_duplicate_ids.py [--jobs N] [--memory-mb N] [gff directory ...]
+With no directories given, checks every directory containing *.gff* files under
+/db/*/datasets, plus /db/*/datasets/ensembl-plant-biomart/*.tab.
+"""
+import os, re, sys, glob, shutil, zlib, tempfile, argparse
+from concurrent.futures import ProcessPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from dataset_inventory import DatasetInventory
+
+DATASETS_GLOB = '/db/*/datasets'
+# Rough per-entry size of the in-memory table (dict slot, key string, location tuple)
+ENTRY_OVERHEAD = 150
+NUM_PARTITIONS = 64
+
+ID_REGEX = re.compile(r'(?:^|;)\s*ID=([^;]*)')
+
+class DuplicateFinder:
+    """
+    Finds keys that occur more than once, recording (file index, line number) locations.
+
+    Keys are kept in a dict until the estimated size exceeds memory_bytes; the dict is then
+    spilled to NUM_PARTITIONS temp files by hash of the key, and finish() checks each
+    partition in turn.
+    """
+    def __init__(self, memory_bytes, tmpdir=None):
+        self.memory_bytes = memory_bytes
+        self.tmpdir = tmpdir
+        self.first = dict()
+        self.duplicates = dict()
+        self.size = 0
+        self.count = 0
+        self.spill_dir = None
+        self.partitions = None
+
+    def add(self, key, location):
+        self.count += 1
+        first = self.first.get(key)
+        if first is None:
+            self.first[key] = location
+            self.size += ENTRY_OVERHEAD + len(key)
+            if self.size > self.memory_bytes:
+                self.spill()
+        elif key in self.duplicates:
+            self.duplicates[key].append(location)
+        else:
+            self.duplicates[key] = [first, location]
+
+    def spill(self):
+        if self.partitions is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='gff_dupes_', dir=self.tmpdir)
+            self.partitions = [open(os.path.join(self.spill_dir, str(i)), 'w') for i in range(NUM_PARTITIONS)]
+        for key, location in self.first.items():
+            locations = self.duplicates.get(key, [location])
+            partition = self.partitions[zlib.crc32(key.encode('utf-8')) % NUM_PARTITIONS]
+            for file_idx, line_num in locations:
+                partition.write('%s\t%d\t%d\n' % (key, file_idx, line_num))
+        self.first = dict()
+        self.duplicates = dict()
+        self.size = 0
+
+    def finish(self):
+        # Returns dict of key -> list of locations for keys that occur more than once
+        if self.partitions is None:
+            return self.duplicates
+        self.spill()
+        duplicates = dict()
+        try:
+            for partition in self.partitions:
+                partition.close()
+                locations = dict()
+                with open(partition.name, 'r') as f:
+                    for line in f:
+                        key, file_idx, line_num = line.rstrip('\n').rsplit('\t', 2)
+                        locations.setdefault(key, []).append((int(file_idx), int(line_num)))
+                for key, key_locations in locations.items():
+                    if len(key_locations) > 1:
+                        duplicates[key] = key_locations
+        finally:
+            shutil.rmtree(self.spill_dir)
+        return duplicates
+
+def check_gff_dir(task):
+    gff_dir, memory_bytes, tmpdir = task
+    files = sorted(glob.glob(os.path.join(gff_dir, '*.gff*')))
+    finder = DuplicateFinder(memory_bytes, tmpdir)
+    for file_idx, filename in enumerate(files):
+        with open(filename, 'r', errors='replace') as f:
+            for line_num, line in enumerate(f, 1):
+                if line.startswith('#'):
+                    continue
+                fields = line.rstrip('\n').split('\t', 8)
+                if len(fields) < 9:
+                    continue
+                m = ID_REGEX.search(fields[8])
+                if m:
+                    finder.add(m.group(1), (file_idx, line_num))
+    return gff_dir, files, finder.count, finder.finish()
+
+def check_tab_file(task):
+    tab_file, memory_bytes, tmpdir = task
+    finder = DuplicateFinder(memory_bytes, tmpdir)
+    with open(tab_file, 'r', errors='replace') as f:
+        for line_num, line in enumerate(f, 1):
+            finder.add(line.rstrip('\n'), (0, line_num))
+    return tab_file, [tab_file], finder.count, finder.finish()
+
+def find_gff_dirs():
+    dirs = set()
+    for root, subdirs, files in walk_datasets():
+        if any('.gff' in f for f in files):
+            dirs.add(root)
+    return sorted(dirs)
+
+def walk_datasets():
+    # Directory listings come from the shared dataset inventory (only directories changed
+    # since it was last refreshed are read from disk)
+    inventory = DatasetInventory()
+    inventory.refresh()
+    for datasets_dir in sorted(glob.glob(DATASETS_GLOB)):
+        for entry in inventory.walk(datasets_dir):
+            yield entry
+    inventory.close()
+
+def report(label, name, files, duplicates, max_report):
+    print("WARNING: %d duplicate %s found in %s" % (len(duplicates), label, name))
+    for i, key in enumerate(sorted(duplicates)):
+        if max_report and i >= max_report:
+            print("  ... and %d more" % (len(duplicates) - max_report))
+            break
+        locations = ', '.join('%s:%d' % (os.path.basename(files[file_idx]), line_num)
+                              for file_idx, line_num in duplicates[key])
+        print("  %s: %s" % (key, locations))
+
+def run_checks(check, tasks, jobs, label, kind, max_report):
+    dupes_found = 0
+    if not tasks:
+        return dupes_found
+    with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(tasks)))) as executor:
+        for name, files, count, duplicates in executor.map(check, tasks):
+            if duplicates:
+                report(label, kind + ' ' + name, files, duplicates, max_report)
+                dupes_found = 1
+    return dupes_found
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Check GFF directories and biomart files for duplicate IDs.')
+    parser.add_argument('gff_dirs', nargs='*', help='gff directories to check (default: all under %s)' % DATASETS_GLOB)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='number of processes (default: number of CPUs)')
+    parser.add_argument('--memory-mb', type=int, default=1024,
+                        help='approximate memory budget per process before spilling to disk (default: %(default)s)')
+    parser.add_argument('--tmpdir', help='directory for spill files (default: system temp dir)')
+    parser.add_argument('--max-report', type=int, default=100,
+                        help='max duplicate IDs to list per directory/file, 0 for all (default: %(default)s)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    memory_bytes = args.memory_mb * 1024 * 1024
+    dupes_found = 0
+
+    if not args.gff_dirs:
+        # Ensembl Compara / Biomart symbols and descriptions
+        tab_files = sorted(glob.glob(os.path.join(DATASETS_GLOB, 'ensembl-plant-biomart', '*.tab')))
+        if tab_files:
+            print("Checking ensembl-plant-biomart symbols and descriptions...")
+            tasks = [(tab_file, memory_bytes, args.tmpdir) for tab_file in tab_files]
+            found = run_checks(check_tab_file, tasks, args.jobs, 'lines', 'file', args.max_report)
+            if not found:
+                print("No duplicate ids found")
+            dupes_found |= found
+        else:
+            print("Ensembl-plant-biomart data directory not found")
+
+    # GFF files - IDs should be unique across gff source (dir)
+    print("Checking gff files...")
+    gff_dirs = args.gff_dirs or find_gff_dirs()
+    tasks = [(gff_dir, memory_bytes, args.tmpdir) for gff_dir in gff_dirs]
+    found = run_checks(check_gff_dir, tasks, args.jobs, 'ids', 'gff dir', args.max_report)
+    if not found:
+        print("No duplicate ids found")
+    dupes_found |= found
+
+    sys.exit(dupes_found)
+
+if __name__ == "__main__":
+    main()
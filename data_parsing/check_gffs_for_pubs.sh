@@ -4,9 +4,13 @@
 # They are normally not loaded with the standard GFF loader, but we do load them with the QTL loader, for example
 # However the loader expects the tag to have the form: PUBMED_ID=<pubmedid>
 
-# Iterate over all GFF files
+this_path=$( cd "$(dirname "${BASH_SOURCE[0]}")" ; pwd -P )
+inventory="python3 ${this_path}/../common/dataset_inventory.py"
+
+# Iterate over all GFF files (listed from the cached dataset inventory)
 echo "Checking gff files..."
-gff_files=$(find /db/*/datasets/ -type f -name "*.gff*")
+${inventory} refresh > /dev/null
+gff_files=$(${inventory} files --recursive --pattern "*.gff*" /db/*/datasets/)
 for gff_file in $gff_files; do
     result=$(grep -m 1 -ioE "pubmed.*=[0-9]+" $gff_file | awk -F'=' '{print $1}')
     if [ ! -z "$result" ]; then
@@ -15,10 +15,21 @@ ec=0
 echo "Checking files in $dirname"
 echo
 
+# Compute all statistics in a single pass over the files
+this_path=$( cd "$(dirname "${BASH_SOURCE[0]}")" ; pwd -P )
+stats=$(python3 "${this_path}/orthodb_stats.py" "$dirname")
+if [ $? -ne 0 ]; then
+    echo "ERROR: could not read OrthoDB files in $dirname" 1>&2
+    exit 1
+fi
+get_stat() {
+    echo "$stats" | grep -P "^$1\t" | cut -f 2
+}
+
 # Check for missing taxon ids
 echo "Checking for missing taxon IDs..."
 # Should return 0 (i.e., no taxon ids missing):
-num_missing_taxon_ids=$(awk -F'\t' '{print $6}' ${dirname}/*.tab | sort | uniq | grep -vE '[0-9]+' | wc -l)
+num_missing_taxon_ids=$(get_stat missing_taxon_ids)
 if [ "$num_missing_taxon_ids" -ne 0 ]; then
     echo "WARNING: At least one file in $dirname has missing taxon IDs" 1>&2
     ec=1
@@ -29,9 +40,9 @@ echo
 
 # Check for singleton clusters
 echo "Checking for singleton clusters..."
-# Should not return anything:
-has_singleton_clusters=$(awk -F'\t' '{print $2}' ${dirname}/*.tab | uniq -c | sort -n | awk '{print $1}' | uniq -c | awk '{print $2}' | head -n 1)
-if [ "$has_singleton_clusters" -lt 2 ]; then
+# Should return 0:
+num_singleton_clusters=$(get_stat singleton_clusters)
+if [ "$num_singleton_clusters" -ne 0 ]; then
    echo "WARNING: At least one file in $dirname has singleton cluster(s)" 1>&2
    ec=1
 else
@@ -41,10 +52,11 @@ echo
 
 # Check for duplicates within a cluster/LCA
 echo "Checking for duplicates within a cluster and LCA..."
-# Should return 1 (i.e., all unique, no duplicates) 
-num_duplicates=$(awk -F'\t' '{print $2 "|" $3 "|" $7 }' ${dirname}/*.tab | sort | uniq -c | awk '{print $1}' | sort -n | uniq -c | wc -l)
-if [ "$num_duplicates" -ne 1 ]; then
+# Should return 0 (i.e., all unique, no duplicates)
+num_duplicates=$(get_stat duplicate_rows)
+if [ "$num_duplicates" -ne 0 ]; then
     echo "WARNING: At least one file in $dirname contains duplicates within a cluster and LCA" 1>&2
+    echo "$stats" | grep -P "^duplicate_example\t" | cut -f 2 1>&2
     ec=1
 else
     echo "No duplicates found"
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+"""
+Count entries, accessions and isoforms in UniProt XML files
+
+Replaces count_uniprot_proteins.pl (XML::Twig). Files are scanned as bytes in fixed-size
+blocks rather than parsed, so memory use stays flat however large the file is; .xml.gz
+files are read directly. Several files are counted in parallel.
+
+Counted tags:
+    entries     <entry ...>
+    accessions  <accession>
+    isoforms    <isoform>
+    sequences   <sequence length=...> (one per entry; isoform sequences are only references)
+    proteins    sequences + isoforms, i.e., the number of Protein objects the uniprot
+                loader creates (used by testing/uniprot_count.sh)
+The taxon id is taken from the file name (e.g., 9913_uniprot_sprot.xml).
+
+Usage:
+    $ ./count_uniprot_proteins.py [--jobs N] <uniprot xml file> ...
+Prints a header line and one tab-separated line per file:
+    file, taxon_id, entries, accessions, isoforms, sequences, proteins
+"""
+import os, re, sys, gzip, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+BLOCK_SIZE = 16 * 1024 * 1024
+TAGS = [
+    ('entries', b'<entry '),
+    ('accessions', b'<accession>'),
+    ('isoforms', b'<isoform>'),
+    ('sequences', b'<sequence length'),
+]
+COLUMNS = ['file', 'taxon_id'] + [name for name, tag in TAGS] + ['proteins']
+TAXON_ID_REGEX = re.compile(r'[0-9]{4,}')
+
+def open_file(filename):
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rb')
+    return open(filename, 'rb')
+
+def count_file(filename):
+    counts = dict((name, 0) for name, tag in TAGS)
+    remainder = b''
+    with open_file(filename) as f:
+        while True:
+            block = f.read(BLOCK_SIZE)
+            if not block:
+                break
+            data = remainder + block
+            # Tags start with '<' and contain no other '<', so cutting at the last '<'
+            # never splits a tag between blocks
+            cut = data.rfind(b'<')
+            if cut == -1:
+                cut = len(data)
+            for name, tag in TAGS:
+                counts[name] += data.count(tag, 0, cut)
+            remainder = data[cut:]
+    for name, tag in TAGS:
+        counts[name] += remainder.count(tag)
+    counts['proteins'] = counts['sequences'] + counts['isoforms']
+    m = TAXON_ID_REGEX.search(os.path.basename(filename))
+    counts['taxon_id'] = m.group(0) if m else ''
+    counts['file'] = filename
+    return counts
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Count entries, accessions and isoforms in UniProt XML files.')
+    parser.add_argument('files', nargs='+', help='UniProt .xml or .xml.gz file(s)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='number of processes (default: number of CPUs)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    files = []
+    for filename in args.files:
+        if os.path.isfile(filename):
+            files.append(filename)
+        else:
+            print("WARNING: " + filename + " not found", file=sys.stderr)
+    if not files:
+        sys.exit(1)
+    print('\t'.join(COLUMNS))
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(files)))) as executor:
+        for counts in executor.map(count_file, files):
+            print('\t'.join(str(counts[column]) for column in COLUMNS))
+
+if __name__ == "__main__":
+    main()
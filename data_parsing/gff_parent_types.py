@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Given one or more feature types, get their parent type(s) from the gff files
+
+Replaces get_feature_parent_types_from_gffs.sh, which ran grep/awk for every matching line
+and then grepped the gff files again for each parent ID. Here the gff files for each
+organism are read once, building an ID -> feature type index (types are interned so each
+distinct type string is stored once), and the Parent= IDs of the requested feature types
+are resolved against it at the end of the pass. Features with several parents
+(Parent=a,b) count once for each parent. Organisms are processed in parallel.
+
+IDs are resolved within the gff directory they occur in (one organism assembly / gene set).
+
+Output, per source and organism: the number of features of each requested type with a
+count for each parent type, plus the number with no Parent= and with a Parent= ID that is
+not in the gff files.
+
+Usage:
+    $ ./gff_parent_types.py [--jobs N] [--sources RefSeq,Ensembl,...] <feature_type> ...
+Example:
+    $ ./gff_parent_types.py miRNA tRNA
+Note: feature types are case-sensitive!
+"""
+import os, re, sys, glob, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+DATASETS_GLOB = '/db/*/datasets'
+SOURCES = ['RefSeq', 'Ensembl', 'MaizeGDB', 'Genbank']
+# Gene models are in a genes subdirectory for these sources
+GENES_SUBDIR_SOURCES = ['RefSeq', 'Ensembl']
+
+ID_REGEX = re.compile(r'(?:^|;)\s*ID=([^;]*)')
+PARENT_REGEX = re.compile(r'(?:^|;)\s*Parent=([^;]*)')
+
+NO_PARENT = '(no parent)'
+NOT_FOUND = '(parent not found)'
+
+def get_gff_files(org_dir, source):
+    # Returns dict of gff directory -> sorted list of gff files under org_dir
+    gff_dirs = dict()
+    pattern = os.path.join(org_dir, '*')
+    if source in GENES_SUBDIR_SOURCES:
+        pattern = os.path.join(pattern, 'genes')
+    for gff_file in sorted(glob.glob(os.path.join(pattern, '**', '*.gff*'), recursive=True)):
+        if os.path.isfile(gff_file):
+            gff_dirs.setdefault(os.path.dirname(gff_file), []).append(gff_file)
+    return gff_dirs
+
+def get_parent_types(task):
+    # Returns (source, organism dir name, dict of feature type -> dict of parent type -> count)
+    source, org_dir, feature_types = task
+    histograms = dict((feature_type, dict()) for feature_type in feature_types)
+    for gff_dir, gff_files in sorted(get_gff_files(org_dir, source).items()):
+        id_types = dict()
+        # (feature type, parent IDs) for features of the requested types
+        features = []
+        for gff_file in gff_files:
+            with open(gff_file, 'r', errors='replace') as f:
+                for line in f:
+                    if line.startswith('#'):
+                        continue
+                    fields = line.rstrip('\n').split('\t', 8)
+                    if len(fields) < 9:
+                        continue
+                    feature_type = sys.intern(fields[2])
+                    m = ID_REGEX.search(fields[8])
+                    if m:
+                        id_types[m.group(1)] = feature_type
+                    if feature_type in histograms:
+                        m = PARENT_REGEX.search(fields[8])
+                        features.append((feature_type, m.group(1).split(',') if m else None))
+        for feature_type, parent_ids in features:
+            histogram = histograms[feature_type]
+            if not parent_ids:
+                histogram[NO_PARENT] = histogram.get(NO_PARENT, 0) + 1
+                continue
+            for parent_id in parent_ids:
+                parent_type = id_types.get(parent_id, NOT_FOUND)
+                histogram[parent_type] = histogram.get(parent_type, 0) + 1
+    return source, os.path.basename(org_dir), histograms
+
+def format_histogram(histogram):
+    return ' '.join('%s(%d)' % (parent_type, histogram[parent_type]) for parent_type in sorted(histogram))
+
+def add_histogram(totals, histogram):
+    for parent_type, count in histogram.items():
+        totals[parent_type] = totals.get(parent_type, 0) + count
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Get the parent feature type(s) of gff feature types.')
+    parser.add_argument('feature_types', nargs='+', help='feature type(s), e.g. miRNA (case-sensitive)')
+    parser.add_argument('--sources', default=','.join(SOURCES), help='comma-separated sources (default: %(default)s)')
+    parser.add_argument('--datasets', default=DATASETS_GLOB, help='datasets directory glob (default: %(default)s)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='number of processes (default: number of CPUs)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    sources = args.sources.split(',')
+    tasks = []
+    for source in sources:
+        for org_dir in sorted(glob.glob(os.path.join(args.datasets, source, 'annotations', '*'))):
+            if os.path.isdir(org_dir):
+                tasks.append((source, org_dir, args.feature_types))
+    if not tasks:
+        print("No annotation directories found for " + ', '.join(sources), file=sys.stderr)
+        sys.exit(1)
+
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(tasks)))) as executor:
+        results = list(executor.map(get_parent_types, tasks))
+
+    print()
+    for source in sources:
+        source_results = [result for result in results if result[0] == source]
+        if not source_results:
+            continue
+        print("Source: " + source)
+        print("-------------------")
+        all_types = dict((feature_type, dict()) for feature_type in args.feature_types)
+        for _, dir_name, histograms in source_results:
+            fullname = dir_name.replace('_', ' ')
+            fullname = fullname[:1].upper() + fullname[1:]
+            print("Organism: " + fullname)
+            for feature_type in args.feature_types:
+                histogram = histograms[feature_type]
+                if histogram:
+                    print("Parent type(s) of %s for %s (%s): %s" % (feature_type, fullname, source, format_histogram(histogram)))
+                    add_histogram(all_types[feature_type], histogram)
+                else:
+                    print("%s not found in files" % feature_type)
+            print()
+        for feature_type in args.feature_types:
+            print("All parent type(s) of %s (%s): %s" % (feature_type, source, format_histogram(all_types[feature_type])))
+        print()
+
+if __name__ == "__main__":
+    main()
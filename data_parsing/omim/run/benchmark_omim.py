@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Throughput benchmark for get_omim_pubmed.py, run against the local mock OMIM API
+(mock_omim_server.py) so that no API key or quota is used.
+
+Starts the mock server in the background, harvests a synthetic set of mim numbers through
+the same fetch engine used by get_omim_pubmed.py (rate limiter, worker pool, batching and
+retries), and reports MIMs/sec, request latency percentiles and retry counts.
+
+Usage:
+    $ ./benchmark_omim.py [--mims 2000] [--rate 4] [--workers 8] [--batch-size 20]
+                          [--latency 0.3] [--error-rate 0.02] [--throttle-rate 0.01]
+To benchmark against a server that is already running, pass --url.
+"""
+import time, argparse
+import get_omim_pubmed as omim
+import mock_omim_server
+
+class NullLog:
+	def write(self, msg):
+		pass
+
+	def flush(self):
+		pass
+
+def parse_args():
+	parser = argparse.ArgumentParser(description='Benchmark the OMIM PubMed harvester against a local mock API.')
+	parser.add_argument('--mims', type=int, default=2000, help='number of synthetic mim numbers (default: %(default)s)')
+	parser.add_argument('--rate', type=float, default=omim.MAX_REQUESTS_PER_SEC, help='client requests/sec (default: %(default)s)')
+	parser.add_argument('--workers', type=int, default=omim.DEFAULT_WORKERS, help='client concurrent requests (default: %(default)s)')
+	parser.add_argument('--batch-size', type=int, default=omim.MAX_BATCH_SIZE, help='mim numbers per request (default: %(default)s)')
+	parser.add_argument('--server-rate', type=float, default=omim.MAX_REQUESTS_PER_SEC,
+		help='requests/sec the mock server allows before returning 429 (default: %(default)s)')
+	parser.add_argument('--latency', type=float, default=0.3, help='mean mock server latency in seconds (default: %(default)s)')
+	parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 5xx responses (default: %(default)s)')
+	parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of random 429 responses (default: %(default)s)')
+	parser.add_argument('--url', help='use an already running server instead of starting the mock')
+	return parser.parse_args()
+
+def main():
+	args = parse_args()
+	server = None
+	if args.url:
+		omim.OMIM_SERVICE_BASE_USA = args.url
+	else:
+		server = mock_omim_server.start_server(rate=args.server_rate, latency=args.latency,
+			error_rate=args.error_rate, throttle_rate=args.throttle_rate)
+		omim.OMIM_SERVICE_BASE_USA = server.url()
+	omim.stats = omim.RequestStats()
+	# Keep backoff short so injected errors do not dominate the run
+	omim.MAX_BACKOFF = 2
+
+	# Synthetic mim numbers in the same range as real ones (100000-699999)
+	mim_rows = dict((str(100000 + i * 37), 'synthetic') for i in range(args.mims))
+	num_rows = [0]
+	def commit(mimNumbers, pubmed_cited_list):
+		num_rows[0] += len(pubmed_cited_list)
+
+	print("Harvesting %d mim numbers from %s" % (args.mims, omim.OMIM_SERVICE_BASE_USA))
+	print("rate=%s req/sec, workers=%d, batch size=%d" % (args.rate, args.workers, args.batch_size))
+	limiter = omim.TokenBucket(args.rate)
+	session = omim.create_session(args.workers)
+	start_time = time.monotonic()
+	num_fetched, num_errors = omim.harvest(mim_rows, NullLog(), limiter, session, args.workers, args.batch_size, None, commit)
+	elapsed = time.monotonic() - start_time
+
+	num_requests = len(omim.stats.latencies)
+	print()
+	print("Elapsed:        %.2f sec" % elapsed)
+	print("MIMs/sec:       %.1f" % (num_fetched / elapsed))
+	print("Requests/sec:   %.2f (limit %s)" % (num_requests / elapsed, args.rate))
+	print("Rows:           %d" % num_rows[0])
+	print("Failed batches: %d" % num_errors)
+	print("Latency p50:    %.3f sec" % omim.stats.percentile(50))
+	print("Latency p99:    %.3f sec" % omim.stats.percentile(99))
+	print("Retries:        %d" % omim.stats.retries)
+	print("Requests:       " + omim.stats.summary())
+	if server:
+		print("Server counts:  " + ', '.join('%s: %d' % item for item in sorted(server.counts.items())))
+		server.shutdown()
+
+if __name__ == "__main__":
+	main()
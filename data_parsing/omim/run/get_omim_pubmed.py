@@ -6,97 +6,436 @@ Script to fetch pubmed ids from mim number by using OMIM API
 Original script here:
 https://github.com/intermine/intermine-scripts/blob/master/bio/humanmine/get_omim_pubmed.py
 
-Updated to parse returned JSON correctly and add more pauses to avoid hitting rate limit,
-be compatible with Python v3, and process mim2gene.txt in chunks to allow restarting 
-without losing progress.
+Updated to parse returned JSON correctly, be compatible with Python v3, and process
+mim2gene.txt in chunks to allow restarting without losing progress.
+
+Requests are sent from a pool of worker threads and throttled by a token bucket so that
+the script runs at (but not above) the API rate limit. Requests rejected with HTTP 429
+or 5xx are retried, honoring the Retry-After header if the server sends one. Each request
+asks for a batch of MIM numbers (up to 20, the API maximum) over a persistent connection.
 
 Prerequisites:
 (1) Python modules: Requests, Python-dotenv
-(2) Split mim2gene into multiple files, each with the filename mim2gene_NN where NN is a
-    two-digit number (with leading zero for 00-09), e.g.,
-    $ split -d -l 1000 mim2gene.txt mim2gene_
-    and store in current/ subdirectory.
+(2) Store mim2gene.txt in current/ subdirectory.
 (3) Copy .env_example to .env and add API key from omim.org.
-(4) Edit idx_start and idx_end to match start and end suffix of split files (idx_start will
-    initially be 0).
 
-Output will be multiple pubmed_cited_NN files which can be combined into a single pubmed_cited.txt file.
+Usage:
+    $ ./get_omim_pubmed.py [--rate N] [--workers N] [--batch-size N]
+Output is written to ../current/pubmed_cited.txt. Completed mim numbers are recorded in a
+journal file (pubmed_cited.txt.journal) that is fsync'd after every batch, so if the script
+is interrupted it can simply be rerun: finished mim numbers are skipped and any partially
+written output is discarded. Delete both files to start over from scratch.
+
+Fetched reference lists are cached in ../current/omim_cache.sqlite and reused on later runs
+(e.g. the next mine release) unless the mim2gene.txt row for the mim number has changed, the
+entry is older than --cache-ttl days, or the mim number is listed in the --refresh file.
+
+Split file mode (older workflow): split mim2gene.txt into multiple files mim2gene_NN
+where NN is a two-digit number (with leading zero for 00-09), e.g.,
+    $ split -d -l 1000 mim2gene.txt mim2gene_
+and run
+    $ ./get_omim_pubmed.py <idx_start> <idx_end>
+where idx_start and idx_end are the start and end suffix of the split files. Output will be
+multiple pubmed_cited_NN files which can be combined into a single pubmed_cited.txt file.
 """
-import os, json, requests, time, datetime, types
+import os, json, requests, time, datetime, types, argparse, random, threading, sqlite3
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
 
-# http://api.omim.org/api/html/apiKey.html
-OMIM_SERVICE_BASE_USA = 'https://api.omim.org/api/entry'
-
 # get API key from .env
 load_dotenv()
 apiKey = os.getenv('API_KEY')
 
+# http://api.omim.org/api/html/apiKey.html
+# (OMIM_API_URL can be set in .env to point at a local stand-in, see mock_omim_server.py)
+OMIM_SERVICE_BASE_USA = os.getenv('OMIM_API_URL', 'https://api.omim.org/api/entry')
+
+# API limit is 4 requests/sec
+MAX_REQUESTS_PER_SEC = 4
+DEFAULT_WORKERS = 8
+# API accepts up to 20 comma-separated mim numbers per entry request
+MAX_BATCH_SIZE = 20
+# Number of cached mim numbers written per journal entry
+CACHE_COMMIT_SIZE = 1000
+MAX_RETRIES = 6
+MAX_BACKOFF = 120 # seconds
+REQUEST_TIMEOUT = 60 # seconds
+
 class OMIMQueryError(Exception):
 	pass
 
-def get_omim_pubmed(mimNumber, log):
-	log.write('Parsing MIM[' + mimNumber + ']\n')
+class TokenBucket:
+	"""
+	Thread-safe token bucket rate limiter.
+
+	Tokens are added at `rate` per second, up to `capacity`; each request takes one
+	token and blocks until one is available. The default capacity of one token spaces
+	requests evenly (1/rate seconds apart) so the limit is never exceeded in a burst.
+	"""
+	def __init__(self, rate, capacity=1):
+		self.rate = float(rate)
+		self.capacity = float(capacity)
+		self.tokens = self.capacity
+		self.updated = time.monotonic()
+		self.paused_until = 0.0
+		self.lock = threading.Lock()
+
+	def acquire(self):
+		while True:
+			with self.lock:
+				now = time.monotonic()
+				if now >= self.paused_until:
+					self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+					self.updated = now
+					if self.tokens >= 1:
+						self.tokens -= 1
+						return
+					wait = (1 - self.tokens) / self.rate
+				else:
+					wait = self.paused_until - now
+			time.sleep(wait)
+
+	def pause(self, seconds):
+		# Stop handing out tokens (to all threads) for the given number of seconds
+		with self.lock:
+			self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+			self.tokens = 0
+			self.updated = self.paused_until
+
+class RequestStats:
+	"""
+	Thread-safe counters for API requests: latency and status of every attempt, and retries.
+	"""
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.latencies = list()
+		self.statuses = dict()
+		self.retries = 0
+
+	def record(self, latency, status):
+		with self.lock:
+			self.latencies.append(latency)
+			self.statuses[status] = self.statuses.get(status, 0) + 1
+
+	def retry(self):
+		with self.lock:
+			self.retries += 1
+
+	def percentile(self, pct):
+		with self.lock:
+			latencies = sorted(self.latencies)
+		if not latencies:
+			return 0.0
+		return latencies[min(len(latencies) - 1, int(round(pct / 100.0 * (len(latencies) - 1))))]
+
+	def summary(self):
+		statuses = ', '.join('%s: %d' % (status, count) for status, count in sorted(self.statuses.items(), key=lambda x: str(x[0])))
+		return ('%d requests (%s), %d retries, latency p50 %.3f sec, p99 %.3f sec'
+			% (len(self.latencies), statuses, self.retries, self.percentile(50), self.percentile(99)))
+
+class SyncLog:
+	"""
+	Log file wrapper that can be written to from multiple worker threads.
+	"""
+	def __init__(self, f):
+		self.f = f
+		self.lock = threading.Lock()
+
+	def write(self, msg):
+		with self.lock:
+			self.f.write(msg)
+
+	def flush(self):
+		with self.lock:
+			self.f.flush()
+
+	def close(self):
+		with self.lock:
+			self.f.close()
+
+stats = RequestStats()
+
+def create_session(workers):
+	# Keep-alive session shared by all worker threads, with one pooled connection per worker
+	session = requests.Session()
+	adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+	session.mount('https://', adapter)
+	session.mount('http://', adapter)
+	return session
+
+def get_retry_after(resp):
+	# Retry-After is either a number of seconds or an HTTP date
+	value = resp.headers.get('Retry-After')
+	if not value:
+		return None
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+	try:
+		retry_at = parsedate_to_datetime(value)
+		return max(0.0, retry_at.timestamp() - time.time())
+	except (TypeError, ValueError):
+		return None
+
+def get_backoff(attempt):
+	# Exponential backoff with jitter so that worker threads do not retry in lockstep
+	return min(MAX_BACKOFF, 2 ** attempt) + random.uniform(0, 1)
+
+def request_omim(session, params, limiter, log):
+	label = 'MIM[' + str(params.get('mimNumber')) + ']'
+	for attempt in range(MAX_RETRIES + 1):
+		limiter.acquire()
+		if attempt > 0:
+			stats.retry()
+		start_time = time.monotonic()
+		try:
+			resp = session.get(url=OMIM_SERVICE_BASE_USA, params=params, timeout=REQUEST_TIMEOUT)
+		except requests.RequestException as e:
+			stats.record(time.monotonic() - start_time, 'error')
+			delay = get_backoff(attempt)
+			log.write(label + ' request failed (' + str(e) + '), retrying in %.1f sec\n' % delay)
+		else:
+			stats.record(time.monotonic() - start_time, resp.status_code)
+			if resp.status_code == 200:
+				try:
+					return resp.json()
+				except ValueError:
+					raise OMIMQueryError(label + ' error parsing response: ' + resp.text[:200])
+			if resp.status_code != 429 and resp.status_code < 500:
+				raise OMIMQueryError(label + ' HTTP ' + str(resp.status_code) + ': ' + resp.text[:200])
+			delay = get_retry_after(resp)
+			if delay is None:
+				delay = get_backoff(attempt)
+			if resp.status_code == 429:
+				# Rate limited: hold back every worker, not just this one
+				limiter.pause(delay)
+			log.write(label + ' HTTP ' + str(resp.status_code) + ', retrying in %.1f sec\n' % delay)
+		if attempt < MAX_RETRIES:
+			time.sleep(delay)
+	raise OMIMQueryError(label + ' giving up after ' + str(MAX_RETRIES + 1) + ' attempts')
+
+def fetch_omim_entries(mimNumbers, log, limiter, session):
+	# mimNumbers is a batch of up to MAX_BATCH_SIZE mim numbers, fetched in one request
+	# Returns dict of mim number -> referenceList (None if the entry has no references)
+	mimNumbers = list(mimNumbers)
+	log.write('Parsing MIM[' + ','.join(mimNumbers) + ']\n')
 
 	params = dict(
-		mimNumber = mimNumber,
+		mimNumber = ','.join(mimNumbers),
 		apiKey = apiKey,
 		format = 'json',
-                include = 'referenceList'
+		include = 'referenceList'
 	)
 
-	resp = requests.get(url=OMIM_SERVICE_BASE_USA, params=params)
-	data = resp.json() # In case the JSON decoding fails, r.json simply returns None.
+	data = request_omim(session, params, limiter, log)
 
-	## parse pubmedId in JSON string
-	pubmed_cited_list = list()
-	ref_list = list()
-	if type(data) is not None:
-		entries = data['omim']['entryList']
-		for entry in entries:
-			if 'referenceList' in entry['entry']:
-				pubmedID_count = 0
-				ref_lists = entry['entry']['referenceList']
-				for ref in ref_lists:
-					try:
-						pubmedID = ref['reference']['pubmedID']
-						pubmedID_count += 1
-						pubmed_cited_list.append(str(mimNumber) + '\t' + str(pubmedID_count) + '\t' + str(pubmedID))
-					except KeyError as e:
-						log.write('MIM[' + mimNumber + '] pubmedID does not exist: ' + str(ref['reference']) + '\n')
+	## the entryList in the JSON response has one entry per requested mim number
+	entries = dict()
+	if data is not None:
+		for entry in data['omim']['entryList']:
+			mimNumber = str(entry['entry']['mimNumber'])
+			entries[mimNumber] = entry['entry'].get('referenceList')
 
+		for mimNumber in mimNumbers:
+			if mimNumber not in entries:
+				log.write('MIM[' + mimNumber + '] not in response\n')
 	else:
-		log.write("Error parsing response:", resp);
+		log.write('MIM[' + ','.join(mimNumbers) + '] empty response\n')
+	return entries
+
+def format_pubmed_cited(mimNumber, ref_lists, log):
+	## parse pubmedId from referenceList
+	pubmed_cited_list = list()
+	if ref_lists:
+		pubmedID_count = 0
+		for ref in ref_lists:
+			try:
+				pubmedID = ref['reference']['pubmedID']
+				pubmedID_count += 1
+				pubmed_cited_list.append(str(mimNumber) + '\t' + str(pubmedID_count) + '\t' + str(pubmedID))
+			except KeyError as e:
+				log.write('MIM[' + mimNumber + '] pubmedID does not exist: ' + str(ref['reference']) + '\n')
 	return pubmed_cited_list
 
-def parse_mim_number(mim_number_file):
-	mim_number_set = set() # mim in mim2gene are already unique, can replace set to list to main order, easy to validate by observation
-	f = open(mim_number_file, 'r')
+class ResponseCache:
+	"""
+	SQLite cache of OMIM referenceLists keyed by mim number, kept between mine releases.
+
+	A cached entry is reused unless it is older than the TTL (if one is set), its mim number
+	is in the refresh list, or its mim2gene.txt row has changed since it was fetched (new mim
+	numbers are never in the cache).
+	"""
+	def __init__(self, db_file, ttl_days=None, refresh=()):
+		self.conn = sqlite3.connect(db_file)
+		self.conn.execute('create table if not exists entry (mim_number text primary key, '
+			'mim2gene_row text, reference_list text, fetched_at real)')
+		self.conn.commit()
+		self.ttl = ttl_days * 86400 if ttl_days is not None else None
+		self.refresh = set(refresh)
+		self.hits = 0
+		self.misses = 0
+
+	def lookup(self, mimNumber, mim2gene_row):
+		# Returns (True, referenceList) for a usable cached entry, (False, None) otherwise
+		row = None
+		if mimNumber not in self.refresh:
+			row = self.conn.execute('select mim2gene_row, reference_list, fetched_at from entry where mim_number = ?',
+				(mimNumber,)).fetchone()
+		if row is None or row[0] != mim2gene_row or (self.ttl is not None and time.time() - row[2] > self.ttl):
+			self.misses += 1
+			return False, None
+		self.hits += 1
+		return True, json.loads(row[1])
 
-	for line in f:
-		if not line.startswith('#') and line.split('\t').pop(1).find('phenotype'):
-			mim_number_set.add(line.split('\t').pop(0))
+	def store(self, entries, mim_rows):
+		now = time.time()
+		self.conn.executemany('insert or replace into entry values (?, ?, ?, ?)',
+			[(mimNumber, mim_rows.get(mimNumber), json.dumps(ref_lists), now) for mimNumber, ref_lists in entries.items()])
+		self.conn.commit()
+
+	def close(self):
+		self.conn.close()
+
+class CheckpointJournal:
+	"""
+	Append-only record of completed mim numbers for the single output file mode.
+
+	Each journal line is "<output file size>\t<mim>,<mim>,..." and is written only after the
+	output rows for those mim numbers have been flushed and fsync'd. On restart the output
+	file is truncated back to the size in the last complete journal line, dropping rows from
+	a batch that was being written when the script stopped.
+	"""
+	def __init__(self, output_file, journal_file):
+		self.output_file = output_file
+		self.journal_file = journal_file
+		self.done = set()
+		self.output = None
+		self.journal = None
+
+	def open(self):
+		committed_size = 0
+		journal_size = 0
+		if os.path.exists(self.journal_file):
+			with open(self.journal_file, 'r') as f:
+				for line in f:
+					if not line.endswith('\n'):
+						# Partial line from an interrupted write
+						break
+					size, mims = line.rstrip('\n').split('\t')
+					committed_size = int(size)
+					self.done.update(mims.split(','))
+					journal_size += len(line)
+			os.truncate(self.journal_file, journal_size)
+		if os.path.exists(self.output_file):
+			output_size = os.path.getsize(self.output_file)
+			if output_size < committed_size:
+				raise OMIMQueryError(self.output_file + ' is smaller than recorded in ' + self.journal_file)
+			os.truncate(self.output_file, committed_size)
+		elif committed_size > 0:
+			raise OMIMQueryError(self.output_file + ' is missing but ' + self.journal_file + ' has completed entries')
+		self.output = open(self.output_file, 'a')
+		self.journal = open(self.journal_file, 'a')
+
+	def is_done(self, mimNumber):
+		return mimNumber in self.done
+
+	def commit(self, mimNumbers, pubmed_cited_list):
+		if pubmed_cited_list:
+			self.output.write('\n'.join(pubmed_cited_list) + '\n')
+		self.output.flush()
+		os.fsync(self.output.fileno())
+		self.journal.write(str(self.output.tell()) + '\t' + ','.join(mimNumbers) + '\n')
+		self.journal.flush()
+		os.fsync(self.journal.fileno())
+		self.done.update(mimNumbers)
+
+	def close(self):
+		self.output.close()
+		self.journal.close()
+
+def parse_mim_number(mim_number_file):
+	# Returns dict of mim number -> mim2gene row (the row is used to detect changed entries in the cache)
+	mim_number_set = dict() # mim in mim2gene are already unique
+	with open(mim_number_file, 'r') as f:
+		for line in f:
+			if not line.startswith('#') and line.split('\t').pop(1).find('phenotype'):
+				mim_number_set[line.split('\t').pop(0)] = line.rstrip('\n')
 
 	return mim_number_set
 
 def timestamp_file(fname, fmt='%Y-%m-%d-%H-%M-%S_{fname}'):
 	return datetime.datetime.now().strftime(fmt).format(fname=fname)
 
-def process_mim_file(file_idx):
+def get_batches(mim_numbers, batch_size):
+	mim_numbers = sorted(mim_numbers)
+	for i in range(0, len(mim_numbers), batch_size):
+		yield mim_numbers[i:i + batch_size]
+
+def harvest(mim_rows, log, limiter, session, workers, batch_size, cache, commit):
+	"""
+	Get pubmed_cited rows for the mim numbers in mim_rows (mim number -> mim2gene row), from the
+	cache where possible and otherwise from the OMIM API, and pass each batch of mim numbers with
+	its rows to commit(). Returns the number of mim numbers requested from the API and the number
+	of batches that failed.
+	"""
+	todo = list()
+	cached = list()
+	pubmed_cited_list = list()
+	for mimNumber in sorted(mim_rows):
+		hit, ref_lists = cache.lookup(mimNumber, mim_rows[mimNumber]) if cache else (False, None)
+		if not hit:
+			todo.append(mimNumber)
+			continue
+		cached.append(mimNumber)
+		pubmed_cited_list.extend(format_pubmed_cited(mimNumber, ref_lists, log))
+		if len(cached) >= CACHE_COMMIT_SIZE:
+			commit(cached, pubmed_cited_list)
+			cached = list()
+			pubmed_cited_list = list()
+	if cached:
+		commit(cached, pubmed_cited_list)
+
+	## send http requests to OMIM API from worker threads; the shared limiter keeps
+	## the combined request rate at the API limit
+	num_errors = 0
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		futures = {executor.submit(fetch_omim_entries, batch, log, limiter, session): batch for batch in get_batches(todo, batch_size)}
+		for future in as_completed(futures):
+			batch = futures[future]
+			try:
+				entries = future.result()
+			except OMIMQueryError as e:
+				num_errors += 1
+				print("An API error occurred: " + str(e))
+				log.write(str(e) + '\n')
+				continue
+			if cache:
+				cache.store(entries, mim_rows)
+			pubmed_cited_list = list()
+			for mimNumber in batch:
+				if mimNumber in entries:
+					pubmed_cited_list.extend(format_pubmed_cited(mimNumber, entries[mimNumber], log))
+			commit(batch, pubmed_cited_list)
+	return len(todo), num_errors
+
+def process_mim_file(file_idx, limiter, session, workers, batch_size, cache):
 	LOG_DIR = '../logs/'
 	LOG_NAME = 'pubmed_cited_' + file_idx + '.log'
 	MIM_NUMBER_FILE = '../current/mim2gene_' + file_idx
 	PUBMED_CITED_FILE = '../current/pubmed_cited_' + file_idx
 
 	## get log file
-	log = open(LOG_DIR + timestamp_file(LOG_NAME),'w+')
+	log = SyncLog(open(LOG_DIR + timestamp_file(LOG_NAME),'w+'))
 
 	print("Processing file: mim2gene_" + file_idx)
 	log.write("Processing file: mim2gene_" + file_idx + "\n")
 	log.write("Generating mim number set\n")
 	log.flush()
 
-	mim_number_set = set()
+	mim_number_set = dict()
 	## parse MIM number from mim2gene.txt file
 	try:
 		mim_number_set = parse_mim_number(MIM_NUMBER_FILE)
@@ -105,35 +444,105 @@ def process_mim_file(file_idx):
 
 	pubmed_cited_file = open(PUBMED_CITED_FILE,'w')
 
+	def write_rows(mimNumbers, pubmed_cited_list):
+		if pubmed_cited_list:
+			# Only write to file if not empty
+			pubmed_cited_file.write('\n'.join(pubmed_cited_list) + '\n')
+
 	log.write("Processing mim number set\n")
 	log.flush()
-	## send http requests to OMIM API (limit 4 requests/sec)		
-	for mim_number in mim_number_set:
-		time.sleep(5) # thread sleeps in sec
-
-		try:
-			pubmed_cited_list = get_omim_pubmed(mim_number, log)
-			if pubmed_cited_list:
-				# Only write to file if not empty
-				pubmed_cited_file.write('\n'.join(pubmed_cited_list) + '\n')
-		except OMIMQueryError as e:
-			print("An API error occurred.")
+	start_time = time.monotonic()
+	num_fetched, num_errors = harvest(mim_number_set, log, limiter, session, workers, batch_size, cache, write_rows)
 
+	elapsed = time.monotonic() - start_time
+	log.write('\nProcessed %d mim numbers (%d from API) in %.1f sec\n' % (len(mim_number_set), num_fetched, elapsed))
 	log.write('\nProcessing complete\n')
 	log.close()
 	pubmed_cited_file.close()
 
-def main():
+def process_mim2gene(mim_number_file, pubmed_cited_file, limiter, session, workers, batch_size, cache):
+	LOG_DIR = '../logs/'
+	LOG_NAME = 'pubmed_cited.log'
+
+	## get log file
+	log = SyncLog(open(LOG_DIR + timestamp_file(LOG_NAME),'w+'))
+
+	print("Processing file: " + mim_number_file)
+	log.write("Processing file: " + mim_number_file + "\n")
+	log.write("Generating mim number set\n")
+	log.flush()
+
+	## parse MIM number from mim2gene.txt file
+	mim_number_set = parse_mim_number(mim_number_file)
+
+	## skip mim numbers completed by a previous run
+	journal = CheckpointJournal(pubmed_cited_file, pubmed_cited_file + '.journal')
+	journal.open()
+	todo = {mim_number: row for mim_number, row in mim_number_set.items() if not journal.is_done(mim_number)}
+	print("%d mim numbers, %d already done" % (len(mim_number_set), len(mim_number_set) - len(todo)))
+	log.write("%d mim numbers, %d already done\n" % (len(mim_number_set), len(mim_number_set) - len(todo)))
+
+	log.write("Processing mim number set\n")
+	log.flush()
+	start_time = time.monotonic()
+	# Failed batches are not journaled, so they will be retried on the next run
+	num_fetched, num_errors = harvest(todo, log, limiter, session, workers, batch_size, cache, journal.commit)
+
+	elapsed = time.monotonic() - start_time
+	journal.close()
+	log.write('\nProcessed %d mim numbers (%d from API) in %.1f sec\n' % (len(todo), num_fetched, elapsed))
+	if num_errors:
+		print("%d batches failed; rerun the script to retry them" % num_errors)
+		log.write('%d batches failed; rerun the script to retry them\n' % num_errors)
+	log.write('\nProcessing complete\n')
+	log.close()
+
+def parse_args():
+	parser = argparse.ArgumentParser(description='Fetch PubMed ids for mim numbers in mim2gene.txt from the OMIM API.')
+	# Split file mode:
 	# Start index is numerical suffix of first file (usually 0 unless restarting from a previous run)
 	# End index is numerical suffix of last file, e.g. 27 if last file is mim2gene_27
-	idx_start = 2
-	idx_end = 2
-	for idx in range(idx_start, idx_end+1):
-		file_idx = str(idx)
-		if (idx < 10):
-			file_idx = "0" + file_idx
-		process_mim_file(file_idx)
-		time.sleep(300) # sleep 5 minutes before processing next file
-		
+	parser.add_argument('idx_start', type=int, nargs='?', help='numerical suffix of first mim2gene_NN file (split file mode)')
+	parser.add_argument('idx_end', type=int, nargs='?', help='numerical suffix of last mim2gene_NN file (split file mode)')
+	parser.add_argument('--input', default='../current/mim2gene.txt', help='mim2gene file (default: %(default)s)')
+	parser.add_argument('--output', default='../current/pubmed_cited.txt', help='output file (default: %(default)s)')
+	parser.add_argument('--cache', default='../current/omim_cache.sqlite', help='response cache database (default: %(default)s)')
+	parser.add_argument('--no-cache', action='store_true', help='do not read or write the response cache')
+	parser.add_argument('--cache-ttl', type=float, metavar='DAYS', help='refetch cached entries older than this many days')
+	parser.add_argument('--refresh', metavar='FILE', help='file with mim numbers (one per line) to refetch even if cached')
+	parser.add_argument('--rate', type=float, default=MAX_REQUESTS_PER_SEC, help='max requests/sec (default: %(default)s)')
+	parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='max concurrent requests (default: %(default)s)')
+	parser.add_argument('--batch-size', type=int, default=MAX_BATCH_SIZE, choices=range(1, MAX_BATCH_SIZE + 1), metavar='N',
+		help='mim numbers per request, 1-%d (default: %%(default)s)' % MAX_BATCH_SIZE)
+	args = parser.parse_args()
+	if (args.idx_start is None) != (args.idx_end is None):
+		parser.error('both idx_start and idx_end are required in split file mode')
+	return args
+
+def main():
+	args = parse_args()
+	# One limiter shared across all files so the rate holds between files too
+	limiter = TokenBucket(args.rate)
+	session = create_session(args.workers)
+	cache = None
+	if not args.no_cache:
+		refresh = list()
+		if args.refresh:
+			with open(args.refresh, 'r') as f:
+				refresh = [line.strip() for line in f if line.strip()]
+		cache = ResponseCache(args.cache, args.cache_ttl, refresh)
+	if args.idx_start is None:
+		process_mim2gene(args.input, args.output, limiter, session, args.workers, args.batch_size, cache)
+	else:
+		for idx in range(args.idx_start, args.idx_end+1):
+			file_idx = str(idx)
+			if (idx < 10):
+				file_idx = "0" + file_idx
+			process_mim_file(file_idx, limiter, session, args.workers, args.batch_size, cache)
+	print("Requests: " + stats.summary())
+	if cache:
+		print("Cache: %d hits, %d misses" % (cache.hits, cache.misses))
+		cache.close()
+
 if __name__ == "__main__":
 	main()
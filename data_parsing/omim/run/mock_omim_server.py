@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+Local stand-in for the OMIM API entry endpoint, for testing and benchmarking
+get_omim_pubmed.py without using a real API key.
+
+Serves synthetic /api/entry JSON with a referenceList for each requested mim number (the
+same mim number always gets the same references). The server can enforce a request rate
+limit (HTTP 429 with Retry-After once exceeded), inject random 429 and 5xx errors, and add
+response latency.
+
+Usage:
+    $ ./mock_omim_server.py [--port 8080] [--rate 4] [--latency 0.2] [--error-rate 0.01]
+and set OMIM_API_URL=http://localhost:8080/api/entry in .env (or the environment) before
+running get_omim_pubmed.py. See also benchmark_omim.py, which starts the server itself.
+"""
+import json, time, random, threading, argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Same limit as the real API
+MAX_BATCH_SIZE = 20
+
+class RateLimiter:
+	"""
+	Token bucket that rejects (rather than delays) requests over the limit.
+	"""
+	def __init__(self, rate, burst):
+		self.rate = float(rate)
+		self.capacity = float(burst)
+		self.tokens = self.capacity
+		self.updated = time.monotonic()
+		self.lock = threading.Lock()
+
+	def allow(self):
+		# Returns 0 if the request is allowed, otherwise seconds until a token is available
+		with self.lock:
+			now = time.monotonic()
+			self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+			self.updated = now
+			if self.tokens >= 1:
+				self.tokens -= 1
+				return 0
+			return (1 - self.tokens) / self.rate
+
+def make_entry(mimNumber, max_refs):
+	# Deterministic synthetic entry: some entries have no references, and some references
+	# have no pubmedID (as in real OMIM data)
+	rng = random.Random(mimNumber)
+	entry = {'mimNumber': mimNumber, 'status': 'live'}
+	num_refs = rng.randint(0, max_refs)
+	if num_refs:
+		refs = list()
+		for i in range(num_refs):
+			reference = {'referenceNumber': i + 1, 'title': 'Synthetic reference %d for %d' % (i + 1, mimNumber)}
+			if rng.random() < 0.9:
+				reference['pubmedID'] = rng.randint(1000000, 39999999)
+			refs.append({'reference': reference})
+		entry['referenceList'] = refs
+	return {'entry': entry}
+
+class MockOMIMHandler(BaseHTTPRequestHandler):
+	protocol_version = 'HTTP/1.1' # keep-alive, like the real API
+
+	def log_message(self, format, *args):
+		if self.server.verbose:
+			BaseHTTPRequestHandler.log_message(self, format, *args)
+
+	def send_json(self, status, body, headers=None):
+		data = json.dumps(body).encode('utf-8')
+		self.send_response(status)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(data)))
+		for name, value in (headers or dict()).items():
+			self.send_header(name, value)
+		self.end_headers()
+		self.wfile.write(data)
+
+	def do_GET(self):
+		server = self.server
+		server.count('requests')
+		url = urlparse(self.path)
+		if url.path != '/api/entry':
+			return self.send_json(404, {'error': 'not found'})
+
+		if server.latency:
+			time.sleep(random.uniform(0.5, 1.5) * server.latency)
+
+		wait = server.limiter.allow() if server.limiter else 0
+		if wait or random.random() < server.throttle_rate:
+			server.count('429')
+			retry_after = max(1, int(wait + 0.999))
+			return self.send_json(429, {'error': 'rate limit exceeded'}, {'Retry-After': str(retry_after)})
+		if random.random() < server.error_rate:
+			server.count('5xx')
+			return self.send_json(random.choice([500, 502, 503]), {'error': 'injected error'})
+
+		params = parse_qs(url.query)
+		try:
+			mimNumbers = [int(m) for m in params['mimNumber'][0].split(',')]
+		except (KeyError, ValueError):
+			server.count('400')
+			return self.send_json(400, {'error': 'invalid mimNumber'})
+		if len(mimNumbers) > MAX_BATCH_SIZE:
+			server.count('400')
+			return self.send_json(400, {'error': 'too many mimNumbers'})
+
+		server.count('200')
+		entries = [make_entry(mimNumber, server.max_refs) for mimNumber in mimNumbers]
+		self.send_json(200, {'omim': {'version': 'mock', 'entryList': entries}})
+
+class MockOMIMServer(ThreadingHTTPServer):
+	daemon_threads = True
+
+	def __init__(self, address, rate=None, burst=None, latency=0.0, error_rate=0.0, throttle_rate=0.0, max_refs=40, verbose=False):
+		ThreadingHTTPServer.__init__(self, address, MockOMIMHandler)
+		self.limiter = RateLimiter(rate, burst or rate) if rate else None
+		self.latency = latency
+		self.error_rate = error_rate
+		self.throttle_rate = throttle_rate
+		self.max_refs = max_refs
+		self.verbose = verbose
+		self.counts_lock = threading.Lock()
+		self.counts = dict()
+
+	def count(self, name):
+		with self.counts_lock:
+			self.counts[name] = self.counts.get(name, 0) + 1
+
+	def url(self):
+		return 'http://%s:%d/api/entry' % (self.server_address[0], self.server_address[1])
+
+def start_server(port=0, **kwargs):
+	# Start server in a background thread (port 0 picks a free port); returns the server
+	server = MockOMIMServer(('127.0.0.1', port), **kwargs)
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	return server
+
+def parse_args():
+	parser = argparse.ArgumentParser(description='Local stand-in for the OMIM API entry endpoint.')
+	parser.add_argument('--port', type=int, default=8080, help='port to listen on (default: %(default)s)')
+	parser.add_argument('--rate', type=float, help='requests/sec allowed before returning 429 (default: no limit)')
+	parser.add_argument('--burst', type=float, help='requests allowed in a burst (default: same as --rate)')
+	parser.add_argument('--latency', type=float, default=0.0, help='mean added latency in seconds (default: %(default)s)')
+	parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 5xx (default: %(default)s)')
+	parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429 (default: %(default)s)')
+	parser.add_argument('--max-refs', type=int, default=40, help='max references per entry (default: %(default)s)')
+	parser.add_argument('--verbose', action='store_true', help='log every request')
+	return parser.parse_args()
+
+def main():
+	args = parse_args()
+	server = MockOMIMServer(('127.0.0.1', args.port), rate=args.rate, burst=args.burst, latency=args.latency,
+		error_rate=args.error_rate, throttle_rate=args.throttle_rate, max_refs=args.max_refs, verbose=args.verbose)
+	print("Mock OMIM API listening on " + server.url())
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	print("Requests served: " + json.dumps(server.counts, sort_keys=True))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+"""
+Single-pass statistics for OrthoDB loader input files (*.tab)
+
+Replaces the per-line awk loop in count_homologues.sh and the separate awk | sort | uniq
+passes in check_orthodb_files.sh. Each file is memory-mapped and read once; large files
+are split into chunks at cluster boundaries and the chunks are processed across cores.
+
+Input columns used (tab-separated): 2 = cluster id, 3 = gene id, 6 = taxon id,
+7 = last common ancestor. Files are expected to be sorted by cluster id (as required by
+the loader); clusters that appear in more than one run of lines are reported as
+noncontiguous_clusters.
+
+Output (one "name<TAB>value" line per statistic, or JSON with --json):
+    files, lines, malformed_lines
+    clusters                distinct cluster ids
+    cluster_runs            runs of consecutive lines with the same cluster id
+    noncontiguous_clusters  cluster_runs - clusters (should be 0)
+    genes                   distinct gene ids
+    homologue_pairs         sum of n*(n-1) over cluster runs (expected Homologue count)
+    singleton_clusters      cluster runs with only one gene (should be 0)
+    missing_taxon_ids       lines whose taxon id is not numeric (should be 0)
+    duplicate_rows          repeated (cluster, gene, LCA) rows (should be 0)
+
+Usage:
+    $ ./orthodb_stats.py [--jobs N] [--json] <file or directory with *.tab files> ...
+"""
+import os, sys, json, glob, mmap, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+CLUSTER_COL = 1
+GENE_COL = 2
+TAXON_COL = 5
+LCA_COL = 6
+# Max number of duplicate rows to list in the output
+MAX_EXAMPLES = 10
+
+def get_cluster(mm, start):
+    end = mm.find(b'\n', start)
+    if end == -1:
+        end = len(mm)
+    fields = mm[start:end].split(b'\t')
+    return fields[CLUSTER_COL] if len(fields) > CLUSTER_COL else None
+
+def find_boundary(mm, pos):
+    # Returns the first line start at or after pos where the cluster id changes, so that
+    # no cluster run is split between two chunks
+    size = len(mm)
+    if pos <= 0:
+        return 0
+    nl = mm.find(b'\n', pos - 1)
+    if nl == -1:
+        return size
+    prev_cluster = get_cluster(mm, mm.rfind(b'\n', 0, nl) + 1)
+    start = nl + 1
+    while start < size and get_cluster(mm, start) == prev_cluster:
+        nl = mm.find(b'\n', start)
+        start = size if nl == -1 else nl + 1
+    return start
+
+def get_chunks(filename, chunk_size):
+    size = os.path.getsize(filename)
+    if size == 0:
+        return []
+    # chunk_size <= 0: one chunk per file
+    if size <= chunk_size or chunk_size <= 0:
+        return [(filename, 0, size)]
+    chunks = []
+    with open(filename, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = 0
+        while start < size:
+            end = find_boundary(mm, start + chunk_size)
+            chunks.append((filename, start, end))
+            start = end
+        mm.close()
+    return chunks
+
+def analyze_chunk(chunk):
+    filename, start, end = chunk
+    stats = dict(lines=0, malformed_lines=0, cluster_runs=0, homologue_pairs=0,
+                 singleton_clusters=0, missing_taxon_ids=0, duplicate_rows=0)
+    clusters = set()
+    genes = set()
+    duplicates = []
+
+    run_cluster = None
+    run_size = 0
+    run_keys = set()
+
+    def end_run():
+        stats['cluster_runs'] += 1
+        stats['homologue_pairs'] += run_size * (run_size - 1)
+        if run_size == 1:
+            stats['singleton_clusters'] += 1
+
+    with open(filename, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm.seek(start)
+        pos = start
+        while pos < end:
+            line = mm.readline()
+            if not line:
+                break
+            pos += len(line)
+            fields = line.rstrip(b'\r\n').split(b'\t')
+            if len(fields) <= LCA_COL:
+                stats['malformed_lines'] += 1
+                if len(fields) <= GENE_COL:
+                    continue
+            stats['lines'] += 1
+            cluster = fields[CLUSTER_COL]
+            gene = fields[GENE_COL]
+            if cluster != run_cluster:
+                if run_cluster is not None:
+                    end_run()
+                run_cluster = cluster
+                run_size = 0
+                run_keys = set()
+                clusters.add(cluster)
+            run_size += 1
+            genes.add(gene)
+
+            taxon = fields[TAXON_COL] if len(fields) > TAXON_COL else b''
+            if not any(c in b'0123456789' for c in taxon):
+                stats['missing_taxon_ids'] += 1
+
+            # Duplicates can only occur within a cluster run since the cluster is part of the key
+            key = (gene, fields[LCA_COL] if len(fields) > LCA_COL else b'')
+            if key in run_keys:
+                stats['duplicate_rows'] += 1
+                if len(duplicates) < MAX_EXAMPLES:
+                    duplicates.append(b'|'.join((cluster,) + key).decode('utf-8', 'replace'))
+            else:
+                run_keys.add(key)
+        mm.close()
+    if run_cluster is not None:
+        end_run()
+    return stats, clusters, genes, duplicates
+
+def get_input_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.tab'))))
+        else:
+            files.append(path)
+    return files
+
+def analyze(files, jobs, chunk_size):
+    chunks = []
+    for filename in files:
+        chunks.extend(get_chunks(filename, chunk_size))
+
+    totals = dict(files=len(files), lines=0, malformed_lines=0, clusters=0, cluster_runs=0,
+                  noncontiguous_clusters=0, genes=0, homologue_pairs=0, singleton_clusters=0,
+                  missing_taxon_ids=0, duplicate_rows=0)
+    clusters = set()
+    genes = set()
+    duplicates = []
+    if jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(chunks))) as executor:
+            results = list(executor.map(analyze_chunk, chunks))
+    else:
+        results = [analyze_chunk(chunk) for chunk in chunks]
+    for stats, chunk_clusters, chunk_genes, chunk_duplicates in results:
+        for name, value in stats.items():
+            totals[name] += value
+        clusters.update(chunk_clusters)
+        genes.update(chunk_genes)
+        duplicates.extend(chunk_duplicates)
+
+    totals['clusters'] = len(clusters)
+    totals['genes'] = len(genes)
+    totals['noncontiguous_clusters'] = totals['cluster_runs'] - totals['clusters']
+    totals['duplicate_examples'] = duplicates[:MAX_EXAMPLES]
+    return totals
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Single-pass statistics for OrthoDB loader input files.')
+    parser.add_argument('paths', nargs='+', help='OrthoDB .tab file(s) or directories containing them')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='number of processes (default: number of CPUs)')
+    parser.add_argument('--chunk-mb', type=int, default=256, help='approximate chunk size in MB per process (default: %(default)s)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    if args.chunk_mb < 1:
+        parser.error('--chunk-mb must be at least 1')
+    return args
+
+def main():
+    args = parse_args()
+    files = get_input_files(args.paths)
+    if not files:
+        print("No OrthoDB .tab files found in " + ' '.join(args.paths), file=sys.stderr)
+        sys.exit(1)
+    totals = analyze(files, args.jobs, args.chunk_mb * 1024 * 1024)
+    if args.json:
+        print(json.dumps(totals, indent=2))
+    else:
+        for name, value in totals.items():
+            if name == 'duplicate_examples':
+                for example in value:
+                    print('duplicate_example\t' + example)
+            else:
+                print(name + '\t' + str(value))
+
+if __name__ == "__main__":
+    main()
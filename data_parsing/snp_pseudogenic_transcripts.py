@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""
+Replace 'transcript' with 'pseudogenic_transcript' in SNP files if the id shows up in
+datasets/Ensembl/annotations/*/*/pseudogenes
+
+Replaces the per-id grep/sed -i loop in snp_pseudogenic_transcripts.sh. The pseudogenic
+transcript ids are loaded into a set and each VCF file is read once: in the INFO column,
+consequence annotations of type primary_transcript, transcript or ncRNA whose feature id
+is in the set are changed to pseudogenic_transcript. The id must match exactly (sed also
+matched ids that merely started with a listed id). Output is written to a temp file in
+the same directory and renamed over the original, and only if something changed. Files
+are processed in parallel.
+
+Input file: list of all pseudogenic_transcript ids, one per line
+
+Usage:
+    $ ./snp_pseudogenic_transcripts.py [--jobs N] [--dry-run] <transcript id file> <organism_directory_name> ...
+Example:
+    $ ./snp_pseudogenic_transcripts.py ~/pseudogenic_transcript_ids.txt bos_taurus
+"""
+import os, re, sys, glob, shutil, tempfile, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+SNP_DIR_GLOB = '/db/*/datasets/SNP/Ensembl'
+INFO_COL = 7
+REPLACED_TYPES = ['primary_transcript', 'transcript', 'ncRNA']
+CONSEQUENCE_REGEX = re.compile(rb'\|(primary_transcript|transcript|ncRNA)\|([^|,;\t\r\n]*)')
+
+def read_ids(ids_file):
+    with open(ids_file, 'rb') as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+def rewrite_vcf(task):
+    # Returns (vcf file, dict of replaced type -> count)
+    vcf_file, ids, dry_run = task
+    counts = dict((feature_type, 0) for feature_type in REPLACED_TYPES)
+
+    def replace(m):
+        if m.group(2) not in ids:
+            return m.group(0)
+        counts[m.group(1).decode()] += 1
+        return b'|pseudogenic_transcript|' + m.group(2)
+
+    if dry_run:
+        out = open(os.devnull, 'wb')
+    else:
+        fd, tmp_file = tempfile.mkstemp(prefix='.' + os.path.basename(vcf_file) + '.', dir=os.path.dirname(vcf_file))
+        out = os.fdopen(fd, 'wb')
+    try:
+        with open(vcf_file, 'rb') as f, out:
+            for line in f:
+                if not line.startswith(b'#'):
+                    fields = line.split(b'\t', INFO_COL + 1)
+                    if len(fields) > INFO_COL and b'|' in fields[INFO_COL]:
+                        fields[INFO_COL] = CONSEQUENCE_REGEX.sub(replace, fields[INFO_COL])
+                        line = b'\t'.join(fields)
+                out.write(line)
+        if sum(counts.values()) and not dry_run:
+            shutil.copymode(vcf_file, tmp_file)
+            os.replace(tmp_file, vcf_file)
+    finally:
+        if not dry_run and os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return vcf_file, counts
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Change transcript types to pseudogenic_transcript in Ensembl SNP (VCF) files.')
+    parser.add_argument('ids_file', help='file with pseudogenic_transcript ids, one per line')
+    parser.add_argument('org_dirs', nargs='+', help='organism directory name(s) under %s, e.g. bos_taurus' % SNP_DIR_GLOB)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='number of processes (default: number of CPUs)')
+    parser.add_argument('--dry-run', action='store_true', help='count annotations that would be changed without changing files')
+    parser.add_argument('--snp-dir', default=SNP_DIR_GLOB, help='SNP directory glob (default: %(default)s)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    ids = read_ids(args.ids_file)
+    print("Read %d pseudogenic transcript ids from %s" % (len(ids), args.ids_file))
+    vcf_files = []
+    for org_dir in args.org_dirs:
+        vcf_files.extend(sorted(glob.glob(os.path.join(args.snp_dir, org_dir, '**', '*.vcf'), recursive=True)))
+    if not vcf_files:
+        print("No vcf files found for " + ', '.join(args.org_dirs), file=sys.stderr)
+        sys.exit(1)
+
+    total = 0
+    tasks = [(vcf_file, ids, args.dry_run) for vcf_file in vcf_files]
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(tasks)))) as executor:
+        for vcf_file, counts in executor.map(rewrite_vcf, tasks):
+            file_total = sum(counts.values())
+            total += file_total
+            details = ', '.join('%s: %d' % (feature_type, counts[feature_type]) for feature_type in REPLACED_TYPES)
+            print("%s: %d annotations %s (%s)" % (vcf_file, file_total, 'to change' if args.dry_run else 'changed', details))
+    print("Total: %d annotations in %d files" % (total, len(vcf_files)))
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@
 scriptname=`basename "$0"`
 scriptpath=`dirname $(readlink -f $0)`
 log_dir="${scriptpath}/log"
+# Prefixes build output lines with timestamps, and reports per-source timings
+timeline="python3 ${scriptpath}/build_timeline.py"
 
 # variables
 . ~/intermine-scripts/common/script_vars_common.sh
@@ -24,20 +26,30 @@ script_outfile="${log_dir}/${script_outfilename}"
 echo "Script output will be stored in file $script_outfile"
 
 cd ${mine_home_dir}
-./gradlew clean > ${script_outfile} 2>&1 
-./gradlew buildDB >> ${script_outfile} 2>&1
-./project_build -b localhost ${build_dir} >> ${script_outfile} 2>&1
+./gradlew clean 2>&1 | ${timeline} stamp > ${script_outfile}
+./gradlew buildDB 2>&1 | ${timeline} stamp >> ${script_outfile}
+./project_build -b localhost ${build_dir} 2>&1 | ${timeline} stamp >> ${script_outfile}
 
-# Get exit code
-ec=$?
+# Get exit code (of project_build, not of the timestamp filter)
+ec=${PIPESTATUS[0]}
 
+# Only successful builds go in the build history, so that a failed or partial last step
+# does not lower the medians that later builds are compared with
+record=""
 if [ ! $ec -eq 0 ]; then
     mail_subj="${mail_subj} error"
     mail_msg="${mail_msg} stopped early due to error. See ${script_outfile} for details."
 else
     mail_subj="${mail_subj} finished"
     mail_msg="${mail_msg} finished running.  See ${script_outfile} for script output."
+    record="--record"
 fi
 
 mail_msg="${mail_msg} (This is an automated message.)"
+
+# Per-source timings, compared with earlier builds
+timeline_summary=$(${timeline} analyze ${record} --top 10 ${script_outfile})
+mail_msg="${mail_msg}
+
+${timeline_summary}"
 echo "${mail_msg}" | mail -s "${mail_subj}" $notify_email
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+"""
+Per-source build timeline and regression report for project_build logs
+
+project_build output has no timestamps, so the build scripts pipe it through
+"build_timeline.py stamp", which prefixes each line with the time it was written. The
+"analyze" command then splits a stamped log into steps at each gradle command for a new
+source (-Psource=<name>) or post-process (-Pprocess=<name>), and reports the start, end and
+duration of each step. If the log has data loader "<N> objects per minute" lines, the
+last rate seen in each step is reported as its throughput.
+
+With --record, the timeline is appended to a history file (one JSON object per build),
+and each step is compared with the median duration of the same step in earlier builds;
+steps that are slower by more than --threshold are flagged as regressions. The text
+summary (top-N slowest steps and regressions) is meant to go in the notification email.
+
+Usage:
+    $ ./project_build ... 2>&1 | ./build_timeline.py stamp >> build.out
+    $ ./build_timeline.py analyze [--record] [--top 10] [--history FILE] build.out
+"""
+import os, re, sys, json, time, argparse
+from datetime import datetime
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'log', 'build_history.jsonl')
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+STAMP_REGEX = re.compile(r'^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] ?(.*)$')
+STEP_REGEX = re.compile(r'-P(source|process)=([^\s"\']+)')
+THROUGHPUT_REGEX = re.compile(r'([\d,]+(?:\.\d+)?) objects per minute')
+# Steps shorter than this are not flagged as regressions (seconds)
+MIN_REGRESSION_SECONDS = 300
+# Number of earlier builds to compare against
+HISTORY_WINDOW = 10
+
+def stamp(infile, outfile):
+    # Binary, so that output that is not valid UTF-8 is passed through unchanged
+    for line in infile:
+        outfile.write(b'[' + time.strftime(TIME_FORMAT).encode() + b'] ' + line)
+        outfile.flush()
+
+def parse_log(log_file):
+    # Returns (first time, last time, list of steps); times are datetimes (None if the
+    # log is not stamped)
+    steps = []
+    current = None
+    first_time = None
+    last_time = None
+    with open(log_file, 'r', errors='replace') as f:
+        for line in f:
+            m = STAMP_REGEX.match(line)
+            line_time = None
+            if m:
+                line_time = datetime.strptime(m.group(1), TIME_FORMAT)
+                line = m.group(2)
+                if first_time is None:
+                    first_time = line_time
+                last_time = line_time
+            m = STEP_REGEX.search(line)
+            if m:
+                name = m.group(1) + ':' + m.group(2)
+                if current is None or current['name'] != name:
+                    if current is not None:
+                        current['end'] = line_time
+                    current = dict(name=name, start=line_time, end=None, objects_per_min=None)
+                    steps.append(current)
+            if current is not None:
+                m = THROUGHPUT_REGEX.search(line)
+                if m:
+                    current['objects_per_min'] = float(m.group(1).replace(',', ''))
+    if current is not None:
+        current['end'] = last_time
+    for step in steps:
+        step['duration'] = None
+        if step['start'] and step['end']:
+            step['duration'] = (step['end'] - step['start']).total_seconds()
+    return first_time, last_time, steps
+
+def format_duration(seconds):
+    if seconds is None:
+        return '?'
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if days:
+        return '%dd %02dh %02dm' % (days, hours, minutes)
+    if hours:
+        return '%dh %02dm' % (hours, minutes)
+    return '%dm %02ds' % (minutes, seconds)
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    if len(values) % 2:
+        return values[mid]
+    return (values[mid - 1] + values[mid]) / 2.0
+
+def read_history(history_file):
+    builds = []
+    if os.path.exists(history_file):
+        with open(history_file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    builds.append(json.loads(line))
+    return builds
+
+def get_step_durations(build):
+    # Returns dict of step name -> total duration (a step can appear more than once)
+    durations = dict()
+    for step in build['steps']:
+        if step['duration'] is not None:
+            durations[step['name']] = durations.get(step['name'], 0) + step['duration']
+    return durations
+
+def find_regressions(durations, earlier_builds, threshold):
+    # Returns dict of step name -> (duration, median of earlier durations)
+    earlier = dict()
+    for build in earlier_builds[-HISTORY_WINDOW:]:
+        for name, duration in get_step_durations(build).items():
+            earlier.setdefault(name, []).append(duration)
+    regressions = dict()
+    for name, duration in durations.items():
+        if name in earlier and duration >= MIN_REGRESSION_SECONDS:
+            baseline = median(earlier[name])
+            if duration > baseline * threshold:
+                regressions[name] = (duration, baseline)
+    return regressions, earlier
+
+def summarize(build, earlier_builds, top, threshold):
+    lines = []
+    durations = get_step_durations(build)
+    regressions, earlier = find_regressions(durations, earlier_builds, threshold)
+    lines.append("Build timeline for %s: %s total, %d steps" % (
+        build['log'], format_duration(build['duration']), len(build['steps'])))
+    if build['duration'] is None:
+        lines.append("(log has no timestamps; pipe the build output through build_timeline.py stamp)")
+        return '\n'.join(lines)
+
+    lines.append("")
+    lines.append("Slowest steps:")
+    for i, name in enumerate(sorted(durations, key=lambda name: -durations[name])[:top], 1):
+        detail = ''
+        if name in earlier:
+            detail = '  (median of earlier builds: %s)' % format_duration(median(earlier[name]))
+        throughput = [step['objects_per_min'] for step in build['steps'] if step['name'] == name and step['objects_per_min']]
+        if throughput:
+            detail += '  %.0f objects/min' % throughput[-1]
+        flag = '  REGRESSION' if name in regressions else ''
+        lines.append("%3d. %-50s %12s%s%s" % (i, name, format_duration(durations[name]), detail, flag))
+
+    lines.append("")
+    if not earlier_builds:
+        lines.append("No earlier builds in history to compare with")
+    elif regressions:
+        lines.append("Regressions (more than %.0f%% slower than the median of up to %d earlier builds):"
+                     % ((threshold - 1) * 100, HISTORY_WINDOW))
+        for name in sorted(regressions, key=lambda name: regressions[name][1] - regressions[name][0]):
+            duration, baseline = regressions[name]
+            lines.append("    %-50s %12s vs %s (+%.0f%%)" % (name, format_duration(duration), format_duration(baseline),
+                                                            (duration / baseline - 1) * 100 if baseline else 0))
+    else:
+        lines.append("No regressions compared with earlier builds")
+    return '\n'.join(lines)
+
+def analyze(args):
+    first_time, last_time, steps = parse_log(args.log_file)
+    build = dict(log=os.path.basename(args.log_file),
+                 started=first_time.strftime(TIME_FORMAT) if first_time else None,
+                 finished=last_time.strftime(TIME_FORMAT) if last_time else None,
+                 duration=(last_time - first_time).total_seconds() if first_time else None,
+                 steps=[dict(name=step['name'],
+                             start=step['start'].strftime(TIME_FORMAT) if step['start'] else None,
+                             end=step['end'].strftime(TIME_FORMAT) if step['end'] else None,
+                             duration=step['duration'],
+                             objects_per_min=step['objects_per_min']) for step in steps])
+    earlier_builds = [b for b in read_history(args.history) if b['log'] != build['log']]
+    if args.json:
+        print(json.dumps(build, indent=2))
+    else:
+        print(summarize(build, earlier_builds, args.top, args.threshold))
+    if args.record and build['duration'] is not None:
+        history_dir = os.path.dirname(args.history)
+        if history_dir and not os.path.isdir(history_dir):
+            os.makedirs(history_dir)
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(build, sort_keys=True) + '\n')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Per-source timeline and regression report for project_build logs.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+    subparsers.add_parser('stamp', help='copy stdin to stdout, prefixing each line with the time')
+    analyze_parser = subparsers.add_parser('analyze', help='report step timings from a stamped log')
+    analyze_parser.add_argument('log_file')
+    analyze_parser.add_argument('--history', default=DEFAULT_HISTORY, help='build history file (default: %(default)s)')
+    analyze_parser.add_argument('--record', action='store_true', help='add this build to the history file')
+    analyze_parser.add_argument('--top', type=int, default=10, help='number of slowest steps to list (default: %(default)s)')
+    analyze_parser.add_argument('--threshold', type=float, default=1.5,
+                                help='flag steps slower than this times the earlier median (default: %(default)s)')
+    analyze_parser.add_argument('--json', action='store_true', help='print the timeline as JSON')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.command == 'stamp':
+        stamp(sys.stdin.buffer, sys.stdout.buffer)
+    else:
+        analyze(args)
+
+if __name__ == "__main__":
+    main()
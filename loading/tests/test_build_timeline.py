@@ -0,0 +1,48 @@
+import os, sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from build_timeline import parse_log, find_regressions
+
+STAMPED_LOG = '''[2024-05-01 10:00:00] Starting build
+[2024-05-01 10:00:05] ./gradlew integrate -Psource=uniprot --stacktrace
+[2024-05-01 10:20:00] 1,200 objects per minute
+[2024-05-01 10:30:00] 2,500.5 objects per minute
+[2024-05-01 10:30:05] ./gradlew integrate -Psource=kegg --stacktrace
+[2024-05-01 10:35:05] ./gradlew postprocess -Pprocess=do-sources
+[2024-05-01 11:00:05] BUILD SUCCESSFUL
+'''
+
+def write_log(tmp_path, text=STAMPED_LOG):
+    log_file = str(tmp_path / 'build.out')
+    with open(log_file, 'w') as f:
+        f.write(text)
+    return log_file
+
+def test_parse_log_steps(tmp_path):
+    first_time, last_time, steps = parse_log(write_log(tmp_path))
+    assert first_time == datetime(2024, 5, 1, 10, 0, 0)
+    assert last_time == datetime(2024, 5, 1, 11, 0, 5)
+    assert [(step['name'], step['duration'], step['objects_per_min']) for step in steps] == [
+        ('source:uniprot', 1800, 2500.5),
+        ('source:kegg', 300, None),
+        ('process:do-sources', 1500, None),
+    ]
+
+def test_parse_log_without_stamps(tmp_path):
+    first_time, last_time, steps = parse_log(write_log(tmp_path, './gradlew integrate -Psource=uniprot\ndone\n'))
+    assert first_time is None and last_time is None
+    assert [(step['name'], step['duration']) for step in steps] == [('source:uniprot', None)]
+
+def make_build(**durations):
+    return dict(steps=[dict(name=name, duration=duration) for name, duration in durations.items()])
+
+def test_find_regressions():
+    earlier_builds = [make_build(uniprot=1000, kegg=100, biogrid=400), make_build(uniprot=1200, kegg=100, biogrid=400),
+                      make_build(uniprot=1100)]
+    regressions, earlier = find_regressions(dict(uniprot=1700, kegg=250, biogrid=900, new=5000), earlier_builds, 1.5)
+    # uniprot and biogrid are more than 1.5 times their medians; kegg is too, but takes less
+    # than MIN_REGRESSION_SECONDS; new has no earlier builds
+    assert regressions == dict(uniprot=(1700, 1100), biogrid=(900, 400))
+    assert earlier['uniprot'] == [1000, 1200, 1100]
+    assert not find_regressions(dict(uniprot=1600, biogrid=600), earlier_builds, 1.5)[0]
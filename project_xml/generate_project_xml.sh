@@ -66,6 +66,12 @@ if [ $ec -ne 0 ]; then
     exit 1
 fi
 
+# Read the datasets directory layout once (only directories that changed since the last
+# run are re-read); the functions in project_xml_functions.sh look it up in the tables
+# loaded from this cache
+${inventory} refresh
+load_inventory_tables
+
 sourcesfile="${mine_name}/sources.sh"
 . $sourcesfile
 
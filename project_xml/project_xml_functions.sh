@@ -1,5 +1,45 @@
 #!/bin/bash  
 
+# Cached listing of the datasets directory and taxon_ids.tab (see common/dataset_inventory.py)
+# Refreshed once by generate_project_xml.sh, so lookups below do not need to walk /db
+inventory="python3 $( cd "$(dirname "${BASH_SOURCE[0]}")" ; pwd -P )/../common/dataset_inventory.py"
+
+# Subdirectories, file/entry counts and taxon ids for the whole datasets directory, loaded
+# by load_inventory_tables with one inventory call; lookups of directories that are not
+# in these tables fall back to querying the inventory
+declare -A inventory_subdirs
+declare -A inventory_num_files
+declare -A inventory_num_entries
+declare -A inventory_taxon_ids
+
+function load_inventory_tables {
+    local kind key value value2
+    while IFS=$'\t' read -r kind key value value2; do
+        case "$kind" in
+            subdir) inventory_subdirs["$key"]+="${value}"$'\n' ;;
+            count) inventory_num_files["$key"]=$value
+                   inventory_num_entries["$key"]=$value2 ;;
+            taxon) inventory_taxon_ids["$key"]=$value ;;
+        esac
+    done < <(${inventory} table ${mine_dir}/datasets)
+}
+
+# Directory path as listed in the inventory tables (no doubled or trailing slashes)
+function inventory_path {
+    local path=${1//\/\//\/}
+    echo "${path%/}"
+}
+
+# Number of entries in a directory, like ls | wc -l
+function count_entries {
+    local dir=$(inventory_path "$1")
+    if [ -n "${inventory_num_entries[$dir]+x}" ]; then
+        echo "${inventory_num_entries[$dir]}"
+    else
+        ${inventory} ls ${dir} 2>/dev/null | wc -l
+    fi
+}
+
 # Get mine name and version
 
 function get_mine_name {
@@ -42,13 +82,19 @@ function get_bio_source_version {
 function get_orgs {
     local data_subdir=$1
 
-    local data_dir=${mine_dir}/datasets/${data_subdir}
-    local num_orgs=$(find ${data_dir} -mindepth 1 -maxdepth 1 -type d -not -path "*/old" 2>/dev/null | wc -l)
-    if [ $num_orgs -eq 0 ]; then
+    local data_dir=$(inventory_path "${mine_dir}/datasets/${data_subdir}")
+    local orgs
+    if [ -n "${inventory_num_files[$data_dir]+x}" ]; then
+        orgs=${inventory_subdirs[$data_dir]}
+        orgs=${orgs%$'\n'}
+    else
+        orgs=$(${inventory} orgs ${data_dir} 2>/dev/null)
+    fi
+    if [ -z "$orgs" ]; then
         echo "WARNING: $data_subdir does not exist or is empty" 1>&2
         return 1
     fi
-    find ${data_dir} -mindepth 1 -maxdepth 1 -type d -not -path "*/old" -printf "%f\n" | sort
+    echo "$orgs"
 }
 
 # Get assemblies in org subdirectory
@@ -77,7 +123,13 @@ function get_abbr {
 function get_taxon_id_from_tabfile {
     local fullname=$1
 
-    taxon_id=$(grep -i "$fullname" taxon_ids.tab | cut -f2)
+    local key=${fullname,,}
+    if [ -n "${inventory_taxon_ids[$key]+x}" ]; then
+        # One taxon id per line if there are several matches
+        taxon_id=${inventory_taxon_ids[$key]// /$'\n'}
+    else
+        taxon_id=$(${inventory} taxon-id "$fullname")
+    fi
     if [ -z "$taxon_id" ]; then
         echo "WARNING: $fullname not found in taxon_ids.tab" 1>&2
     fi
@@ -128,7 +180,12 @@ function check_nonempty_dir {
     check_dir "$dirname"
     ec=$?
     if [ "$ec" -eq 0 ]; then
-        numfiles=$(find -L $dirname/ -mindepth 1 -maxdepth 1 -type f 2>/dev/null | wc -l)
+        local dir=$(inventory_path "$dirname")
+        if [ -n "${inventory_num_files[$dir]+x}" ]; then
+            numfiles=${inventory_num_files[$dir]}
+        else
+            numfiles=$(${inventory} count-files $dirname/ 2>/dev/null)
+        fi
         if [ "$numfiles" -eq 0 ]; then
             echo "WARNING: Directory $dirname is empty" 1>&2
         else
@@ -352,7 +409,7 @@ function add_snp {
                 # If multiple assemblies, append assembly version to source name
    	        append_assembly=$(get_append_assembly "$assembly" "$num_assemblies")
                 # Get number of parts
-                actual_numparts=$(ls ${mine_dir}/datasets/${data_subdir}/${org}/${assembly} | wc -l)
+                actual_numparts=$(count_entries ${mine_dir}/datasets/${data_subdir}/${org}/${assembly})
                 if [ "$actual_numparts" -ge "$numparts" ]; then
                     echo "WARNING: More than 20 SNP parts found in ${mine_dir}/datasets/${data_subdir}/${org}/${assembly}" 1>&2
                 elif [ "$actual_numparts" -eq 0 ]; then
@@ -362,8 +419,8 @@ function add_snp {
                 for (( i=0; i<${actual_numparts}; i++ )); do
                     this_part=${parts[i]}
                     # Check that there are .vcf files first
-                    files=$(ls ${mine_dir}/datasets/${data_subdir}/${org}/${assembly}/${this_part} 2>/dev/null)
-                    if [ ! -z "$files" ]; then
+                    num_part_entries=$(count_entries ${mine_dir}/datasets/${data_subdir}/${org}/${assembly}/${this_part})
+                    if [ "$num_part_entries" -gt 0 ]; then
                         echo "    <source name=\"${abbr}${append_assembly}-${source_abbr}-snp-variation-${this_part}\" type=\"snp-variation\" version=\"${source_version}\">" >> $outfile
                         echo "      <property name=\"snp-variation.dataSetTitle\" value=\"Variants and Variant Effects from ${data_source}\"/>" >> $outfile
                         echo "      <property name=\"snp-variation.dataSourceName\" value=\"${data_source}\"/>" >> $outfile
@@ -4,38 +4,11 @@
 # chromosome_count.sh
 #
 # Check database for correct number of chromosomes.
+#
+# Counts for all organisms are fetched with one database
+# connection by db_verify.py.
 #######################################################
 
-# get database name from properties file
-dbname=$(grep db.production.datasource.databaseName ~/.intermine/*.properties | awk -F'=' '{print $2}')
-
-echo "Database name is ${dbname}"
-echo
-
-all_counts_correct=1
-fasta_files=$(find /db/*/datasets/genome -name *.fa)
-
-for fasta_file in $fasta_files; do
-    # assumes directory format is /db/<mine_dir>/datasets/genome/<organism_name>/<assembly>/*.fa
-    org_name=$(echo "${fasta_file}" | awk -F'/' '{print $6}' | sed 's/_/ /g')
-    assembly=$(echo "${fasta_file}" | awk -F'/' '{print $7}')
-    echo "Checking chromosomes for ${org_name} (assembly: $assembly)..."
-    dbcount=$(psql ${dbname} -c "select count(c.id) from chromosome c where c.assembly='$assembly'" -t -A)
-    filecount=$(grep '>' $fasta_file | wc -l)
-    if [ $dbcount -eq $filecount ]; then
-        echo "Chromosome count correct ($filecount)"
-    else
-        echo "WARNING: database has $dbcount chromosomes but fasta file has $filecount chromosomes!"
-        all_counts_correct=0
-    fi
-    echo
-done
+this_path=$( cd "$(dirname "${BASH_SOURCE[0]}")" ; pwd -P )
 
-echo
-echo "SUMMARY:"
-if [ $all_counts_correct -eq 0 ]; then
-    echo "Some counts were incorrect!"
-else
-    echo "All counts were correct."
-fi
-echo
+python3 ${this_path}/db_verify.py chromosome "$@"
@@ -0,0 +1,925 @@
+#!/usr/bin/env python3
+
+"""
+Post-build verification of loaded entity counts against the input files
+
+Replaces the per-organism, per-class (or per-file) psql calls in the *_count.sh scripts
+listed below. A single database connection is opened and each kind of count is fetched
+for all organisms at once with a GROUP BY query (e.g., sequence features by organismid,
+source, class and SO term); the expected counts are then compared in memory. Expected
+counts come from the cached GFF feature type index (gff_feature_counts.py), FASTA record
+counts (fasta_count.py) and one pass over each of the other input files.
+
+Checks:
+    gff               features of each type in /db/*/datasets/<source>/annotations/*.gff3
+    cds-protein       CodingSequences and Polypeptides in <source>/cds_fasta and protein_fasta
+    chromosome        Chromosomes in genome/<organism>/<assembly>/*.fa
+    kegg              KEGG pathways and gene.pathways in KEGG_genes/*_gene_map.tab
+    reactome          Reactome pathways per organism in reactome.organisms (project.xml)
+    reactome-gramene  Reactome Gramene pathways and gene.pathways
+    e2p2-pathway      MaizeGDB E2P2 pathways and gene.pathways
+    gpluse-reactions  GplusE reactions and gene.reactions
+    uniprot           Swiss-Prot and TrEMBL proteins
+    xref              CrossReferences from xref/gene
+    custom-gene-info  custom gene info genes, with a spot check of symbol and description
+    gene-expression   genes, experiments and expressions in gene_expression
+    ensembl-compara   Ensembl Compara homologues per taxon id
+    qtl-gff           QTLs in QTL/<organism>/<assembly>/*.gff3
+    faang-gff         features of each type in FAANG-gff/<organism>/<assembly>/*.gff3
+Each check has a wrapper script (e.g., kegg_count.sh for kegg).
+
+The other scripts in this directory (orthodb_count.sh, hgd_ortho_count.sh,
+aquamine_ortho_count.sh, gpluse_orthologs_count.sh, pangene_count.sh, biogrid_count.sh,
+omim_count.sh, faang_metadata_count.sh, genes_without_region_info.sh and
+transcripts_without_chr_info.sh) are not covered: each runs a fixed few queries, none of
+them per organism or per file, so there are no repeated psql calls to combine.
+
+Prerequisites:
+    psycopg2 (PostgreSQL), or an SQLite copy of the tables used (--sqlite), e.g. the
+    test fixture in tests/fixture.sql. Run the tests with:
+        $ python3 -m pytest tests
+
+Usage:
+    $ ./db_verify.py [--dbname NAME | --sqlite FILE] [--datasets GLOB] [check ...]
+With no checks given, runs gff and cds-protein. The database name defaults to
+db.production.datasource.databaseName in ~/.intermine/*.properties. Exits with status 1
+if any count is incorrect.
+"""
+import os, re, sys, glob, time, argparse
+from concurrent.futures import ProcessPoolExecutor
+from gff_feature_counts import FeatureCountIndex, DEFAULT_CACHE as GFF_CACHE
+from fasta_count import FastaCountCache, DEFAULT_CACHE as FASTA_CACHE
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_parsing'))
+from count_uniprot_proteins import count_file as count_uniprot_file
+
+PROPERTIES_GLOB = os.path.expanduser('~/.intermine/*.properties')
+DATASETS_GLOB = '/db/*/datasets'
+SECTION_DIVIDE = '-' * 64
+CLASS_PREFIX = 'org.intermine.model.bio.'
+
+# (source, directory under datasets, subdirectory under <organism>/<assembly>, Gene.source)
+# Gene.source of None means read it from column 2 of the gff file (MaizeGDB, OGS)
+GFF_SOURCES = [
+    ('RefSeq', 'RefSeq', 'genes', 'RefSeq'),
+    ('RefSeq-pseudogenes-transcribed', 'RefSeq', 'pseudogenes_transcribed', 'RefSeq'),
+    ('RefSeq-pseudogenes-nottranscribed', 'RefSeq', 'pseudogenes_nottranscribed', 'RefSeq'),
+    ('Ensembl', 'Ensembl', 'genes', 'Ensembl'),
+    ('Ensembl-pseudogenes', 'Ensembl', 'pseudogenes', 'Ensembl'),
+    ('MaizeGDB', 'MaizeGDB', '', None),
+    ('OGS', 'OGS', '', None),
+    ('Genbank', 'Genbank', '', 'Genbank'),
+]
+FASTA_SOURCES = ['RefSeq', 'Ensembl', 'MaizeGDB', 'Genbank']
+
+def get_dbname():
+    for properties_file in sorted(glob.glob(PROPERTIES_GLOB)):
+        with open(properties_file, 'r') as f:
+            for line in f:
+                if line.startswith('db.production.datasource.databaseName'):
+                    return line.split('=', 1)[1].strip()
+    return None
+
+class Database:
+    """
+    One connection to the production database (PostgreSQL) or an SQLite fixture.
+    """
+    def __init__(self, dbname=None, sqlite_file=None):
+        if sqlite_file:
+            import sqlite3
+            self.conn = sqlite3.connect(sqlite_file, check_same_thread=False)
+            self.name = sqlite_file
+            self.placeholder = '?'
+            # SQLite has no separate error class for a missing table
+            self.undefined_table = sqlite3.OperationalError
+            self.undefined_table_message = 'no such table'
+        else:
+            try:
+                import psycopg2
+                from psycopg2.errors import UndefinedTable
+            except ImportError:
+                sys.exit("psycopg2 is required to connect to PostgreSQL (pip install psycopg2), or use --sqlite")
+            self.conn = psycopg2.connect(dbname=dbname)
+            self.name = dbname
+            self.placeholder = '%s'
+            self.undefined_table = UndefinedTable
+            self.undefined_table_message = ''
+
+    def is_missing_table(self, error):
+        # True if error was raised because a table in the query does not exist
+        return isinstance(error, self.undefined_table) and self.undefined_table_message in str(error)
+
+    def query(self, sql, params=None, missing_ok=False):
+        # Returns all rows; parameters are marked with self.placeholder. With missing_ok, a
+        # query on a table that does not exist in this mine returns no rows instead of
+        # failing; any other error is raised
+        cursor = self.conn.cursor()
+        try:
+            if params is None:
+                cursor.execute(sql)
+            else:
+                cursor.execute(sql, params)
+            return cursor.fetchall()
+        except Exception as e:
+            # End the failed transaction so that the connection can still be used
+            self.conn.rollback()
+            if missing_ok and self.is_missing_table(e):
+                return []
+            raise
+        finally:
+            cursor.close()
+
+    def close(self):
+        self.conn.close()
+
+class OrganismLookup:
+    """
+    Organism ids by (lowercase) name, falling back to chromosome assembly, and organism
+    id and name by taxon id, loaded with two queries instead of one or two per organism.
+    """
+    def __init__(self, db):
+        self.by_name = dict()
+        self.by_taxon = dict()
+        for org_id, name, taxon_id in db.query("select id, name, taxonid from organism"):
+            if name is not None:
+                self.by_name[name.lower()] = org_id
+            if taxon_id is not None:
+                self.by_taxon[str(taxon_id)] = (org_id, name)
+        self.by_assembly = dict()
+        for assembly, org_id in db.query("select distinct assembly, organismid from chromosome where assembly is not null"):
+            self.by_assembly.setdefault(assembly, org_id)
+
+    def get_id(self, org_name, assembly):
+        org_id = self.by_name.get(org_name.lower())
+        if org_id is None:
+            org_id = self.by_assembly.get(assembly)
+        return org_id
+
+class Results:
+    def __init__(self):
+        self.all_counts_correct = True
+
+    def warn(self, msg):
+        print("WARNING: " + msg)
+        self.all_counts_correct = False
+
+def get_path_info(filename):
+    # assumes directory format is /db/<mine_dir>/datasets/<source>/<type>/<organism_name>/<assembly>/...
+    parts = filename.split(os.sep)
+    rest = parts[parts.index('datasets') + 1:]
+    return rest[2], rest[3]
+
+def get_gff_source(gff_files):
+    # Gene.source as given in column 2 of the last line of the gff file
+    with open(gff_files[0], 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 65536))
+        last_line = f.read().rstrip(b'\n').rsplit(b'\n', 1)[-1]
+    fields = last_line.decode('utf-8', 'replace').split('\t')
+    return fields[1] if len(fields) > 1 else ''
+
+def get_table_name(feature_type):
+    # five_prime_UTR -> FivePrimeUTR
+    return ''.join(part[:1].upper() + part[1:] for part in feature_type.split('_'))
+
+def count_by_dataset(db, table, where=''):
+    # Returns dict of (organismid, source) -> list of (dataset name, count)
+    counts = dict()
+    sql = ("select g.organismid, g.source, d.name, count(g.id) from %s g "
+           "join bioentitiesdatasets bed on bed.bioentities=g.id join dataset d on d.id=bed.datasets "
+           "%s group by g.organismid, g.source, d.name" % (table, where))
+    for org_id, source, dataset_name, count in db.query(sql, missing_ok=True):
+        counts.setdefault((org_id, source), []).append((dataset_name or '', count))
+    return counts
+
+def sum_datasets(counts, org_id, source, dataset_title_part):
+    return sum(count for dataset_name, count in counts.get((org_id, source), []) if dataset_title_part in dataset_name)
+
+def check_gff(db, organisms, datasets_glob, results):
+    print("Checking gff counts...")
+    print()
+    index = FeatureCountIndex(GFF_CACHE)
+
+    # All feature counts in one pass over sequencefeature
+    feature_counts = dict()
+    for org_id, source, class_name, so_name, count in db.query(
+            "select t.organismid, t.source, t.class, s.name, count(t.id) from sequencefeature t "
+            "join soterm s on s.id=t.sequenceontologytermid group by t.organismid, t.source, t.class, s.name"):
+        feature_counts[(org_id, source, class_name, so_name)] = count
+    gene_counts = count_by_dataset(db, 'gene', "join soterm s on s.id=g.sequenceontologytermid where s.name='gene'")
+    pseudogene_counts = dict()
+
+    for source, sourcedir, subdir, genesource in GFF_SOURCES:
+        print("Source: " + source)
+        print()
+        # Group files by directory: one organism/assembly (and gene set) per directory
+        gff_dirs = dict()
+        pattern = os.path.join(datasets_glob, sourcedir, 'annotations', '*', '*', subdir, '**', '*.gff3')
+        for gff_file in sorted(glob.glob(pattern, recursive=True)):
+            gff_dirs.setdefault(os.path.dirname(gff_file), []).append(gff_file)
+
+        for gff_dir, gff_files in sorted(gff_dirs.items()):
+            org_dir, assembly = get_path_info(gff_dir)
+            org_name = org_dir.replace('_', ' ')
+            dir_genesource = genesource or get_gff_source(gff_files)
+            print("Checking %s (%s) gff for %s (assembly: %s)..." % (source, dir_genesource, org_name, assembly))
+            org_id = organisms.get_id(org_name, assembly)
+            if org_id is None:
+                # If still can't find it, skip to next organism
+                print("WARNING: organism %s not in database!" % org_name)
+                print()
+                continue
+
+            expected = dict()
+            for gff_file in gff_files:
+                for feature_type, count in index.get_counts(gff_file).items():
+                    expected[feature_type] = expected.get(feature_type, 0) + count
+            if not expected:
+                print("WARNING: No classes found in %s!" % gff_dir)
+            else:
+                print(' '.join(sorted(expected)))
+
+            class_count_correct = True
+            for feature_type in sorted(expected):
+                if feature_type == 'gene':
+                    dataset_title_part = dir_genesource + " gene set"
+                    if source == 'OGS':
+                        dataset_title_part = "Gene Set (%s)" % dir_genesource
+                    dbcount = sum_datasets(gene_counts, org_id, dir_genesource, dataset_title_part)
+                elif feature_type.startswith('pseudo'):
+                    dataset_title_part = dir_genesource + " pseudogene"
+                    if source == 'RefSeq-pseudogenes-transcribed':
+                        dataset_title_part += " (transcribed)"
+                    elif source == 'RefSeq-pseudogenes-nottranscribed':
+                        dataset_title_part += " (not transcribed)"
+                    table = 'pseudogene'
+                    if feature_type.startswith('pseudogenic'):
+                        table = feature_type.replace('_', '').lower()
+                    if not re.match(r'^\w+$', table):
+                        dbcount = 0
+                    else:
+                        if table not in pseudogene_counts:
+                            pseudogene_counts[table] = count_by_dataset(db, table)
+                        dbcount = sum_datasets(pseudogene_counts[table], org_id, dir_genesource, dataset_title_part)
+                else:
+                    class_name = CLASS_PREFIX + get_table_name(feature_type)
+                    dbcount = feature_counts.get((org_id, dir_genesource, class_name, feature_type), 0)
+                if dbcount != expected[feature_type]:
+                    results.warn("%d %ss in database, but %d in input file!" % (dbcount, feature_type, expected[feature_type]))
+                    class_count_correct = False
+            if class_count_correct:
+                print("Counts correct for all class names")
+            print()
+    index.save()
+
+def check_fasta(db, organisms, datasets_glob, results, table, label, fasta_dir_pattern):
+    print("Checking %s counts..." % label)
+    db_counts = dict(((org_id, source), count) for org_id, source, count in
+                     db.query("select organismid, source, count(id) from %s group by organismid, source" % table))
+    fasta_files = dict()
+    for source in FASTA_SOURCES:
+        pattern = os.path.join(datasets_glob, source, fasta_dir_pattern, '**', '*.fa')
+        fasta_files[source] = sorted(glob.glob(pattern, recursive=True))
+    # Count all files at once (in parallel; unchanged files come from the cache)
+    cache = FastaCountCache(FASTA_CACHE)
+    file_counts = cache.get_counts([f for source in FASTA_SOURCES for f in fasta_files[source]])
+    cache.save()
+
+    for source in FASTA_SOURCES:
+        source_dirs = glob.glob(os.path.join(datasets_glob, source))
+        if not source_dirs:
+            continue
+        print("Source: %s..." % source)
+        for fasta_file in fasta_files[source]:
+            org_dir, assembly = get_path_info(fasta_file)
+            org_name = org_dir.replace('_', ' ')
+            genesource = source
+            # Special case for MaizeGDB: Gene.source is not the same as the folder name
+            if source == 'MaizeGDB':
+                gff_files = sorted(glob.glob(os.path.join(datasets_glob, 'MaizeGDB', 'annotations', 'zea_mays', assembly, '*.gff3')))
+                if gff_files:
+                    genesource = get_gff_source(gff_files)
+
+            print("Checking %s (%s) %ss for %s (assembly: %s)..." % (source, genesource, label, org_name, assembly))
+            org_id = organisms.get_id(org_name, assembly)
+            if org_id is None:
+                # If still can't find it, skip to next organism
+                print("WARNING: organism %s not in database!" % org_name)
+                continue
+            dbcount = db_counts.get((org_id, genesource), 0)
+            filecount = file_counts[fasta_file]['records']
+            if file_counts[fasta_file]['duplicate_ids']:
+                print("WARNING: %d duplicate header ids in %s (e.g., %s)" % (file_counts[fasta_file]['duplicate_ids'],
+                      fasta_file, ', '.join(file_counts[fasta_file]['duplicate_examples'])))
+            if dbcount == filecount:
+                print("%s count correct (%d)" % (label, filecount))
+            else:
+                results.warn("database has %d %ss but fasta file has %d!" % (dbcount, label, filecount))
+        print()
+    print()
+
+def check_cds_protein(db, organisms, datasets_glob, results):
+    check_fasta(db, organisms, datasets_glob, results, 'codingsequence', 'CodingSequence', 'cds_fasta')
+    check_fasta(db, organisms, datasets_glob, results, 'polypeptide', 'Polypeptide', 'protein_fasta*')
+
+def get_dataset_id(db, dataset_name):
+    rows = db.query("select id from dataset where name=%s" % db.placeholder, (dataset_name,))
+    return rows[0][0] if rows else None
+
+def get_dirs(pattern):
+    # Returns sorted distinct basenames of the directories matching pattern
+    return sorted(set(os.path.basename(path) for path in glob.glob(pattern) if os.path.isdir(path)))
+
+def read_lines(filenames):
+    for filename in filenames:
+        with open(filename, 'r', errors='replace') as f:
+            for line in f:
+                yield line.rstrip('\n')
+
+def count_by_key(db, sql, params=None, missing_ok=False):
+    # Returns dict of first column -> remaining columns (a single value if only one)
+    counts = dict()
+    for row in db.query(sql, params, missing_ok):
+        counts[row[0]] = row[1] if len(row) == 2 else tuple(row[1:])
+    return counts
+
+def count_by_taxon_id(db, sql, params=None):
+    # count_by_key for queries whose first column is o.taxonid. Taxon ids are always
+    # compared as strings: the column is text in some mines and an integer in others
+    return dict((str(taxon_id), counts) for taxon_id, counts in count_by_key(db, sql, params).items())
+
+# Gene collection queries per collection type (pathway or reaction), all organisms at once:
+# number of items per taxon id, and number of gene-item pairs and distinct genes per taxon id
+GENE_COLLECTION_QUERIES = {
+    'pathway': (
+        "select o.taxonid, count(p.id) from pathway p join organism o on o.id=p.organismid "
+        "join datasetspathway dp on dp.pathway=p.id where dp.datasets=%s group by o.taxonid",
+        "select o.taxonid, count(p.identifier), count(distinct(g.primaryidentifier)) from gene g "
+        "join organism o on o.id=g.organismid join genespathways gp on gp.genes=g.id join pathway p on p.id=gp.pathways "
+        "join datasetspathway dp on dp.pathway=p.id where dp.datasets=%s group by o.taxonid"),
+    'reaction': (
+        "select o.taxonid, count(distinct(r.id)) from reaction r join genesreactions gr on gr.reactions=r.id "
+        "join gene g on gr.genes=g.id join organism o on o.id=g.organismid "
+        "join datasetsreaction dr on dr.reaction=r.id where dr.datasets=%s group by o.taxonid",
+        "select o.taxonid, count(r.identifier), count(distinct(g.primaryidentifier)) from gene g "
+        "join organism o on o.id=g.organismid join genesreactions gr on gr.genes=g.id join reaction r on r.id=gr.reactions "
+        "join datasetsreaction dr on dr.reaction=r.id where dr.datasets=%s group by o.taxonid"),
+}
+
+def check_gene_collection(db, results, dataset_name, collection, entries):
+    # entries: list of (title, taxon id, gene map file, expected) where expected has the
+    # number of items, gene-item pairs and genes in the file, and optionally the number of
+    # items for the taxon id in map_title.tab
+    dataset_id = get_dataset_id(db, dataset_name)
+    if dataset_id is None:
+        results.warn("Data set '%s' not in database!" % dataset_name)
+        return
+    items_sql, pairs_sql = GENE_COLLECTION_QUERIES[collection]
+    item_counts = count_by_taxon_id(db, items_sql % db.placeholder, (dataset_id,))
+    pair_counts = count_by_taxon_id(db, pairs_sql % db.placeholder, (dataset_id,))
+
+    for title, taxon_id, gene_map_file, expected in entries:
+        print(title)
+        name = os.path.basename(gene_map_file)
+        if 'map_title' in expected and expected['map_title'] != expected['items']:
+            # Counts from map_title.tab and the gene map file should agree
+            results.warn("%d %ss in map_title.tab, but %d %ss in %s!" % (expected['map_title'], collection,
+                         expected['items'], collection, name))
+        dbcount = item_counts.get(taxon_id, 0)
+        if dbcount != expected['items']:
+            results.warn("%d %ss in %s, but %d %ss in database!" % (expected['items'], collection, name, dbcount, collection))
+        else:
+            print("%s count correct (%d %ss)" % (collection.capitalize(), dbcount, collection))
+
+        # From the gene.pathways (or gene.reactions) collection
+        db_pairs, db_genes = pair_counts.get(taxon_id, (0, 0))
+        if db_pairs != expected['pairs']:
+            results.warn("%d genes and %ss in %s, but %d in database!" % (expected['pairs'], collection, name, db_pairs))
+        else:
+            print("Genes and %ss count correct (%d total)" % (collection, db_pairs))
+        if db_genes != expected['genes']:
+            results.warn("%d genes in %s, but %d in database!" % (expected['genes'], name, db_genes))
+        else:
+            print("Genes count correct (%d total)" % db_genes)
+        print(SECTION_DIVIDE)
+
+def count_map_title(datasets_glob, sourcedir, taxon_id):
+    # Number of lines in map_title.tab that contain the taxon id
+    map_title_files = glob.glob(os.path.join(datasets_glob, sourcedir, 'map_title.tab'))
+    return sum(1 for line in read_lines(map_title_files) if taxon_id in line)
+
+def check_kegg(db, organisms, datasets_glob, results):
+    print("Checking KEGG genes and pathways...")
+    print()
+    map_title_lines = list(read_lines(glob.glob(os.path.join(datasets_glob, 'KEGG_genes', 'map_title.tab'))))
+    entries = []
+    for gene_map_file in sorted(glob.glob(os.path.join(datasets_glob, 'KEGG_genes', '*map.tab'))):
+        # Organism abbreviation from the file name, e.g. hsa_gene_map.tab, and taxon id
+        # from the first map_title.tab line with a pathway for it, e.g. hsa00010
+        m = re.search(r'\w+_gene_map', gene_map_file)
+        abbr = m.group(0).split('_')[0] if m else ''
+        pathway_regex = re.compile(re.escape(abbr) + '[0-9]+')
+        taxon_id = ''
+        for line in map_title_lines:
+            if pathway_regex.search(line):
+                taxon_id = line.split('\t')[0]
+                break
+        with open(gene_map_file, 'r', errors='replace') as f:
+            text = f.read()
+        expected = dict(items=len(set(pathway_regex.findall(text))), pairs=text.count(abbr), genes=text.count('\n'),
+                        map_title=sum(1 for line in map_title_lines if taxon_id in line))
+        title = "Checking KEGG genes and pathways for organism with taxon id %s and abbreviation %s" % (taxon_id, abbr)
+        entries.append((title, taxon_id, gene_map_file, expected))
+    check_gene_collection(db, results, "KEGG pathways data set", 'pathway', entries)
+    print()
+
+def check_reactome_gramene(db, organisms, datasets_glob, results):
+    print("Checking Reactome Gramene genes and pathways...")
+    print()
+    taxon_id = '4577'
+    entries = []
+    for gene_map_file in sorted(glob.glob(os.path.join(datasets_glob, 'reactome_gramene', '*map.tab'))):
+        with open(gene_map_file, 'r', errors='replace') as f:
+            text = f.read()
+        expected = dict(items=len(set(re.findall(r'R-ZMY-[0-9.\-]+', text))), pairs=text.count('R-ZMY'),
+                        genes=text.count('\n'), map_title=count_map_title(datasets_glob, 'reactome_gramene', taxon_id))
+        title = "Checking Reactome Gramene genes and pathways for organism with taxon id %s" % taxon_id
+        entries.append((title, taxon_id, gene_map_file, expected))
+    check_gene_collection(db, results, "Reactome Gramene data set", 'pathway', entries)
+    print()
+
+def count_column_2_items(filename):
+    # Items (pathways, reactions) are listed in column 2, separated by spaces; returns
+    # number of distinct items, number of gene-item pairs and number of lines
+    items = set()
+    pairs = 0
+    lines = 0
+    for line in read_lines([filename]):
+        fields = line.split('\t')
+        line_items = (fields[1] if len(fields) > 1 else fields[0]).split()
+        items.update(line_items)
+        pairs += len(line_items)
+        lines += 1
+    return dict(items=len(items), pairs=pairs, genes=lines)
+
+def check_e2p2_pathway(db, organisms, datasets_glob, results):
+    print("Checking E2P2 genes and pathways...")
+    print()
+    taxon_id = '4577'
+    entries = []
+    for gene_map_file in sorted(glob.glob(os.path.join(datasets_glob, 'MaizeGDB-E2P2-Pathway', '*map.tab'))):
+        expected = count_column_2_items(gene_map_file)
+        expected['map_title'] = count_map_title(datasets_glob, 'MaizeGDB-E2P2-Pathway', taxon_id)
+        title = "Checking E2P2 genes and pathways for organism with taxon id %s" % taxon_id
+        entries.append((title, taxon_id, gene_map_file, expected))
+    check_gene_collection(db, results, "MaizeGDB E2P2 pathways data set", 'pathway', entries)
+    print()
+
+def check_gpluse_reactions(db, organisms, datasets_glob, results):
+    print("Checking GplusE genes and reactions...")
+    print()
+    entries = []
+    for reaction_file in sorted(glob.glob(os.path.join(datasets_glob, 'GPLUSE', 'reactions', '*reactions.tab'))):
+        # Taxon id from the file name, e.g. 9913_reactions.tab
+        m = re.search(r'\w+_reactions', reaction_file)
+        taxon_id = m.group(0).split('_')[0] if m else ''
+        title = "Checking GplusE genes and reactions for organism with taxon id %s" % taxon_id
+        entries.append((title, taxon_id, reaction_file, count_column_2_items(reaction_file)))
+    check_gene_collection(db, results, "GplusE reactions data set", 'reaction', entries)
+    print()
+
+def get_project_xml_values(datasets_glob, property_name):
+    # Space-separated values of a source property in project.xml
+    values = []
+    project_xml_files = glob.glob(os.path.join(os.path.dirname(datasets_glob), 'intermine', '*', 'project.xml'))
+    for line in read_lines(sorted(project_xml_files)):
+        if property_name in line:
+            m = re.search(r'value="([^"]*)"', line)
+            if m:
+                values.extend(m.group(1).split())
+    return values
+
+def check_reactome(db, organisms, datasets_glob, results):
+    print("Checking Reactome pathways...")
+    print()
+    dataset_name = "Reactome pathways data set"
+    dataset_id = get_dataset_id(db, dataset_name)
+    if dataset_id is None:
+        results.warn("Data set '%s' not in database!" % dataset_name)
+        return
+    db_counts = count_by_key(db, "select p.organismid, count(*) from pathway p join datasetspathway dp on dp.pathway=p.id "
+                             "where dp.datasets=%s group by p.organismid" % db.placeholder, (dataset_id,))
+
+    # Organisms from project.xml, with the names to search for in the data files: the
+    # organism name, or if none are found, its first and last words (names in the file
+    # are sometimes slightly different)
+    orgs = []
+    for taxon_id in get_project_xml_values(datasets_glob, 'reactome.organisms'):
+        org_id, name = organisms.by_taxon.get(taxon_id, (None, None))
+        if org_id is None or not name:
+            results.warn("organism with taxon id %s not in database!" % taxon_id)
+            continue
+        name_parts = name.split(' ')
+        short_name = ' '.join([name_parts[0], name_parts[-1]]) if len(name_parts) > 2 else None
+        orgs.append((taxon_id, org_id, name, short_name))
+
+    # Distinct pathways (column 2) on lines with "<TAB><name>", for all names in one pass
+    pathways = dict()
+    for taxon_id, org_id, name, short_name in orgs:
+        pathways[name] = set()
+        if short_name:
+            pathways[short_name] = set()
+    for line in read_lines(sorted(glob.glob(os.path.join(datasets_glob, 'Reactome', '*.txt')))):
+        for name in pathways:
+            if '\t' + name in line:
+                fields = line.split('\t')
+                pathways[name].add(fields[1] if len(fields) > 1 else fields[0])
+
+    for taxon_id, org_id, name, short_name in orgs:
+        print("Checking pathways for organism: %s with taxon id %s" % (name, taxon_id))
+        filecount = len(pathways[name])
+        if filecount == 0 and short_name:
+            print("None found in file, searching on %s instead" % short_name)
+            filecount = len(pathways[short_name])
+        dbcount = db_counts.get(org_id, 0)
+        if filecount != dbcount:
+            results.warn("%d pathways in Reactome data file, but %d in database!" % (filecount, dbcount))
+        else:
+            print("Pathways count correct (%d pathways)" % dbcount)
+    print()
+
+def check_uniprot(db, organisms, datasets_glob, results):
+    print("Checking UniProt proteins...")
+    print()
+    subsets = [('Swiss-Prot', 'Swiss-Prot data set', '*uniprot*sprot.xml'), ('TrEMBL', 'TrEMBL data set', '*uniprot*trembl.xml')]
+    files = dict()
+    for label, dataset_name, file_pattern in subsets:
+        files[label] = sorted(f for f in glob.glob(os.path.join(datasets_glob, '*ni*rot', file_pattern)) if os.path.isfile(f))
+    # Count proteins in all Swiss-Prot and TrEMBL files at once (files are read in parallel)
+    all_files = [f for label, dataset_name, file_pattern in subsets for f in files[label]]
+    file_counts = dict()
+    if all_files:
+        with ProcessPoolExecutor(max_workers=max(1, min(os.cpu_count(), len(all_files)))) as executor:
+            for counts in executor.map(count_uniprot_file, all_files):
+                file_counts[counts['file']] = counts
+
+    db_counts = dict(((dataset_name, str(taxon_id)), count) for dataset_name, taxon_id, count in db.query(
+        "select d.name, o.taxonid, count(p.id) from protein p join organism o on o.id=p.organismid "
+        "join bioentitiesdatasets bed on bed.bioentities=p.id join dataset d on d.id=bed.datasets "
+        "where d.name in (%s, %s) group by d.name, o.taxonid" % (db.placeholder, db.placeholder),
+        [dataset_name for label, dataset_name, file_pattern in subsets]))
+    for label, dataset_name, file_pattern in subsets:
+        if files[label] and get_dataset_id(db, dataset_name) is None:
+            results.warn("Data set '%s' not in database!" % dataset_name)
+            continue
+        for filename in files[label]:
+            taxon_id = file_counts[filename]['taxon_id']
+            print("Checking UniProt (%s) proteins for organism with taxon id %s" % (label, taxon_id))
+            # One protein per entry sequence plus one per isoform
+            file_count = file_counts[filename]['proteins']
+            dbcount = db_counts.get((dataset_name, taxon_id), 0)
+            if file_count != dbcount:
+                results.warn("%d proteins in %s, but %d proteins in database!" % (file_count, filename, dbcount))
+            else:
+                print("Protein count correct (%d proteins)" % dbcount)
+        print()
+
+def check_xref(db, organisms, datasets_glob, results):
+    print("Checking xrefs...")
+    print()
+    # Xrefs with and without a target (the latter are not from the xrefs source) per organism
+    db_counts = count_by_key(db, "select g.organismid, count(c.targetid), count(*) - count(c.targetid) "
+                             "from crossreference c join gene g on g.id=c.subjectid group by g.organismid")
+    for org in get_dirs(os.path.join(datasets_glob, 'xref', 'gene', '*')):
+        org_name = org.replace('_', ' ')
+        print("Checking xrefs for " + org_name)
+        org_id = organisms.by_name.get(org_name.lower())
+        if org_id is None:
+            print("WARNING: organism %s not in database!" % org_name)
+            print()
+            continue
+        xref_files = [f for f in glob.glob(os.path.join(datasets_glob, 'xref', 'gene', org, '*', '*')) if os.path.isfile(f)]
+        file_count = sum(1 for line in read_lines(xref_files))
+        dbcount, other_count = db_counts.get(org_id, (0, 0))
+        if dbcount != file_count:
+            results.warn("%d xrefs in database, but %d in input file!" % (dbcount, file_count))
+        else:
+            print("Counts correct (%d xrefs)" % dbcount)
+        if other_count:
+            print("NOTE: %d xrefs in database not from xrefs source for this organism" % other_count)
+    print()
+
+def check_custom_gene_info(db, organisms, datasets_glob, results):
+    print("Checking custom gene info gene IDs...")
+    print()
+    sources = get_dirs(os.path.join(datasets_glob, 'custom-gene-info', '*'))
+    if not sources:
+        results.warn("Custom gene info dataset does not exist")
+        return
+    # Assumes data set name is of the form "<source> genes for <species>" or similar
+    db_counts = dict(((str(taxon_id), source), count) for taxon_id, source, count in db.query(
+        "select o.taxonid, g.source, count(g.id) from gene g join organism o on o.id=g.organismid "
+        "join bioentitiesdatasets bed on bed.bioentities=g.id join dataset d on d.id=bed.datasets "
+        "where d.name like %s group by o.taxonid, g.source" % db.placeholder, ('%genes for%',)))
+
+    checks = []
+    for source in sources:
+        pattern = os.path.join(datasets_glob, 'custom-gene-info', source, '**', '*.tab')
+        for filename in sorted(glob.glob(pattern, recursive=True)):
+            if '/old/' in filename:
+                continue
+            m = re.search(r'[0-9]{4,}', filename)
+            lines = list(read_lines([filename]))
+            # Spot check symbol and description for the first gene
+            first = (lines[0].split('\t') + [''] * 4)[:4] if lines else [''] * 4
+            checks.append((source, m.group(0) if m else '', len(lines), first))
+    # Symbol and description of all representative genes in one query
+    gene_ids = sorted(set(first[0] for source, taxon_id, file_count, first in checks))
+    genes = dict()
+    if gene_ids:
+        for gene_id, symbol, description in db.query(
+                "select primaryidentifier, symbol, description from gene where primaryidentifier in (%s)"
+                % ', '.join([db.placeholder] * len(gene_ids)), gene_ids):
+            genes.setdefault(gene_id, (symbol or '', description or ''))
+
+    for source in sources:
+        print("Source: " + source)
+        for check_source, taxon_id, file_count, first in checks:
+            if check_source != source:
+                continue
+            print("Checking gene counts for organism with taxon ID %s..." % taxon_id)
+            dbcount = db_counts.get((taxon_id, source), 0)
+            if file_count == dbcount:
+                print("Gene count correct (%d genes)" % dbcount)
+            else:
+                results.warn("database has %d %s genes with taxon ID %s, but input file has %d!" % (dbcount, source, taxon_id, file_count))
+            gene_id, name, symbol, description = first
+            print("Checking representative gene %s symbol and description fields..." % gene_id)
+            dbsymbol, dbdesc = genes.get(gene_id, ('', ''))
+            if symbol != dbsymbol:
+                print("WARNING: symbol %s not set in database!" % symbol)
+            if description != dbdesc:
+                print("WARNING: description %s not set in database!" % description)
+        print()
+
+def check_gene_expression(db, organisms, datasets_glob, results):
+    print("Checking gene expression counts...")
+    print()
+    dataset_name = "Gene RNASeq expression data set"
+    dataset_id = get_dataset_id(db, dataset_name)
+    if dataset_id is None:
+        results.warn("Data set '%s' not in database!" % dataset_name)
+        return
+    gene_counts = dict(((org_id, source), count) for org_id, source, count in db.query(
+        "select g.organismid, g.source, count(g.id) from gene g join bioentitiesdatasets bed on bed.bioentities=g.id "
+        "where bed.datasets=%s group by g.organismid, g.source" % db.placeholder, (dataset_id,)))
+    expression_counts = dict(((org_id, source), (experiments, expressions)) for org_id, source, experiments, expressions in db.query(
+        "select g.organismid, g.source, count(distinct(e.experiment)), count(e.id) from expression e join gene g on g.id=e.geneid "
+        "join bioentitiesdatasets bed on bed.bioentities=g.id where bed.datasets=%s group by g.organismid, g.source"
+        % db.placeholder, (dataset_id,)))
+
+    data_dir = os.path.join(datasets_glob, 'gene_expression')
+    for org in get_dirs(os.path.join(data_dir, '*')):
+        org_name = org.replace('_', ' ')
+        org_id = organisms.by_name.get(org_name.lower())
+        if org_id is None:
+            print("WARNING: organism %s not in database!" % org_name)
+            print()
+            continue
+        for genesource in get_dirs(os.path.join(data_dir, org, '*')):
+            # Header row begins with "Gene"; the other header columns are experiment ids
+            gene_ids = set()
+            experiments = set()
+            empty_cell_count = 0
+            for filename in sorted(glob.glob(os.path.join(data_dir, org, genesource, '*.tab'))):
+                with open(filename, 'r', errors='replace') as f:
+                    for line_num, line in enumerate(f):
+                        line = line.rstrip('\n')
+                        if line_num == 0:
+                            experiments.update(field for field in line.split('\t') if 'Gene' not in field)
+                        if 'Gene' not in line:
+                            gene_ids.add(line.split('\t', 1)[0])
+                        # Cells with no value ("-") don't result in an expression item
+                        empty_cell_count += line.count('-')
+
+            gene_dbcount = gene_counts.get((org_id, genesource), 0)
+            if gene_dbcount != len(gene_ids):
+                results.warn("%d %s genes for %s in database, but %d in input files!" % (gene_dbcount, genesource, org_name, len(gene_ids)))
+            else:
+                print("Gene count correct for %s %s genes (%d genes)" % (genesource, org_name, gene_dbcount))
+
+            exp_dbcount, dbcount = expression_counts.get((org_id, genesource), (0, 0))
+            if exp_dbcount != len(experiments):
+                results.warn("%d experiment ids for %s %s genes in database, but %d in input files!" % (exp_dbcount, org_name, genesource, len(experiments)))
+            else:
+                print("Experiment count correct for %s %s genes (%d experiments)" % (genesource, org_name, exp_dbcount))
+
+            filecount = len(gene_ids) * len(experiments)
+            if dbcount != filecount:
+                print("Checking for possible empty expression cells...")
+                filecount -= empty_cell_count
+            if dbcount != filecount:
+                results.warn("%d expressions for %s %s genes in database, but %d in input files!" % (dbcount, genesource, org_name, filecount))
+            else:
+                print("Expression count correct for %s %s genes (%d expressions)" % (genesource, org_name, dbcount))
+    print()
+
+# Lines that count as homologues in Ensembl Compara files (as in ensembl_compara_count.sh)
+ENSEMBL_COMPARA_LINE_REGEX = re.compile('[ortholog|paralog]')
+
+def check_ensembl_compara(db, organisms, datasets_glob, results):
+    print("Checking Ensembl Compara homologues...")
+    print()
+    subdir = 'EnsemblCompara'
+    if not get_dirs(os.path.join(datasets_glob, subdir)):
+        # Check for biomart
+        subdir = os.path.join('ensembl-plant-biomart', 'homologues')
+    files = sorted(f for f in glob.glob(os.path.join(datasets_glob, subdir, '*')) if os.path.isfile(f))
+    if not files:
+        results.warn("Ensembl Compara data set does not exist")
+        return
+    dataset_name = "Ensembl Compara data set"
+    dataset_id = get_dataset_id(db, dataset_name)
+    if dataset_id is None:
+        results.warn("Data set '%s' not in database!" % dataset_name)
+        return
+    db_counts = count_by_taxon_id(db, "select o.taxonid, count(h.id) from homologue h join datasetshomologue dh on dh.homologue=h.id "
+                                  "join gene g on g.id=h.geneid join organism o on o.id=g.organismid "
+                                  "where dh.datasets=%s group by o.taxonid" % db.placeholder, (dataset_id,))
+
+    # Files are named <taxon id>_<taxon id>...; each file is counted once
+    file_counts = dict()
+    taxon_ids = set()
+    for filename in files:
+        taxon_ids.update(taxon_id for taxon_id in os.path.basename(filename).split('_')[:2] if taxon_id)
+        file_counts[filename] = sum(1 for line in read_lines([filename]) if ENSEMBL_COMPARA_LINE_REGEX.search(line))
+    for taxon_id in sorted(taxon_ids):
+        # Homologues for this organism are in the files whose name starts with its taxon id
+        file_count = sum(count for filename, count in file_counts.items() if os.path.basename(filename).startswith(taxon_id))
+        dbcount = db_counts.get(taxon_id, 0)
+        if dbcount == file_count:
+            print("Homologue count correct for organism with taxon id %s (%d homologues)" % (taxon_id, file_count))
+        else:
+            results.warn("database has %d homologues for organism with taxon id %s, files have %d homologues!" % (dbcount, taxon_id, file_count))
+    print()
+
+def check_qtl_gff(db, organisms, datasets_glob, results):
+    print("Checking QTL gff counts...")
+    print()
+    db_counts = count_by_key(db, "select organismid, count(id) from qtl group by organismid")
+    for org in get_dirs(os.path.join(datasets_glob, 'QTL', '*')):
+        org_name = org.replace('_', ' ')
+        for assembly in get_dirs(os.path.join(datasets_glob, 'QTL', org, '*')):
+            print("Checking gff for %s (assembly: %s)..." % (org_name.capitalize(), assembly))
+            org_id = organisms.get_id(org_name, assembly)
+            if org_id is None:
+                print("WARNING: organism %s not in database!" % org_name)
+                continue
+            gff_files = sorted(glob.glob(os.path.join(datasets_glob, 'QTL', org, assembly, '*.gff3')))
+            filecount = sum(1 for line in read_lines(gff_files) if '#' not in line)
+            dbcount = db_counts.get(org_id, 0)
+            if dbcount != filecount:
+                results.warn("%d QTLs in database, but %d in input file!" % (dbcount, filecount))
+            else:
+                print("QTL count correct")
+        print()
+
+def count_gff_types(gff_files):
+    # Column 3 counts over lines without '#'
+    counts = dict()
+    for line in read_lines(gff_files):
+        if '#' in line:
+            continue
+        fields = line.split('\t')
+        feature_type = fields[2] if len(fields) > 2 else ''
+        counts[feature_type] = counts.get(feature_type, 0) + 1
+    return counts
+
+def check_faang_gff(db, organisms, datasets_glob, results):
+    print("Checking FAANG gff counts...")
+    print()
+    data_dir = os.path.join(datasets_glob, 'FAANG-gff')
+    table_counts = dict()
+    for org in get_dirs(os.path.join(data_dir, '*')):
+        if org.startswith('old'):
+            continue
+        org_name = org.replace('_', ' ')
+        for assembly in get_dirs(os.path.join(data_dir, org, '*')):
+            print("Checking gff for %s (assembly: %s)..." % (org_name.capitalize(), assembly))
+            org_id = organisms.get_id(org_name, assembly)
+            if org_id is None:
+                print("WARNING: organism %s not in database!" % org_name)
+                continue
+            # Class names from this organism's files; counts from all files for the assembly
+            classes = sorted(count_gff_types(glob.glob(os.path.join(data_dir, org, assembly, '*.gff3'))))
+            assembly_counts = count_gff_types(sorted(glob.glob(os.path.join(data_dir, '*', assembly, '*.gff3'))))
+            print(' '.join(classes))
+            class_count_correct = True
+            for feature_type in classes:
+                table = get_table_name(feature_type)
+                if not re.match(r'^\w+$', table):
+                    dbcount = 0
+                else:
+                    # One query per class for all organisms
+                    if table not in table_counts:
+                        table_counts[table] = count_by_key(db, "select organismid, count(id) from %s where class=%s group by organismid"
+                                                           % (table, db.placeholder), (CLASS_PREFIX + table,), missing_ok=True)
+                    dbcount = table_counts[table].get(org_id, 0)
+                filecount = sum(count for name, count in assembly_counts.items() if name.startswith(feature_type))
+                if dbcount != filecount:
+                    results.warn("%d %ss in database, but %d in input file!" % (dbcount, feature_type, filecount))
+                    class_count_correct = False
+            if class_count_correct:
+                print("Counts correct for all class names")
+        print()
+
+def check_chromosomes(db, organisms, datasets_glob, results):
+    print("Checking chromosome counts...")
+    print()
+    db_counts = count_by_key(db, "select assembly, count(id) from chromosome group by assembly")
+    fasta_files = sorted(glob.glob(os.path.join(datasets_glob, 'genome', '**', '*.fa'), recursive=True))
+    cache = FastaCountCache(FASTA_CACHE)
+    file_counts = cache.get_counts(fasta_files)
+    cache.save()
+    for fasta_file in fasta_files:
+        # assumes directory format is /db/<mine_dir>/datasets/genome/<organism_name>/<assembly>/*.fa
+        parts = fasta_file.split(os.sep)
+        rest = parts[parts.index('datasets') + 1:]
+        org_dir, assembly = rest[1], rest[2]
+        print("Checking chromosomes for %s (assembly: %s)..." % (org_dir.replace('_', ' '), assembly))
+        dbcount = db_counts.get(assembly, 0)
+        filecount = file_counts[fasta_file]['records']
+        if dbcount == filecount:
+            print("Chromosome count correct (%d)" % filecount)
+        else:
+            results.warn("database has %d chromosomes but fasta file has %d chromosomes!" % (dbcount, filecount))
+        print()
+
+CHECKS = {
+    'gff': check_gff,
+    'cds-protein': check_cds_protein,
+    'chromosome': check_chromosomes,
+    'kegg': check_kegg,
+    'reactome': check_reactome,
+    'reactome-gramene': check_reactome_gramene,
+    'e2p2-pathway': check_e2p2_pathway,
+    'gpluse-reactions': check_gpluse_reactions,
+    'uniprot': check_uniprot,
+    'xref': check_xref,
+    'custom-gene-info': check_custom_gene_info,
+    'gene-expression': check_gene_expression,
+    'ensembl-compara': check_ensembl_compara,
+    'qtl-gff': check_qtl_gff,
+    'faang-gff': check_faang_gff,
+}
+# Run when no checks are given
+DEFAULT_CHECKS = ['gff', 'cds-protein']
+# Checks that look up organisms by name, so need entrez-organism loaded first
+NEEDS_ORGANISM_NAMES = ['gff', 'cds-protein', 'reactome', 'xref', 'qtl-gff']
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Verify loaded entity counts against input files using one database connection.')
+    parser.add_argument('checks', nargs='*', help='checks to run: %s (default: %s)' % (', '.join(CHECKS), ' '.join(DEFAULT_CHECKS)))
+    parser.add_argument('--dbname', help='PostgreSQL database name (default: from ~/.intermine/*.properties)')
+    parser.add_argument('--sqlite', help='SQLite database file to use instead of PostgreSQL')
+    parser.add_argument('--datasets', default=DATASETS_GLOB, help='datasets directory glob (default: %(default)s)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    for check in args.checks:
+        if check not in CHECKS:
+            sys.exit("Unknown check: %s (choose from %s)" % (check, ', '.join(CHECKS)))
+    dbname = args.dbname or get_dbname()
+    if not args.sqlite and not dbname:
+        sys.exit("Database name not found in " + PROPERTIES_GLOB)
+    db = Database(dbname, args.sqlite)
+    print("Database name is " + db.name)
+    print()
+    start_time = time.time()
+    checks = args.checks or DEFAULT_CHECKS
+
+    # Requires that entrez-organism loaded first
+    nullcount = db.query("select count(*) from organism where name is null")[0][0]
+    if nullcount > 0 and any(check in NEEDS_ORGANISM_NAMES for check in checks):
+        print("Entrez-organism source needs to be loaded before running this test!")
+        # Exit early, nothing to do
+        sys.exit(1)
+
+    organisms = OrganismLookup(db)
+    results = Results()
+    for check in checks:
+        CHECKS[check](db, organisms, args.datasets, results)
+    db.close()
+
+    print()
+    print("SUMMARY:")
+    if results.all_counts_correct:
+        print("All counts were correct.")
+    else:
+        print("Some counts were incorrect!")
+    print("(%.1f sec)" % (time.time() - start_time))
+    print()
+    sys.exit(0 if results.all_counts_correct else 1)
+
+if __name__ == "__main__":
+    main()
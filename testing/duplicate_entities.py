@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+"""
+Check database for duplicates (genes, proteins, etc.) and for null entries
+
+Replaces the correlated-subquery checks in duplicate_entities.sh. Each check is a single
+set-based query per table:
+    nulls       one scan per table counting nulls in all the checked fields
+    duplicates  GROUP BY identifier, organism (and assembly for chromosomes) HAVING count > 1
+The tables are checked concurrently, one database connection per thread. All duplicate
+identifiers are listed with their counts, and each query is timed so that slow tables
+stand out. A table that does not exist in this mine is reported as skipped; any other
+query error is reported and makes the script exit with status 1.
+
+Usage:
+    $ ./duplicate_entities.py [--dbname NAME | --sqlite FILE] [--jobs N]
+The database name defaults to db.production.datasource.databaseName in
+~/.intermine/*.properties. Exits with status 1 if any nulls or duplicates are found, or
+if a query fails.
+"""
+import sys, time, threading, argparse
+from concurrent.futures import ThreadPoolExecutor
+from db_verify import Database, get_dbname, PROPERTIES_GLOB
+
+SECTION_DIVIDE = '-' * 64
+
+# (section title, table, fields that should not be null, identifier field and fields that
+# must also be equal for a duplicate, or None to skip the duplicate check)
+SECTIONS = [
+    # includes genes, chromosomes, etc.
+    ('Sequence features', 'sequencefeature', ['primaryidentifier', 'organismid'], None),
+    ('Chromosomes', 'chromosome', ['secondaryidentifier', 'tertiaryidentifier', 'name', 'assembly'],
+        ('primaryidentifier', ['organismid', 'assembly'])),
+    ('Genes', 'gene', [], ('primaryidentifier', ['organismid'])),
+    ('Pseudogenes', 'pseudogene', [], ('primaryidentifier', ['organismid'])),
+    ('mRNAs', 'mrna', ['primaryidentifier', 'organismid'], ('primaryidentifier', ['organismid'])),
+    ('Coding sequences', 'codingsequence', ['proteinidentifier'], None),
+    ('Polypeptides', 'polypeptide', [], ('primaryidentifier', ['organismid'])),
+    # not a sequencefeature; md5checksum is null for empty sequences. Duplicates not
+    # checked because there are almost always a few
+    ('Proteins', 'protein', ['primaryaccession', 'organismid', 'md5checksum'], None),
+]
+
+# Sometimes species and sub-species are both included when it should be one or the other:
+# two different species of the same genus where one is contained in the other
+ORGANISM_QUERY = ("select o1.name from organism o1 join organism o2 on o2.genus=o1.genus "
+                  "and o2.species like '%' || o1.species || '%' "
+                  "group by o1.id, o1.name having count(*) > 1 order by o1.name")
+
+# Merging is case-sensitive so check for duplicates ignoring case (e.g., "uniprot" and
+# "UniProt" would be different rows in table, but really should be one)
+DATASOURCE_QUERY = ("select name from datasource where lower(name) in "
+                    "(select lower(name) from datasource group by lower(name) having count(*) > 1) "
+                    "order by lower(name), name")
+
+def get_null_query(table, fields):
+    counts = ', '.join('count(*) - count(%s)' % field for field in fields)
+    return "select %s from %s" % (counts, table)
+
+def get_duplicate_query(table, field, equal_fields):
+    group_fields = ', '.join([field] + equal_fields)
+    return ("select %s, count(*) from %s where %s is not null group by %s having count(*) > 1 order by %s"
+            % (group_fields, table, field, group_fields, group_fields))
+
+class QueryRunner:
+    """
+    Runs queries in a thread pool with one database connection per thread, timing each one.
+    """
+    def __init__(self, dbname, sqlite_file, jobs):
+        self.dbname = dbname
+        self.sqlite_file = sqlite_file
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=jobs)
+        self.timings = []
+        self.failures = []
+
+    def get_db(self):
+        if not hasattr(self.local, 'db'):
+            self.local.db = Database(self.dbname, self.sqlite_file)
+            with self.lock:
+                self.connections.append(self.local.db)
+        return self.local.db
+
+    def run(self, name, sql):
+        # Returns rows, elapsed time and error message; rows is None if the query failed
+        # (with the error message) or a table does not exist (with no error)
+        db = self.get_db()
+        start_time = time.time()
+        rows = None
+        error = None
+        try:
+            rows = db.query(sql)
+        except Exception as e:
+            if not db.is_missing_table(e):
+                error = str(e).strip()
+        elapsed = time.time() - start_time
+        with self.lock:
+            self.timings.append((elapsed, name))
+            if error:
+                self.failures.append((name, error))
+        return rows, elapsed, error
+
+    def submit(self, name, sql):
+        return self.executor.submit(self.run, name, sql)
+
+    def close(self):
+        self.executor.shutdown()
+        for db in self.connections:
+            db.close()
+
+def has_rows(table, result):
+    # Prints why a query has no result; returns True if it has one
+    rows, elapsed, error = result
+    if error:
+        print("ERROR: query failed: " + error)
+        return False
+    if rows is None:
+        print("Table %s not in database, skipped" % table)
+        return False
+    return True
+
+def report_nulls(table, fields, result):
+    rows, elapsed, error = result
+    found = False
+    print("Checking for null fields... (%.1f sec)" % elapsed)
+    if not has_rows(table, result):
+        return found
+    null_counts = rows[0] if rows else [0] * len(fields)
+    for field, count in zip(fields, null_counts):
+        if count:
+            print("WARNING: %s has %d rows where %s is null" % (table, count, field))
+            found = True
+        else:
+            print("No null values for " + field)
+    return found
+
+def report_duplicates(table, field, equal_fields, result):
+    rows, elapsed, error = result
+    print("Checking for duplicate %ss... (%.1f sec)" % (table, elapsed))
+    if not has_rows(table, result):
+        return False
+    if not rows:
+        print("No duplicate %ss found" % table)
+        return False
+    print("WARNING: %d duplicate %ss found!" % (len(rows), table))
+    print('\t'.join([field] + equal_fields + ['count']))
+    for row in rows:
+        print('\t'.join(str(value) for value in row))
+    return True
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Check database for duplicate entities and null fields.')
+    parser.add_argument('--dbname', help='PostgreSQL database name (default: from ~/.intermine/*.properties)')
+    parser.add_argument('--sqlite', help='SQLite database file to use instead of PostgreSQL')
+    parser.add_argument('--jobs', type=int, default=4, help='number of concurrent queries (default: %(default)s)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    dbname = args.dbname or get_dbname()
+    if not args.sqlite and not dbname:
+        sys.exit("Database name not found in " + PROPERTIES_GLOB)
+    print("Database name is " + (args.sqlite or dbname))
+    print()
+    start_time = time.time()
+
+    # Submit everything up front; results are reported in section order as they complete
+    runner = QueryRunner(dbname, args.sqlite, max(1, args.jobs))
+    null_futures = dict()
+    duplicate_futures = dict()
+    for title, table, null_fields, duplicate_check in SECTIONS:
+        if null_fields:
+            null_futures[table] = runner.submit(table + ' nulls', get_null_query(table, null_fields))
+        if duplicate_check:
+            field, equal_fields = duplicate_check
+            duplicate_futures[table] = runner.submit(table + ' duplicates', get_duplicate_query(table, field, equal_fields))
+    organism_future = runner.submit('organism names', ORGANISM_QUERY)
+    datasource_future = runner.submit('datasource names', DATASOURCE_QUERY)
+
+    nulls_found = False
+    dupes_found = False
+    for title, table, null_fields, duplicate_check in SECTIONS:
+        print(SECTION_DIVIDE)
+        print(title + ":")
+        print()
+        if null_fields:
+            nulls_found |= report_nulls(table, null_fields, null_futures[table].result())
+            print()
+        if duplicate_check:
+            field, equal_fields = duplicate_check
+            dupes_found |= report_duplicates(table, field, equal_fields, duplicate_futures[table].result())
+            print()
+
+    print(SECTION_DIVIDE)
+    result = organism_future.result()
+    rows, elapsed, error = result
+    print("Checking organism names... (%.1f sec)" % elapsed)
+    ok = has_rows('organism', result)
+    if ok and rows:
+        print("WARNING: organism species and sub-species present in database!")
+        print("organisms:")
+        for row in rows:
+            print(row[0])
+        dupes_found = True
+    elif ok:
+        print("No duplicate organisms found.")
+    print()
+
+    print(SECTION_DIVIDE)
+    result = datasource_future.result()
+    rows, elapsed, error = result
+    print("Checking for duplicate (case-insensitive) DataSource names... (%.1f sec)" % elapsed)
+    ok = has_rows('datasource', result)
+    if ok and rows:
+        print("WARNING: duplicate data source names:")
+        for row in rows:
+            print(row[0])
+        dupes_found = True
+    elif ok:
+        print("No duplicate data source names found")
+    runner.close()
+
+    print()
+    print("SUMMARY:")
+    if nulls_found:
+        print("Some entities have fields with null values that shouldn't be empty!")
+    else:
+        print("No null fields found")
+    if dupes_found:
+        print("Duplicates found in database for some entities!")
+    else:
+        print("No duplicate entities found.")
+    if runner.failures:
+        print("Some queries failed, so their checks were not done:")
+        for name, error in runner.failures:
+            print("  %s: %s" % (name, error))
+    print("Slowest queries:")
+    for elapsed, name in sorted(runner.timings, reverse=True)[:5]:
+        print("  %.1f sec  %s" % (elapsed, name))
+    print("Total time: %.1f sec" % (time.time() - start_time))
+    print()
+    sys.exit(1 if nulls_found or dupes_found or runner.failures else 0)
+
+if __name__ == "__main__":
+    main()
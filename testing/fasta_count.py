@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+Count FASTA records (header lines) with a persistent count cache
+
+Used by db_verify.py (cds_protein_fasta_count.sh) to get the expected number of
+CodingSequences and Polypeptides. Uncompressed files are memory-mapped and split into
+chunks that are counted across cores; .gz files are streamed. Header IDs (the text after
+'>' up to the first whitespace) that occur more than once are reported.
+
+Results are stored in a cache file keyed by real path and invalidated when the file's size
+or modification time changes (as in gff_feature_counts.py), so unchanged files are never
+recounted, including when they are reached through a link.
+
+Usage:
+    $ ./fasta_count.py [--jobs N] [--cache FILE] [--json] <fasta file> ...
+Prints "<file><TAB><records><TAB><duplicate ids>" for each file.
+"""
+import os, sys, gzip, json, mmap, argparse
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'fasta_counts.json')
+CHUNK_SIZE = 64 * 1024 * 1024
+# Max number of duplicate IDs to store per file
+MAX_EXAMPLES = 10
+
+def get_header_id(header):
+    fields = header.split(None, 1)
+    return fields[0] if fields else b''
+
+def read_header_id(mm, pos):
+    # Returns the header ID of the record whose '>' is at pos
+    line_end = mm.find(b'\n', pos)
+    if line_end == -1:
+        line_end = len(mm)
+    return get_header_id(mm[pos + 1:line_end])
+
+def read_chunk_ids(chunk):
+    # Returns header IDs of the records whose '>' follows a newline at a position in
+    # [start, end), plus a record at the very start of the file
+    filename, start, end = chunk
+    ids = []
+    with open(filename, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if start == 0 and mm[:1] == b'>':
+            ids.append(read_header_id(mm, 0))
+        search_end = min(end + 1, len(mm))
+        pos = mm.find(b'\n>', start, search_end)
+        while pos != -1:
+            ids.append(read_header_id(mm, pos + 1))
+            pos = mm.find(b'\n>', pos + 2, search_end)
+        mm.close()
+    return ids
+
+def read_gzip_ids(filename):
+    ids = []
+    with gzip.open(filename, 'rb') as f:
+        for line in f:
+            if line.startswith(b'>'):
+                ids.append(get_header_id(line[1:]))
+    return ids
+
+def get_chunks(filename, chunk_size):
+    size = os.path.getsize(filename)
+    return [(filename, start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+def summarize(ids):
+    counts = dict()
+    for header_id in ids:
+        counts[header_id] = counts.get(header_id, 0) + 1
+    duplicates = sorted(header_id for header_id, count in counts.items() if count > 1)
+    return dict(records=len(ids), duplicate_ids=len(duplicates),
+                duplicate_examples=[header_id.decode('utf-8', 'replace') for header_id in duplicates[:MAX_EXAMPLES]])
+
+class FastaCountCache:
+    """
+    Cache of FASTA record counts per file, stored as JSON.
+    """
+    def __init__(self, cache_file=DEFAULT_CACHE):
+        self.cache_file = cache_file
+        self.entries = dict()
+        self.changed = False
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r') as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                # Corrupt cache (e.g., interrupted write): rebuild
+                self.entries = dict()
+
+    def get_counts(self, filenames, jobs=os.cpu_count(), chunk_size=CHUNK_SIZE):
+        # Returns dict of filename -> dict(records, duplicate_ids, duplicate_examples)
+        keys = dict((filename, os.path.realpath(filename)) for filename in filenames)
+        # Stats of the files to (re)count, by real path, so that a file given under
+        # several names is counted once
+        todo = dict()
+        for path in set(keys.values()):
+            st = os.stat(path)
+            entry = self.entries.get(path)
+            if entry is None or entry['size'] != st.st_size or entry['mtime_ns'] != st.st_mtime_ns:
+                todo[path] = st
+        if todo:
+            gzip_files = sorted(path for path in todo if path.endswith('.gz'))
+            chunks = []
+            for path in sorted(todo):
+                if not path.endswith('.gz'):
+                    chunks.extend(get_chunks(path, chunk_size))
+            ids = dict((path, []) for path in todo)
+            with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(chunks) + len(gzip_files)))) as executor:
+                for chunk, chunk_ids in zip(chunks, executor.map(read_chunk_ids, chunks)):
+                    ids[chunk[0]].extend(chunk_ids)
+                for path, file_ids in zip(gzip_files, executor.map(read_gzip_ids, gzip_files)):
+                    ids[path] = file_ids
+            for path, st in todo.items():
+                entry = summarize(ids[path])
+                entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                self.entries[path] = entry
+            self.changed = True
+        return dict((filename, self.entries[keys[filename]]) for filename in filenames)
+
+    def save(self):
+        if not self.changed:
+            return
+        cache_dir = os.path.dirname(self.cache_file)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Write to a temp file and rename so that a concurrent or interrupted run never
+        # sees a partial cache
+        tmp_file = '%s.%d.tmp' % (self.cache_file, os.getpid())
+        with open(tmp_file, 'w') as f:
+            json.dump(self.entries, f, sort_keys=True)
+        os.replace(tmp_file, self.cache_file)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Count FASTA records, using a cache of previous counts.')
+    parser.add_argument('files', nargs='+', help='FASTA file(s), optionally gzipped')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='number of processes (default: number of CPUs)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help='cache file (default: %(default)s)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    files = []
+    for filename in args.files:
+        if os.path.isfile(filename):
+            files.append(filename)
+        else:
+            print("WARNING: " + filename + " not found", file=sys.stderr)
+    cache = FastaCountCache(args.cache)
+    counts = cache.get_counts(files, args.jobs)
+    cache.save()
+    if args.json:
+        print(json.dumps(counts, indent=2))
+    else:
+        for filename in files:
+            print("%s\t%d\t%d" % (filename, counts[filename]['records'], counts[filename]['duplicate_ids']))
+
+if __name__ == "__main__":
+    main()
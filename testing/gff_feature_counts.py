@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Count GFF feature types (column 3) with a persistent per-file index
+
+Used by gff_count.sh to get the expected number of features of each class for an
+organism. Each GFF file is read once and its per-type counts are stored in a cache file,
+keyed by path and invalidated when the file's size or modification time changes, so that
+later test runs look the counts up instead of rescanning the files.
+
+Index entries record the source, organism and assembly parsed from the path
+(/db/<mine_dir>/datasets/<source>/annotations/<organism>/<assembly>/...).
+
+Usage:
+    $ ./gff_feature_counts.py [--by-file] [--cache FILE] <gff file> ...
+Prints "<feature type><TAB><count>" for the given files combined (or per file with
+--by-file), sorted by feature type.
+"""
+import os, sys, json, argparse
+
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'gff_feature_counts.json')
+
+def get_path_info(filename):
+    # Returns source, organism, assembly from a datasets path, if it has that layout
+    parts = os.path.abspath(filename).split(os.sep)
+    info = dict(source=None, organism=None, assembly=None)
+    if 'datasets' in parts:
+        rest = parts[parts.index('datasets') + 1:]
+        if len(rest) > 4 and rest[1] == 'annotations':
+            info = dict(source=rest[0], organism=rest[2], assembly=rest[3])
+    return info
+
+def count_feature_types(filename):
+    counts = dict()
+    with open(filename, 'rb') as f:
+        for line in f:
+            if line.startswith(b'#'):
+                continue
+            fields = line.split(b'\t', 3)
+            if len(fields) < 3:
+                continue
+            feature_type = fields[2]
+            counts[feature_type] = counts.get(feature_type, 0) + 1
+    return dict((feature_type.decode('utf-8', 'replace'), count) for feature_type, count in counts.items())
+
+class FeatureCountIndex:
+    """
+    Cache of feature type counts per GFF file, stored as JSON.
+    """
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.entries = dict()
+        self.changed = False
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r') as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                # Corrupt cache (e.g., interrupted write): rebuild
+                self.entries = dict()
+
+    def get_counts(self, filename):
+        path = os.path.abspath(filename)
+        st = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is None or entry['size'] != st.st_size or entry['mtime_ns'] != st.st_mtime_ns:
+            entry = get_path_info(path)
+            entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns, counts=count_feature_types(path))
+            self.entries[path] = entry
+            self.changed = True
+        return entry['counts']
+
+    def save(self):
+        if not self.changed:
+            return
+        cache_dir = os.path.dirname(self.cache_file)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Write to a temp file and rename so that a concurrent or interrupted run never
+        # sees a partial cache
+        tmp_file = '%s.%d.tmp' % (self.cache_file, os.getpid())
+        with open(tmp_file, 'w') as f:
+            json.dump(self.entries, f, sort_keys=True)
+        os.replace(tmp_file, self.cache_file)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Count GFF feature types (column 3), using a cached per-file index.')
+    parser.add_argument('files', nargs='+', help='GFF file(s)')
+    parser.add_argument('--by-file', action='store_true', help='print counts per file instead of combined')
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help='index file (default: %(default)s)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    index = FeatureCountIndex(args.cache)
+    totals = dict()
+    for filename in args.files:
+        if not os.path.isfile(filename):
+            print("WARNING: " + filename + " not found", file=sys.stderr)
+            continue
+        counts = index.get_counts(filename)
+        if args.by_file:
+            for feature_type in sorted(counts):
+                print(filename + '\t' + feature_type + '\t' + str(counts[feature_type]))
+        for feature_type, count in counts.items():
+            totals[feature_type] = totals.get(feature_type, 0) + count
+    index.save()
+    if not args.by_file:
+        for feature_type in sorted(totals):
+            print(feature_type + '\t' + str(totals[feature_type]))
+
+if __name__ == "__main__":
+    main()
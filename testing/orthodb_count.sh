@@ -5,11 +5,6 @@
 #
 # Check database for correct number of OrthoDB genes
 # and homologues.
-#
-# Note: this script stores homologue counts from input
-# files in an output file in the local temp directory.
-# If the input files change, this output file will need
-# to be deleted in order to have the counts recomputed.
 #######################################################
 
 all_counts_correct=1
@@ -29,24 +24,21 @@ if [ -z $dataset_id ]; then
     exit 1;
 fi
 
-# Use script to count total number of expected homologues
 this_path=$( cd "$(dirname "${BASH_SOURCE[0]}")" ; pwd -P )
-cd "$this_path"
-if [ ! -d "temp" ]; then
-    mkdir temp
-fi
 
 orthodb_filename=$(find /db/*/datasets/OrthoDB/ -maxdepth 1 -name *.tab)
 echo "OrthoDB input file: $orthodb_filename"
 
+# Count expected homologues, clusters and genes in a single pass over the input file
+echo "Computing expected counts from input file..."
+file_stats=$(python3 "${this_path}/../data_parsing/orthodb_stats.py" "$orthodb_filename")
+get_file_stat() {
+    echo "$file_stats" | grep -P "^$1\t" | cut -f 2
+}
+
 # First check total number of OrthoDB homologues
-echo "Counting expected number of OrthoDB homologues from input file..."
-outfile="temp/orthodb_count.txt"
-if [ ! -f "$outfile" ]; then
-    echo "(This will take a while)"
-    ../data_parsing/count_homologues.sh "$orthodb_filename" | tee >(tail -n 1 > $outfile)
-fi
-file_count=$(grep -oE "[0-9]+" "$outfile")
+file_count=$(get_file_stat homologue_pairs)
+echo "Expected number of OrthoDB homologues from input file: $file_count"
 
 # Next do quick check for any null values that shouldn't be null
 echo "Checking for null fields in the database..."
@@ -80,8 +72,8 @@ fi
 echo
 
 # Next check number of clusters
-echo "Counting expected number of clusters from input file..."
-file_count=$(cut -f 2 "$orthodb_filename" | sort | uniq | wc -l)
+file_count=$(get_file_stat clusters)
+echo "Expected number of clusters from input file: $file_count"
 echo "Querying database for number of OrthoDB clusters in Homologue table..."
 dbcount1=$(psql ${dbname} -c "select count(distinct(h.clusterid)) from homologue h join datasetshomologue dh on dh.homologue=h.id where dh.datasets=${dataset_id} and h.clusterid is not null" -t -A)
 echo "Querying database for number of OrthoDB OrthologueClusters..."
@@ -99,8 +91,8 @@ fi
 echo
 
 # Next check number of genes
-echo "Counting expected number of distinct gene IDs from input file..."
-file_count=$(cut -f 3 "$orthodb_filename" | sort | uniq | wc -l)
+file_count=$(get_file_stat genes)
+echo "Expected number of distinct gene IDs from input file: $file_count"
 echo "Querying database for number of OrthoDB gene IDs in homologue table..."
 dbcount=$(psql ${dbname} -c "select count(distinct(geneid)) from homologue h join datasetshomologue dh on dh.homologue=h.id where dh.datasets=${dataset_id}" -t -A)
 if [ ! $file_count -eq $dbcount ]; then
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+"""
+Check database for correct loading of PubMed Gene data source
+
+Can't check counts for this source, so this script spot checks genes+publications from
+the input files. Replaces the per-taxon grep and psql calls in pubmed_gene_test.sh: each
+input file is read once, keeping a random sample of up to --samples lines per taxon id
+(reservoir sampling, so samples come from anywhere in the file rather than always the
+first line), and the samples are checked with one query per batch that joins a VALUES
+list against organism, sequencefeature, entitiespublications and publication.
+
+Input file columns (gene2pubmed format): taxon id, gene id, PubMed id
+
+Usage:
+    $ ./pubmed_gene_test.py [--dbname NAME | --sqlite FILE] [--samples K] [--seed N] [file ...]
+With no files given, checks all files in /db/*/datasets/*pubmed-gene/. Exits with status 1
+if any sampled gene/publication is missing from the database.
+"""
+import os, sys, glob, random, argparse
+from db_verify import Database, get_dbname, PROPERTIES_GLOB
+
+PUBMED_GENE_GLOB = '/db/*/datasets/*pubmed-gene'
+# Samples per query (3 parameters each; stays under SQLite's default limit of 999)
+BATCH_SIZE = 300
+
+def sample_file(filename, k, rng):
+    # Returns (number of lines, dict of taxon id -> list of (gene id, PubMed id) samples)
+    seen = dict()
+    samples = dict()
+    num_lines = 0
+    with open(filename, 'r', errors='replace') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            fields = line.rstrip('\n').split('\t', 3)
+            if len(fields) < 3:
+                continue
+            num_lines += 1
+            taxon_id = fields[0]
+            n = seen.get(taxon_id, 0) + 1
+            seen[taxon_id] = n
+            if n <= k:
+                samples.setdefault(taxon_id, []).append((fields[1], fields[2]))
+            else:
+                j = rng.randrange(n)
+                if j < k:
+                    samples[taxon_id][j] = (fields[1], fields[2])
+    return num_lines, samples
+
+def check_samples(db, samples):
+    # Returns dict of (taxon id, gene id, PubMed id) -> None if the organism is not in the
+    # database, otherwise whether the gene/publication was found
+    rows = [(taxon_id, gene_id, pubmed_id) for taxon_id in sorted(samples) for gene_id, pubmed_id in samples[taxon_id]]
+    results = dict()
+    for i in range(0, len(rows), BATCH_SIZE):
+        batch = rows[i:i + BATCH_SIZE]
+        values = ', '.join(['(%s, %s, %s)' % ((db.placeholder,) * 3)] * len(batch))
+        sql = ("with sample (taxonid, gene_id, pubmed_id) as (values %s) "
+               "select s.taxonid, s.gene_id, s.pubmed_id, o.id, "
+               "exists (select 1 from sequencefeature g join entitiespublications ep on ep.entities=g.id "
+               "join publication p on ep.publications=p.id where g.primaryidentifier=s.gene_id "
+               "and g.organismid=o.id and p.pubmedid=s.pubmed_id) "
+               "from sample s left join organism o on cast(o.taxonid as text)=s.taxonid" % values)
+        params = [value for row in batch for value in row]
+        for taxon_id, gene_id, pubmed_id, org_id, found in db.query(sql, params):
+            key = (taxon_id, gene_id, pubmed_id)
+            if org_id is None:
+                results.setdefault(key, None)
+            else:
+                results[key] = bool(results.get(key)) or bool(found)
+    return results
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Spot check loaded PubMed gene data against the input files.')
+    parser.add_argument('files', nargs='*', help='input file(s) (default: all in %s)' % PUBMED_GENE_GLOB)
+    parser.add_argument('--samples', type=int, default=5, help='lines to check per taxon id (default: %(default)s)')
+    parser.add_argument('--seed', type=int, help='random seed, to repeat a run')
+    parser.add_argument('--dbname', help='PostgreSQL database name (default: from ~/.intermine/*.properties)')
+    parser.add_argument('--sqlite', help='SQLite database file to use instead of PostgreSQL')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    files = args.files
+    if not files:
+        files = sorted(f for f in glob.glob(os.path.join(PUBMED_GENE_GLOB, '*')) if os.path.isfile(f))
+    if not files:
+        print("No PubMed gene input files found")
+        sys.exit(1)
+    dbname = args.dbname or get_dbname()
+    if not args.sqlite and not dbname:
+        sys.exit("Database name not found in " + PROPERTIES_GLOB)
+    db = Database(dbname, args.sqlite)
+    print("Database name is " + db.name)
+    print()
+
+    rng = random.Random(args.seed)
+    all_loads_correct = True
+    for pubmed_file in files:
+        num_lines, samples = sample_file(pubmed_file, max(1, args.samples), rng)
+        num_samples = sum(len(taxon_samples) for taxon_samples in samples.values())
+        print("Checking taxon ids from file %s (%d lines, %d taxon ids, %d samples)..."
+              % (pubmed_file, num_lines, len(samples), num_samples))
+        results = check_samples(db, samples)
+        for taxon_id in sorted(samples, key=lambda t: (len(t), t)):
+            taxon_results = [results.get((taxon_id, gene_id, pubmed_id)) for gene_id, pubmed_id in samples[taxon_id]]
+            if taxon_results and taxon_results[0] is None:
+                print("WARNING: organism with taxon id %s not in database!" % taxon_id)
+                continue
+            for (gene_id, pubmed_id), found in zip(samples[taxon_id], taxon_results):
+                if not found:
+                    print("WARNING: gene id %s, taxon id %s, PubMed id %s not in database!" % (gene_id, taxon_id, pubmed_id))
+                    all_loads_correct = False
+            print("Taxon id %s: %d of %d genes/publications found in database"
+                  % (taxon_id, sum(1 for found in taxon_results if found), len(taxon_results)))
+        print()
+    db.close()
+
+    print()
+    print("SUMMARY:")
+    if not all_loads_correct:
+        print("Some publications/genes were not loaded into the database correctly!")
+    else:
+        print("All publications and genes that were tested loaded correctly.")
+    print()
+    sys.exit(0 if all_loads_correct else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os, sys, sqlite3
+import pytest
+
+this_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(this_path))
+
+import db_verify
+
+FIXTURE_SQL = os.path.join(this_path, 'fixture.sql')
+
+GFF_LINES = [
+    '##gff-version 3',
+    'NC_000001.11\tRefSeq\tgene\t1\t900\t.\t+\t.\tID=gene1',
+    'NC_000001.11\tRefSeq\tmRNA\t1\t900\t.\t+\t.\tID=rna1;Parent=gene1',
+    'NC_000001.11\tRefSeq\texon\t1\t400\t.\t+\t.\tID=exon1;Parent=rna1',
+    'NC_000001.11\tRefSeq\texon\t500\t900\t.\t+\t.\tID=exon2;Parent=rna1',
+    'NC_000001.11\tRefSeq\tgene\t1000\t1900\t.\t-\t.\tID=gene2',
+    'NC_000001.11\tRefSeq\tmRNA\t1000\t1900\t.\t-\t.\tID=rna2;Parent=gene2',
+    'NC_000001.11\tRefSeq\texon\t1000\t1900\t.\t-\t.\tID=exon3;Parent=rna2',
+]
+
+def write_file(path, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+@pytest.fixture
+def db(tmp_path):
+    # SQLite copy of the fixture tables
+    db_file = str(tmp_path / 'fixture.db')
+    conn = sqlite3.connect(db_file)
+    with open(FIXTURE_SQL, 'r') as f:
+        conn.executescript(f.read())
+    conn.close()
+    db = db_verify.Database(sqlite_file=db_file)
+    yield db
+    db.close()
+
+@pytest.fixture
+def datasets(tmp_path, monkeypatch):
+    # Input files matching the fixture database, in the /db/<mine>/datasets layout; the
+    # count caches are kept under tmp_path
+    monkeypatch.setattr(db_verify, 'GFF_CACHE', str(tmp_path / 'gff_feature_counts.json'))
+    monkeypatch.setattr(db_verify, 'FASTA_CACHE', str(tmp_path / 'fasta_counts.json'))
+    datasets_dir = tmp_path / 'db' / 'testmine' / 'datasets'
+    org_dir = os.path.join('homo_sapiens', 'GRCh38')
+    write_file(str(datasets_dir / 'RefSeq' / 'annotations' / org_dir / 'genes' / 'genes.gff3'), GFF_LINES)
+    write_file(str(datasets_dir / 'RefSeq' / 'cds_fasta' / org_dir / 'cds.fa'),
+               ['>cds1 gene=gene1', 'ATG', '>cds2 gene=gene2', 'ATG'])
+    write_file(str(datasets_dir / 'RefSeq' / 'protein_fasta' / org_dir / 'protein.fa'),
+               ['>prot1 gene=gene1', 'M', '>prot2 gene=gene2', 'M'])
+    write_file(str(datasets_dir / 'KEGG_genes' / 'map_title.tab'), ['9606\thsa00010\tGlycolysis', '9606\thsa00020\tCitrate cycle'])
+    write_file(str(datasets_dir / 'KEGG_genes' / 'hsa_gene_map.tab'), ['gene1\thsa00010 hsa00020', 'gene2\thsa00010'])
+    write_file(str(datasets_dir / 'xref' / 'gene' / org_dir / 'xrefs.tab'), ['gene1\txref1', 'gene2\txref2'])
+    write_file(str(datasets_dir / 'QTL' / org_dir / 'qtl.gff3'),
+               ['##gff-version 3', 'NC_000001.11\tQTL\tQTL\t1\t900\t.\t.\t.\tID=qtl1', 'NC_000001.11\tQTL\tQTL\t1000\t1900\t.\t.\t.\tID=qtl2'])
+    return str(datasets_dir)
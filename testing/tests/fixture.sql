@@ -0,0 +1,64 @@
+-- Minimal copy of the production tables used by db_verify.py, for tests.
+-- One organism (Homo sapiens, GRCh38) with a RefSeq gene set: 2 genes, 2 mRNAs,
+-- 3 exons, 2 CodingSequences and 2 Polypeptides; 2 KEGG pathways (3 gene-pathway
+-- pairs), 2 xrefs plus one from another source, and 2 QTLs.
+
+create table organism (id integer primary key, name text, taxonid text);
+create table chromosome (id integer primary key, primaryidentifier text, assembly text, organismid integer);
+create table soterm (id integer primary key, name text);
+create table dataset (id integer primary key, name text);
+create table sequencefeature (id integer primary key, primaryidentifier text, organismid integer, source text,
+    class text, sequenceontologytermid integer);
+create table gene (id integer primary key, primaryidentifier text, organismid integer, source text,
+    class text, sequenceontologytermid integer);
+create table bioentitiesdatasets (bioentities integer, datasets integer);
+create table codingsequence (id integer primary key, primaryidentifier text, organismid integer, source text);
+create table polypeptide (id integer primary key, primaryidentifier text, organismid integer, source text);
+create table pathway (id integer primary key, identifier text, organismid integer);
+create table datasetspathway (datasets integer, pathway integer);
+create table genespathways (genes integer, pathways integer);
+create table crossreference (id integer primary key, identifier text, subjectid integer, targetid integer);
+create table qtl (id integer primary key, primaryidentifier text, organismid integer);
+
+insert into organism values (1, 'Homo sapiens', '9606');
+insert into chromosome values (10, 'NC_000001.11', 'GRCh38', 1);
+
+insert into soterm values (20, 'gene');
+insert into soterm values (21, 'mRNA');
+insert into soterm values (22, 'exon');
+
+insert into dataset values (30, 'RefSeq gene set for Homo sapiens');
+insert into dataset values (31, 'KEGG pathways data set');
+
+insert into gene values (100, 'gene1', 1, 'RefSeq', 'org.intermine.model.bio.Gene', 20);
+insert into gene values (101, 'gene2', 1, 'RefSeq', 'org.intermine.model.bio.Gene', 20);
+insert into bioentitiesdatasets values (100, 30);
+insert into bioentitiesdatasets values (101, 30);
+
+insert into sequencefeature values (100, 'gene1', 1, 'RefSeq', 'org.intermine.model.bio.Gene', 20);
+insert into sequencefeature values (101, 'gene2', 1, 'RefSeq', 'org.intermine.model.bio.Gene', 20);
+insert into sequencefeature values (110, 'rna1', 1, 'RefSeq', 'org.intermine.model.bio.MRNA', 21);
+insert into sequencefeature values (111, 'rna2', 1, 'RefSeq', 'org.intermine.model.bio.MRNA', 21);
+insert into sequencefeature values (120, 'exon1', 1, 'RefSeq', 'org.intermine.model.bio.Exon', 22);
+insert into sequencefeature values (121, 'exon2', 1, 'RefSeq', 'org.intermine.model.bio.Exon', 22);
+insert into sequencefeature values (122, 'exon3', 1, 'RefSeq', 'org.intermine.model.bio.Exon', 22);
+
+insert into codingsequence values (130, 'cds1', 1, 'RefSeq');
+insert into codingsequence values (131, 'cds2', 1, 'RefSeq');
+insert into polypeptide values (140, 'prot1', 1, 'RefSeq');
+insert into polypeptide values (141, 'prot2', 1, 'RefSeq');
+
+insert into pathway values (150, '00010', 1);
+insert into pathway values (151, '00020', 1);
+insert into datasetspathway values (31, 150);
+insert into datasetspathway values (31, 151);
+insert into genespathways values (100, 150);
+insert into genespathways values (100, 151);
+insert into genespathways values (101, 150);
+
+insert into crossreference values (160, 'xref1', 100, 200);
+insert into crossreference values (161, 'xref2', 101, 201);
+insert into crossreference values (162, 'other1', 101, null);
+
+insert into qtl values (170, 'qtl1', 1);
+insert into qtl values (171, 'qtl2', 1);
@@ -0,0 +1,105 @@
+import os
+import pytest
+
+import db_verify
+from conftest import GFF_LINES, write_file
+
+def run_check(check, db, datasets):
+    results = db_verify.Results()
+    check(db, db_verify.OrganismLookup(db), datasets, results)
+    return results
+
+def test_check_gff_counts_correct(db, datasets, capsys):
+    results = run_check(db_verify.check_gff, db, datasets)
+    assert results.all_counts_correct
+    assert "Counts correct for all class names" in capsys.readouterr().out
+
+def test_check_gff_count_mismatch(db, datasets, capsys):
+    gff_file = os.path.join(datasets, 'RefSeq', 'annotations', 'homo_sapiens', 'GRCh38', 'genes', 'genes.gff3')
+    write_file(gff_file, GFF_LINES + ['NC_000001.11\tRefSeq\texon\t2000\t2100\t.\t-\t.\tID=exon4;Parent=rna2'])
+    results = run_check(db_verify.check_gff, db, datasets)
+    assert not results.all_counts_correct
+    assert "WARNING: 3 exons in database, but 4 in input file!" in capsys.readouterr().out
+
+def test_check_gff_unknown_organism(db, datasets, capsys):
+    db.query("update organism set name='Mus musculus'")
+    db.query("update chromosome set assembly='GRCm39'")
+    results = run_check(db_verify.check_gff, db, datasets)
+    assert "WARNING: organism homo sapiens not in database!" in capsys.readouterr().out
+    # Skipped rather than counted as wrong, as in gff_count.sh
+    assert results.all_counts_correct
+
+def test_check_gff_organism_by_assembly(db, datasets):
+    # Organism name differs from the directory name, so it is found by assembly instead
+    db.query("update organism set name='Homo sapiens sapiens'")
+    assert run_check(db_verify.check_gff, db, datasets).all_counts_correct
+
+def test_check_fasta_counts_correct(db, datasets, capsys):
+    results = run_check(db_verify.check_cds_protein, db, datasets)
+    assert results.all_counts_correct
+    out = capsys.readouterr().out
+    assert "CodingSequence count correct (2)" in out
+    assert "Polypeptide count correct (2)" in out
+
+def test_check_fasta_count_mismatch(db, datasets, capsys):
+    db.query("delete from polypeptide where id=141")
+    results = run_check(db_verify.check_cds_protein, db, datasets)
+    assert not results.all_counts_correct
+    out = capsys.readouterr().out
+    assert "CodingSequence count correct (2)" in out
+    assert "WARNING: database has 1 Polypeptides but fasta file has 2!" in out
+
+def test_query_missing_table(db):
+    assert db.query("select count(*) from pseudogene", missing_ok=True) == []
+    with pytest.raises(Exception):
+        db.query("select count(*) from pseudogene")
+
+def test_query_other_errors_raised(db):
+    with pytest.raises(Exception):
+        db.query("select nosuchcolumn from gene", missing_ok=True)
+    # Connection is still usable after the failed query
+    assert db.query("select count(*) from gene") == [(2,)]
+
+def test_check_kegg_counts_correct(db, datasets, capsys):
+    results = run_check(db_verify.check_kegg, db, datasets)
+    assert results.all_counts_correct
+    out = capsys.readouterr().out
+    assert "Checking KEGG genes and pathways for organism with taxon id 9606 and abbreviation hsa" in out
+    assert "Pathway count correct (2 pathways)" in out
+    assert "Genes and pathways count correct (3 total)" in out
+
+def test_check_kegg_integer_taxon_id(db, datasets, capsys):
+    # Mines where organism.taxonid is an integer column
+    db.query("alter table organism rename to organism_text")
+    db.query("create table organism (id integer primary key, name text, taxonid integer)")
+    db.query("insert into organism select id, name, cast(taxonid as integer) from organism_text")
+    assert db.query("select taxonid from organism") == [(9606,)]
+    results = run_check(db_verify.check_kegg, db, datasets)
+    assert results.all_counts_correct
+    assert "Pathway count correct (2 pathways)" in capsys.readouterr().out
+
+def test_check_kegg_count_mismatch(db, datasets, capsys):
+    db.query("delete from genespathways where genes=101")
+    results = run_check(db_verify.check_kegg, db, datasets)
+    assert not results.all_counts_correct
+    out = capsys.readouterr().out
+    assert "WARNING: 3 genes and pathways in hsa_gene_map.tab, but 2 in database!" in out
+    assert "WARNING: 2 genes in hsa_gene_map.tab, but 1 in database!" in out
+
+def test_check_kegg_missing_dataset(db, datasets, capsys):
+    db.query("delete from dataset where id=31")
+    assert not run_check(db_verify.check_kegg, db, datasets).all_counts_correct
+    assert "Data set 'KEGG pathways data set' not in database!" in capsys.readouterr().out
+
+def test_check_xref(db, datasets, capsys):
+    results = run_check(db_verify.check_xref, db, datasets)
+    assert results.all_counts_correct
+    out = capsys.readouterr().out
+    assert "Counts correct (2 xrefs)" in out
+    assert "NOTE: 1 xrefs in database not from xrefs source for this organism" in out
+
+def test_check_qtl_gff_count_mismatch(db, datasets, capsys):
+    db.query("delete from qtl where id=171")
+    results = run_check(db_verify.check_qtl_gff, db, datasets)
+    assert not results.all_counts_correct
+    assert "WARNING: 1 QTLs in database, but 2 in input file!" in capsys.readouterr().out
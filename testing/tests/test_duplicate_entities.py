@@ -0,0 +1,30 @@
+import duplicate_entities
+
+def run_query(db, sql):
+    runner = duplicate_entities.QueryRunner(None, db.name, 1)
+    result = runner.submit('test', sql).result()
+    runner.close()
+    return result, runner.failures
+
+def test_missing_table_skipped(db, capsys):
+    result, failures = run_query(db, duplicate_entities.get_duplicate_query('pseudogene', 'primaryidentifier', ['organismid']))
+    assert not failures
+    assert not duplicate_entities.report_duplicates('pseudogene', 'primaryidentifier', ['organismid'], result)
+    out = capsys.readouterr().out
+    assert "Table pseudogene not in database, skipped" in out
+    assert "No duplicate" not in out
+
+def test_failed_query_reported(db, capsys):
+    result, failures = run_query(db, duplicate_entities.get_null_query('gene', ['nosuchcolumn']))
+    assert [name for name, error in failures] == ['test']
+    assert not duplicate_entities.report_nulls('gene', ['nosuchcolumn'], result)
+    out = capsys.readouterr().out
+    assert "ERROR: query failed: no such column: nosuchcolumn" in out
+    assert "No null values" not in out
+
+def test_duplicates_found(db, capsys):
+    db.query("insert into gene values (102, 'gene1', 1, 'RefSeq', 'org.intermine.model.bio.Gene', 20)")
+    db.conn.commit()
+    result, failures = run_query(db, duplicate_entities.get_duplicate_query('gene', 'primaryidentifier', ['organismid']))
+    assert duplicate_entities.report_duplicates('gene', 'primaryidentifier', ['organismid'], result)
+    assert "gene1\t1\t2" in capsys.readouterr().out
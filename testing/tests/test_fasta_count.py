@@ -0,0 +1,49 @@
+import os
+
+from fasta_count import FastaCountCache
+from conftest import write_file
+
+def get_counts(cache_file, filenames):
+    # Fresh cache object each time, as in separate runs
+    cache = FastaCountCache(cache_file)
+    counts = cache.get_counts(filenames, jobs=1, chunk_size=64 * 1024)
+    cache.save()
+    return counts
+
+def test_counts_records_and_duplicates(tmp_path):
+    fasta_file = str(tmp_path / 'cds.fa')
+    write_file(fasta_file, ['>cds1 gene=gene1', 'ATGATGATG', '>cds2', 'ATG', '>cds1 gene=gene3', 'ATG'])
+    counts = get_counts(str(tmp_path / 'fasta_counts.json'), [fasta_file])[fasta_file]
+    assert counts['records'] == 3
+    assert counts['duplicate_ids'] == 1
+    assert counts['duplicate_examples'] == ['cds1']
+
+def test_same_size_edit_is_recounted(tmp_path):
+    # An edit in the middle of the file that keeps its size must not return the old counts
+    cache_file = str(tmp_path / 'fasta_counts.json')
+    fasta_file = str(tmp_path / 'cds.fa')
+    # Large enough that the edit is not near either end
+    lines = []
+    for i in range(20000):
+        lines.extend(['>cds%05d' % i, 'ATGATGATG'])
+    write_file(fasta_file, lines)
+    assert get_counts(cache_file, [fasta_file])[fasta_file]['duplicate_ids'] == 0
+    size = os.path.getsize(fasta_file)
+    mtime_ns = os.stat(fasta_file).st_mtime_ns
+    lines[20002] = '>cds10000'
+    write_file(fasta_file, lines)
+    os.utime(fasta_file, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    assert os.path.getsize(fasta_file) == size
+    assert get_counts(cache_file, [fasta_file])[fasta_file]['duplicate_ids'] == 1
+
+def test_unchanged_file_uses_cache(tmp_path, monkeypatch):
+    cache_file = str(tmp_path / 'fasta_counts.json')
+    fasta_file = str(tmp_path / 'cds.fa')
+    link_file = str(tmp_path / 'link.fa')
+    write_file(fasta_file, ['>cds1', 'ATG', '>cds2', 'ATG'])
+    os.symlink(fasta_file, link_file)
+    get_counts(cache_file, [fasta_file])
+    # Unchanged file, also under another name: nothing is read
+    monkeypatch.setattr('fasta_count.get_chunks', None)
+    counts = get_counts(cache_file, [fasta_file, link_file])
+    assert counts[fasta_file]['records'] == counts[link_file]['records'] == 2